@@ -10,6 +10,10 @@ from flask_cors import CORS
 from datetime import timedelta
 import secrets
 import os
+import time
+
+# Durée d'import des modules applicatifs (rapportée au démarrage)
+IMPORT_STARTED = time.perf_counter()
 
 # Importer les middlewares
 from middleware import (
@@ -21,6 +25,12 @@ from middleware import (
 
 # Importer les routes (blueprints)
 from route import auth_bp, api_bp
+from services import gemini_chatbot
+from services.database import DATABASE_PATH, get_db_connection, init_database_pool
+from services.job_queue import JobWorkers
+from controllers import chat_controller
+
+IMPORT_TIME_MS = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
 
 # ============================================
 # CONFIGURATION DE L'APPLICATION
@@ -34,7 +44,7 @@ app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB max
 app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'jpg', 'jpeg', 'png'}
-app.config['DATABASE'] = 'database/chatbot.db'
+app.config['DATABASE'] = DATABASE_PATH
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
 
 # Enable CORS
@@ -42,7 +52,7 @@ CORS(app, supports_credentials=True)
 
 # Créer les dossiers nécessaires
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs('database', exist_ok=True)
+os.makedirs(os.path.dirname(DATABASE_PATH) or '.', exist_ok=True)
 os.makedirs('logs', exist_ok=True)
 
 # ============================================
@@ -54,6 +64,7 @@ init_auth_middleware(app)
 init_validation_middleware(app)
 init_logging_middleware(app)
 init_error_handlers(app)
+init_database_pool(app)
 print("✅ Middlewares initialisés avec succès")
 
 # ============================================
@@ -64,6 +75,16 @@ print("📋 Enregistrement des routes...")
 app.register_blueprint(auth_bp)
 app.register_blueprint(api_bp)
 print("✅ Routes enregistrées avec succès")
+print(f"⏱️  Modules importés en {IMPORT_TIME_MS} ms")
+if gemini_chatbot.LLM_PROVIDER == 'local':
+    print("🧪 Fournisseur LLM local (réponses simulées, tests de charge)")
+elif gemini_chatbot.is_degraded():
+    print("⚠️  Gemini: GEMINI_API_KEY absente, mode dégradé (réponses de secours uniquement)")
+else:
+    backends = gemini_chatbot.parse_gemini_backends(gemini_chatbot.GEMINI_BACKENDS)
+    models = ", ".join(sorted({model_name for _, model_name in backends}))
+    pool = f", pool de {len(backends)} clés/modèles" if len(backends) > 1 else ""
+    print(f"🤖 Gemini: {models} (initialisé au premier message{pool})")
 
 # ============================================
 # ROUTES - PAGES WEB (VUES)
@@ -121,12 +142,10 @@ def chat():
     
     # Créer une session de chat si nécessaire
     if 'chat_session_id' not in session:
-        import sqlite3
         session['chat_session_id'] = secrets.token_hex(16)
         
         # Enregistrer la session dans la BD
-        conn = sqlite3.connect(app.config['DATABASE'])
-        conn.row_factory = sqlite3.Row
+        conn = get_db_connection()
         conn.execute(
             'INSERT INTO chat_sessions (session_id, user_id) VALUES (?, ?)',
             (session['chat_session_id'], session['user_id'])
@@ -296,6 +315,12 @@ def init_database():
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_etablissement ON preinscriptions(etablissement_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_filiere ON preinscriptions(filiere_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_role ON messages(session_id, role)")
+    # Listes paginées par curseur (clé de tri + id)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_date ON preinscriptions(date_soumission)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_user_date ON preinscriptions(user_id, date_soumission)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_filieres_liste ON filieres(actif, IFNULL(niveau, ''), nom)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_etablissements_liste ON etablissements(actif, nom)")
     
     # Insérer des données de test si la table établissements est vide
     cursor.execute("SELECT COUNT(*) FROM etablissements")
@@ -333,6 +358,15 @@ def init_database():
 # Initialiser la base de données au démarrage
 init_database()
 
+# Workers de la file des messages dans le processus (mode job); en
+# production, ils tournent plutôt dans un processus dédié (chat_worker.py)
+if gemini_chatbot.chat_jobs is not None and gemini_chatbot.CHAT_JOB_WORKERS_INPROCESS > 0:
+    JobWorkers(
+        gemini_chatbot.chat_jobs, chat_controller.process_chat_job,
+        threads=gemini_chatbot.CHAT_JOB_WORKERS_INPROCESS
+    ).start()
+    print(f"📬 {gemini_chatbot.CHAT_JOB_WORKERS_INPROCESS} worker(s) de la file des messages démarré(s)")
+
 # ============================================
 # POINT D'ENTRÉE
 # ============================================
@@ -0,0 +1,129 @@
+"""
+Point d'entrée ASGI de l'application
+POST /api/message y est servi par la vue asynchrone: l'appel au modèle est
+attendu sans bloquer de thread et le message de l'utilisateur est
+enregistré pendant ce temps. Les autres routes passent par l'application
+Flask (WSGI) via asgiref.
+
+Lancement: uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 3
+"""
+
+import inspect
+import io
+import os
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+from route.api_routes import ASYNC_ROUTES
+
+# false: toutes les routes passent par l'application WSGI
+ASYNC_CHAT_ENABLED = os.getenv('ASYNC_CHAT_ENABLED', 'true').lower() == 'true'
+
+wsgi_application = WsgiToAsgi(app)
+
+
+def build_environ(scope, body):
+    """
+    Environnement WSGI d'une requête HTTP ASGI
+
+    Args:
+        scope (dict): Scope ASGI de la requête
+        body (bytes): Corps complet de la requête
+
+    Returns:
+        dict: Environnement WSGI (pour le contexte de requête Flask)
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': client[1],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1')
+        value = value.decode('latin1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        if key in environ:
+            value = f"{environ[key]}{'; ' if key == 'HTTP_COOKIE' else ','}{value}"
+        environ[key] = value
+    return environ
+
+
+async def read_body(receive):
+    """Lit le corps complet d'une requête ASGI"""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+async def dispatch(view, scope, receive, send):
+    """
+    Sert une requête avec une vue asynchrone dans un contexte de requête Flask
+
+    Les hooks before_request/after_request, la session et les gestionnaires
+    d'erreurs de l'application s'appliquent comme sur le chemin WSGI.
+    """
+    environ = build_environ(scope, await read_body(receive))
+    ctx = app.request_context(environ)
+    error = None
+    ctx.push()
+    try:
+        try:
+            rv = app.preprocess_request()
+            if rv is None:
+                rv = view()
+                if inspect.isawaitable(rv):
+                    rv = await rv
+        except Exception as e:
+            rv = app.handle_user_exception(e)
+        response = app.finalize_request(rv)
+    except Exception as e:
+        error = e
+        response = app.handle_exception(e)
+    finally:
+        ctx.pop(error)
+
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [
+            (name.lower().encode('latin1'), value.encode('latin1'))
+            for name, value in response.headers.items()
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': response.get_data()})
+
+
+async def application(scope, receive, send):
+    """Application ASGI: routes asynchrones, sinon l'application Flask"""
+    if scope['type'] == 'http' and ASYNC_CHAT_ENABLED:
+        view = ASYNC_ROUTES.get((scope['method'], scope['path']))
+        if view is not None:
+            await dispatch(view, scope, receive, send)
+            return
+    await wsgi_application(scope, receive, send)
@@ -0,0 +1,43 @@
+"""
+Worker de la file des messages (mode job de POST /api/message)
+Vide la file CHAT_JOBS_PATH: génère chaque réponse et l'enregistre, pour
+que les workers HTTP ne soient jamais occupés par le modèle.
+
+Usage:
+    CHAT_JOB_MODE=optional python chat_worker.py --threads 8
+"""
+
+import argparse
+import signal
+import threading
+
+from services import gemini_chatbot
+from services.job_queue import JobWorkers
+from controllers import chat_controller
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de la file des messages du chatbot")
+    parser.add_argument('--threads', type=int, default=8,
+                        help="Messages traités simultanément (défaut: 8)")
+    args = parser.parse_args()
+
+    if gemini_chatbot.chat_jobs is None:
+        print("❌ Mode job désactivé: définir CHAT_JOB_MODE=optional ou always")
+        return 1
+
+    workers = JobWorkers(gemini_chatbot.chat_jobs, chat_controller.process_chat_job, threads=args.threads)
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    workers.start()
+    print(f"📬 Worker de la file {gemini_chatbot.CHAT_JOBS_PATH} démarré ({args.threads} threads)")
+    stopping.wait()
+    print("🛑 Arrêt: fin des messages en cours...")
+    workers.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -17,14 +17,7 @@ from middleware import (
     log_auth_attempt,
     log_user_action
 )
-
-DATABASE = 'database/chatbot.db'
-
-def get_db_connection():
-    """Crée une connexion à la base de données"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+from services.database import get_db_connection
 
 def hash_password(password):
     """Hashe un mot de passe avec SHA-256"""
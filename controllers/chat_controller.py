@@ -5,103 +5,260 @@ Gère les conversations avec le chatbot
 
 from flask import request, session, g
 from datetime import datetime
-import sqlite3
+import asyncio
 import secrets
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from services import gemini_chatbot
+from services.job_queue import QueueFull, DONE, FAILED
+from services.stage_timings import StageTimings
+from services.database import get_db_connection
 from middleware import log_user_action
 
-DATABASE = 'database/chatbot.db'
+# Écritures en base recouvrant l'appel au modèle (voir send_message)
+io_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="chat-io")
 
-def get_db_connection():
-    """Crée une connexion à la base de données"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Durée des étapes de send_message (validation, appel au modèle, écritures)
+send_timings = StageTimings()
 
 # ============================================
-# CONTRÔLEUR - ENVOI DE MESSAGE
+# FONCTIONS UTILITAIRES DU CHAT
 # ============================================
 
-def send_message():
+def begin_chat_turn():
     """
-    Envoie un message au chatbot et récupère la réponse
+    Valide la requête et prépare le tour de conversation, sans écrire en base
+    
+    La session de chat est créée si nécessaire (enregistrée avec le message
+    de l'utilisateur, voir save_user_message). Le nom de l'utilisateur
+    connecté est lu dans sa session Flask; la base n'est interrogée que pour
+    les sessions ouvertes sans ce nom, une fois (le nom y est alors gardé).
     
     Returns:
-        tuple: (response_dict, status_code)
+        tuple: (turn_dict, None) en cas de succès, (None, (response_dict, status_code)) sinon
     """
-    try:
-        data = request.get_json()
-        
-        message = data.get('message', '').strip()
-        session_id = data.get('session_id') or session.get('chat_session_id')
-        
-        if not message:
-            return {
-                'success': False,
-                'error': 'Le message ne peut pas être vide',
-                'code': 'EMPTY_MESSAGE'
-            }, 400
-        
-        # Créer une session de chat si nécessaire
-        if not session_id:
-            session_id = secrets.token_hex(16)
-            session['chat_session_id'] = session_id
-            
-            # Enregistrer la session dans la BD
-            conn = get_db_connection()
-            user_id = g.user_id if hasattr(g, 'user_id') else None
-            conn.execute(
-                'INSERT INTO chat_sessions (session_id, user_id) VALUES (?, ?)',
-                (session_id, user_id)
-            )
-            conn.commit()
-            conn.close()
-        
-        # Sauvegarder le message de l'utilisateur
-        conn = get_db_connection()
-        user_id = g.user_id if hasattr(g, 'user_id') else None
-        
-        conn.execute(
-            'INSERT INTO messages (session_id, user_id, role, contenu) VALUES (?, ?, ?, ?)',
-            (session_id, user_id, 'user', message)
-        )
-        conn.commit()
-        
-        # Récupérer le nom de l'utilisateur si connecté
-        user_name = None
-        if user_id:
+    data = request.get_json()
+    
+    message = data.get('message', '').strip()
+    session_id = data.get('session_id') or session.get('chat_session_id')
+    
+    if not message:
+        return None, ({
+            'success': False,
+            'error': 'Le message ne peut pas être vide',
+            'code': 'EMPTY_MESSAGE'
+        }, 400)
+    
+    user_id = g.user_id if hasattr(g, 'user_id') else None
+    
+    # Créer une session de chat si nécessaire
+    if not session_id:
+        session_id = secrets.token_hex(16)
+        session['chat_session_id'] = session_id
+    
+    # Nom de l'utilisateur si connecté (session Flask, sinon base)
+    user_name = None
+    if user_id:
+        if session.get('prenom') or session.get('nom'):
+            user_name = f"{session.get('prenom', '')} {session.get('nom', '')}".strip()
+        else:
             try:
+                conn = get_db_connection()
                 user = conn.execute(
                     'SELECT nom, prenom FROM users WHERE id = ?',
                     (user_id,)
                 ).fetchone()
+                conn.close()
                 if user:
                     user_name = f"{user['prenom']} {user['nom']}"
+                    # Gardé dans la session: la base n'est lue qu'au premier message
+                    session['prenom'] = user['prenom']
+                    session['nom'] = user['nom']
             except:
                 pass
-        
-        # Générer la réponse avec Gemini AI
-        try:
-            bot_response = gemini_chatbot.generate_response(message, session_id, user_name)
-        except Exception as e:
-            print(f"⚠️ Erreur Gemini, utilisation fallback: {e}")
-            bot_response = gemini_chatbot.get_fallback_response(message)
-        
-        # Sauvegarder la réponse du bot
+    
+    return {
+        'message': message,
+        'session_id': session_id,
+        'user_id': user_id,
+        'user_name': user_name
+    }, None
+
+
+def save_user_message(turn):
+    """
+    Enregistre le message de l'utilisateur (et sa session si nouvelle)
+    
+    Avec l'écriture différée (MESSAGE_WRITE_BEHIND), le message est déposé
+    dans la file du worker et enregistré avec le lot suivant.
+    """
+    writer = gemini_chatbot.message_writer
+    if writer is not None:
+        writer.add_session(turn['session_id'], turn['user_id'])
+        writer.add_message(turn['session_id'], turn['user_id'], 'user', turn['message'])
+        return
+    
+    # Appelée hors requête (thread d'écriture): connexion rendue dans tous les cas
+    conn = get_db_connection()
+    try:
+        # Session transmise par le client mais inconnue: créée (clés étrangères)
+        conn.execute(
+            'INSERT OR IGNORE INTO chat_sessions (session_id, user_id) VALUES (?, ?)',
+            (turn['session_id'], turn['user_id'])
+        )
         conn.execute(
             'INSERT INTO messages (session_id, user_id, role, contenu) VALUES (?, ?, ?, ?)',
-            (session_id, user_id, 'bot', bot_response)
+            (turn['session_id'], turn['user_id'], 'user', turn['message'])
         )
         conn.commit()
-        
-        # Mettre à jour l'activité de la session
+    finally:
+        conn.close()
+
+
+def timed_save_user_message(turn):
+    """save_user_message et sa durée (secondes)"""
+    started = time.perf_counter()
+    save_user_message(turn)
+    return time.perf_counter() - started
+
+
+def open_chat_turn():
+    """
+    Valide la requête, crée la session de chat si nécessaire et
+    enregistre le message de l'utilisateur
+    
+    Returns:
+        tuple: (turn_dict, None) en cas de succès, (None, (response_dict, status_code)) sinon
+    """
+    turn, error = begin_chat_turn()
+    if error:
+        return None, error
+    save_user_message(turn)
+    return turn, None
+
+
+def save_bot_message(session_id, user_id, bot_response, ensure_session=False):
+    """
+    Enregistre la réponse du bot et met à jour l'activité de la session
+    (une seule transaction, ou le lot suivant de l'écriture différée)
+    
+    Args:
+        ensure_session: Créer la session de chat si elle n'existe pas
+            (l'enregistrement du message de l'utilisateur a échoué)
+    """
+    writer = gemini_chatbot.message_writer
+    if writer is not None:
+        if ensure_session:
+            writer.add_session(session_id, user_id)
+        writer.add_message(
+            session_id, user_id, 'bot', bot_response,
+            on_saved=lambda message_id: gemini_chatbot.mark_context_synced(session_id, message_id, bot_response)
+        )
+        writer.touch_session(session_id)
+        return
+    
+    # Appelée aussi hors requête (workers de la file): connexion rendue dans tous les cas
+    conn = get_db_connection()
+    try:
+        if ensure_session:
+            conn.execute(
+                'INSERT OR IGNORE INTO chat_sessions (session_id, user_id) VALUES (?, ?)',
+                (session_id, user_id)
+            )
+        cursor = conn.execute(
+            'INSERT INTO messages (session_id, user_id, role, contenu) VALUES (?, ?, ?, ?)',
+            (session_id, user_id, 'bot', bot_response)
+        )
         conn.execute(
             'UPDATE chat_sessions SET last_activity = CURRENT_TIMESTAMP WHERE session_id = ?',
             (session_id,)
         )
         conn.commit()
+    finally:
         conn.close()
+    gemini_chatbot.mark_context_synced(session_id, cursor.lastrowid, bot_response)
+
+
+def flush_pending_messages():
+    """Attend l'enregistrement des messages déposés par ce worker (écriture différée)"""
+    if gemini_chatbot.message_writer is not None:
+        gemini_chatbot.message_writer.flush(timeout=1)
+
+
+def format_sse(event, data):
+    """Formate un événement Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# ============================================
+# CONTRÔLEUR - ENVOI DE MESSAGE
+# ============================================
+
+def send_message():
+    """
+    Envoie un message au chatbot et récupère la réponse
+    
+    L'échéance de la requête (CHAT_DEADLINE_SECONDS) court dès la réception:
+    si le modèle ne répond pas à temps, la réponse de secours est envoyée.
+    En mode job (CHAT_JOB_MODE), le message est déposé dans la file et
+    l'identifiant du travail est retourné (voir enqueue_message).
+    
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    if wants_job_mode():
+        return enqueue_message()
+    
+    deadline = gemini_chatbot.new_deadline()
+    started = time.perf_counter()
+    try:
+        turn, error = begin_chat_turn()
+        if error:
+            return error
+        stages = {'validate': time.perf_counter() - started}
+        
+        message = turn['message']
+        session_id = turn['session_id']
+        user_id = turn['user_id']
+        
+        # Le message de l'utilisateur est enregistré pendant l'appel au modèle
+        # (l'historique rechargé s'arrête à la dernière réponse du bot)
+        user_write = io_executor.submit(timed_save_user_message, turn)
+        
+        # Générer la réponse avec Gemini AI
+        stage_started = time.perf_counter()
+        try:
+            bot_response = gemini_chatbot.generate_response(
+                message, session_id, turn['user_name'], deadline=deadline
+            )
+        except Exception as e:
+            print(f"⚠️ Erreur Gemini, utilisation fallback: {e}")
+            bot_response = gemini_chatbot.get_fallback_response(gemini_chatbot.detect_intent(message))
+        stages['generate'] = time.perf_counter() - stage_started
+        
+        # Le message de l'utilisateur précède toujours la réponse en base. Un
+        # échec d'écriture n'empêche pas de renvoyer la réponse déjà générée
+        stage_started = time.perf_counter()
+        user_saved = True
+        try:
+            stages['user_write'] = user_write.result()
+        except Exception as e:
+            user_saved = False
+            print(f"❌ Message utilisateur non enregistré ({session_id}): {e}")
+        stages['user_write_wait'] = time.perf_counter() - stage_started
+        if user_saved:
+            # Temps d'écriture masqué par l'appel au modèle
+            stages['user_write_overlapped'] = max(0.0, stages['user_write'] - stages['user_write_wait'])
+        
+        stage_started = time.perf_counter()
+        try:
+            save_bot_message(session_id, user_id, bot_response, ensure_session=not user_saved)
+        except Exception as e:
+            print(f"❌ Réponse du bot non enregistrée ({session_id}): {e}")
+        stages['bot_write'] = time.perf_counter() - stage_started
+        stages['total'] = time.perf_counter() - started
+        send_timings.record(stages)
         
         if user_id:
             log_user_action('CHAT_MESSAGE', user_id, {
@@ -125,6 +282,291 @@ def send_message():
         }, 500
 
 
+async def send_message_async():
+    """
+    Version asynchrone de send_message (chemin ASGI, voir asgi.py)
+    
+    L'enregistrement du message de l'utilisateur se fait pendant l'appel au
+    modèle (l'historique rechargé s'arrête à la dernière réponse du bot);
+    les accès à la base passent par des threads pour ne pas bloquer la
+    boucle d'événements.
+    
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    if wants_job_mode():
+        return await asyncio.to_thread(enqueue_message)
+    
+    deadline = gemini_chatbot.new_deadline()
+    try:
+        turn, error = await asyncio.to_thread(begin_chat_turn)
+        if error:
+            return error
+        
+        message = turn['message']
+        session_id = turn['session_id']
+        user_id = turn['user_id']
+        
+        saved = asyncio.create_task(asyncio.to_thread(save_user_message, turn))
+        try:
+            bot_response = await gemini_chatbot.generate_response_async(
+                message, session_id, turn['user_name'], deadline=deadline
+            )
+        except Exception as e:
+            print(f"⚠️ Erreur Gemini, utilisation fallback: {e}")
+            bot_response = gemini_chatbot.get_fallback_response(gemini_chatbot.detect_intent(message))
+        # Le message de l'utilisateur précède toujours la réponse en base. Un
+        # échec d'écriture n'empêche pas de renvoyer la réponse déjà générée
+        user_saved = True
+        try:
+            await saved
+        except Exception as e:
+            user_saved = False
+            print(f"❌ Message utilisateur non enregistré ({session_id}): {e}")
+        
+        try:
+            await asyncio.to_thread(save_bot_message, session_id, user_id, bot_response, not user_saved)
+        except Exception as e:
+            print(f"❌ Réponse du bot non enregistrée ({session_id}): {e}")
+        
+        if user_id:
+            await asyncio.to_thread(log_user_action, 'CHAT_MESSAGE', user_id, {
+                'session_id': session_id,
+                'message_length': len(message)
+            })
+        
+        return {
+            'success': True,
+            'response': bot_response,
+            'session_id': session_id,
+            'timestamp': datetime.now().isoformat()
+        }, 200
+        
+    except Exception as e:
+        print(f"❌ Erreur dans send_message_async: {e}")
+        return {
+            'success': False,
+            'error': 'Erreur lors de l\'envoi du message',
+            'code': 'INTERNAL_ERROR'
+        }, 500
+
+
+def stream_message():
+    """
+    Envoie un message au chatbot et diffuse la réponse en Server-Sent Events
+    
+    Événements émis:
+        - chunk: {"delta": "..."} pour chaque fragment généré
+        - done: {"session_id": "...", "timestamp": "..."} en fin de flux
+    
+    La réponse complète est enregistrée dans la table messages une fois
+    le flux terminé (y compris si le client se déconnecte en cours de route).
+    
+    Le premier fragment doit arriver avant l'échéance (CHAT_DEADLINE_SECONDS),
+    sinon la réponse de secours est diffusée.
+    
+    Returns:
+        tuple: (generator, 200) en cas de succès, (response_dict, status_code) sinon
+    """
+    deadline = gemini_chatbot.new_deadline()
+    try:
+        turn, error = open_chat_turn()
+        if error:
+            return error
+        
+        message = turn['message']
+        session_id = turn['session_id']
+        user_id = turn['user_id']
+        
+        if user_id:
+            log_user_action('CHAT_MESSAGE', user_id, {
+                'session_id': session_id,
+                'message_length': len(message),
+                'stream': True
+            })
+        
+        def event_stream():
+            chunks = []
+            try:
+                for chunk in gemini_chatbot.generate_response_stream(
+                    message, session_id, turn['user_name'], deadline=deadline
+                ):
+                    chunks.append(chunk)
+                    yield format_sse('chunk', {'delta': chunk})
+            finally:
+                bot_response = "".join(chunks).strip()
+                if bot_response:
+                    try:
+                        save_bot_message(session_id, user_id, bot_response)
+                    except Exception as e:
+                        print(f"❌ Erreur lors de l'enregistrement de la réponse streamée: {e}")
+            
+            yield format_sse('done', {
+                'session_id': session_id,
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        return event_stream(), 200
+        
+    except Exception as e:
+        print(f"❌ Erreur dans stream_message: {e}")
+        return {
+            'success': False,
+            'error': 'Erreur lors de l\'envoi du message',
+            'code': 'INTERNAL_ERROR'
+        }, 500
+
+
+# ============================================
+# CONTRÔLEUR - MODE JOB (FILE DES MESSAGES)
+# ============================================
+
+def wants_job_mode():
+    """Vrai si le message doit passer par la file (CHAT_JOB_MODE, champ "mode")"""
+    if gemini_chatbot.chat_jobs is None:
+        return False
+    if gemini_chatbot.CHAT_JOB_MODE == 'always':
+        return True
+    data = request.get_json(silent=True) or {}
+    return data.get('mode') == 'job' or request.args.get('mode') == 'job'
+
+
+def enqueue_message():
+    """
+    Enregistre le message et dépose sa génération dans la file
+    
+    Returns:
+        tuple: (response_dict, 202) avec l'identifiant du travail,
+               (response_dict, 503) si la file est pleine
+    """
+    try:
+        turn, error = open_chat_turn()
+        if error:
+            return error
+        
+        try:
+            job_id, depth = gemini_chatbot.chat_jobs.enqueue(turn)
+        except QueueFull as e:
+            print(f"⚠️ {e}")
+            return {
+                'success': False,
+                'error': 'Le service est momentanément surchargé, réessayez dans quelques instants',
+                'code': 'QUEUE_FULL'
+            }, 503
+        
+        if turn['user_id']:
+            log_user_action('CHAT_MESSAGE', turn['user_id'], {
+                'session_id': turn['session_id'],
+                'message_length': len(turn['message']),
+                'job_id': job_id
+            })
+        
+        return {
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'queue_depth': depth,
+            'session_id': turn['session_id'],
+            'poll_url': f"/api/message/jobs/{job_id}"
+        }, 202
+        
+    except Exception as e:
+        print(f"❌ Erreur dans enqueue_message: {e}")
+        return {
+            'success': False,
+            'error': 'Erreur lors de l\'envoi du message',
+            'code': 'INTERNAL_ERROR'
+        }, 500
+
+
+def get_message_job(job_id, wait=None):
+    """
+    Récupère la réponse d'un message déposé dans la file (long-polling)
+    
+    Args:
+        job_id: Identifiant du travail
+        wait: Attente maximale de la fin du travail (secondes, plafonnée à
+              CHAT_JOB_POLL_WAIT_SECONDS)
+        
+    Returns:
+        tuple: (response_dict, 200) si terminé, (response_dict, 202) sinon
+    """
+    try:
+        if gemini_chatbot.chat_jobs is None:
+            return {
+                'success': False,
+                'error': 'Mode job désactivé',
+                'code': 'JOB_MODE_DISABLED'
+            }, 404
+        
+        limit = gemini_chatbot.CHAT_JOB_POLL_WAIT_SECONDS
+        wait = limit if wait is None else min(max(0.0, wait), limit)
+        job = gemini_chatbot.chat_jobs.wait(job_id, wait)
+        
+        # Un travail n'est visible que de l'utilisateur qui l'a déposé
+        user_id = g.user_id if hasattr(g, 'user_id') else None
+        if not job or job['payload'].get('user_id') != user_id:
+            return {
+                'success': False,
+                'error': 'Travail non trouvé',
+                'code': 'JOB_NOT_FOUND'
+            }, 404
+        
+        if job['status'] == DONE:
+            return {
+                'success': True,
+                'job_id': job_id,
+                'status': DONE,
+                **job['result']
+            }, 200
+        
+        if job['status'] == FAILED:
+            return {
+                'success': False,
+                'job_id': job_id,
+                'status': FAILED,
+                'error': 'Le message n\'a pas pu être traité, renvoyez-le',
+                'code': 'JOB_EXPIRED' if job['error'] == 'expired' else 'JOB_FAILED'
+            }, 200
+        
+        return {
+            'success': True,
+            'job_id': job_id,
+            'status': job['status'],
+            'session_id': job['payload']['session_id']
+        }, 202
+        
+    except Exception as e:
+        print(f"❌ Erreur dans get_message_job: {e}")
+        return {
+            'success': False,
+            'error': 'Erreur lors de la récupération de la réponse',
+            'code': 'INTERNAL_ERROR'
+        }, 500
+
+
+def process_chat_job(turn):
+    """
+    Génère et enregistre la réponse d'un message de la file (workers, voir chat_worker.py)
+    
+    Args:
+        turn (dict): message, session_id, user_id, user_name (voir open_chat_turn)
+        
+    Returns:
+        dict: Résultat du travail (response, session_id, timestamp)
+    """
+    bot_response = gemini_chatbot.generate_response(
+        turn['message'], turn['session_id'], turn['user_name'],
+        deadline=gemini_chatbot.new_deadline()
+    )
+    save_bot_message(turn['session_id'], turn['user_id'], bot_response)
+    return {
+        'response': bot_response,
+        'session_id': turn['session_id'],
+        'timestamp': datetime.now().isoformat()
+    }
+
+
 # ============================================
 # CONTRÔLEUR - HISTORIQUE DES MESSAGES
 # ============================================
@@ -140,6 +582,7 @@ def get_message_history(session_id):
         tuple: (response_dict, status_code)
     """
     try:
+        flush_pending_messages()
         conn = get_db_connection()
         
         # Vérifier que la session existe
@@ -161,7 +604,7 @@ def get_message_history(session_id):
             SELECT role, contenu, timestamp
             FROM messages
             WHERE session_id = ?
-            ORDER BY timestamp ASC
+            ORDER BY timestamp ASC, id ASC
         ''', (session_id,)).fetchall()
         conn.close()
         
@@ -201,6 +644,7 @@ def get_user_chat_sessions():
         tuple: (response_dict, status_code)
     """
     try:
+        flush_pending_messages()
         user_id = g.user_id
         
         conn = get_db_connection()
@@ -253,6 +697,7 @@ def delete_chat_session(session_id):
         tuple: (response_dict, status_code)
     """
     try:
+        flush_pending_messages()
         user_id = g.user_id
         
         conn = get_db_connection()
@@ -301,3 +746,93 @@ def delete_chat_session(session_id):
             'error': 'Erreur lors de la suppression de la session',
             'code': 'INTERNAL_ERROR'
         }, 500
+
+
+# ============================================
+# CONTRÔLEUR - MÉTRIQUES DU CHAT
+# ============================================
+
+def get_chat_metrics():
+    """
+    Récupère les métriques du service de chat (worker courant)
+    
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    try:
+        return {
+            'success': True,
+            'metrics': {**gemini_chatbot.get_metrics(), 'send_message_stages': send_timings.stats()},
+            'timestamp': datetime.now().isoformat()
+        }, 200
+        
+    except Exception as e:
+        print(f"❌ Erreur dans get_chat_metrics: {e}")
+        return {
+            'success': False,
+            'error': 'Erreur lors de la récupération des métriques',
+            'code': 'INTERNAL_ERROR'
+        }, 500
+
+
+def get_response_cache():
+    """
+    Récupère l'état du cache des réponses et les réponses les plus servies
+    
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    try:
+        if gemini_chatbot.response_cache is None:
+            return {
+                'success': False,
+                'error': 'Le cache des réponses est désactivé',
+                'code': 'CACHE_DISABLED'
+            }, 404
+        
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        
+        return {
+            'success': True,
+            'stats': gemini_chatbot.response_cache.stats(),
+            'entries': gemini_chatbot.response_cache.entries(limit)
+        }, 200
+        
+    except Exception as e:
+        print(f"❌ Erreur dans get_response_cache: {e}")
+        return {
+            'success': False,
+            'error': 'Erreur lors de la récupération du cache',
+            'code': 'INTERNAL_ERROR'
+        }, 500
+
+
+def purge_response_cache():
+    """
+    Vide le cache des réponses (optionnellement pour une seule intention)
+    
+    Returns:
+        tuple: (response_dict, status_code)
+    """
+    try:
+        intent = request.args.get('intent')
+        removed = gemini_chatbot.purge_response_cache(intent)
+        
+        log_user_action('PURGE_RESPONSE_CACHE', g.user_id, {
+            'intent': intent,
+            'removed': removed
+        })
+        
+        return {
+            'success': True,
+            'message': 'Cache des réponses vidé',
+            'removed': removed
+        }, 200
+        
+    except Exception as e:
+        print(f"❌ Erreur dans purge_response_cache: {e}")
+        return {
+            'success': False,
+            'error': 'Erreur lors de la purge du cache',
+            'code': 'INTERNAL_ERROR'
+        }, 500
@@ -4,17 +4,12 @@ Gère les établissements universitaires
 """
 
 from flask import request, g
-import sqlite3
 
 from middleware import ValidationError
-
-DATABASE = 'database/chatbot.db'
-
-def get_db_connection():
-    """Crée une connexion à la base de données"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+from services.database import get_db_connection
+from services.pagination import (
+    InvalidCursor, decode_cursor, keyset_condition, next_cursor, pagination_info
+)
 
 # ============================================
 # CONTRÔLEUR - LISTE DES ÉTABLISSEMENTS
@@ -35,6 +30,10 @@ def get_etablissements():
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         offset = (page - 1) * per_page
+        cursor_token = request.args.get('cursor')
+        
+        sort_key = ['nom', 'id']
+        cursor_values = decode_cursor(cursor_token, 'etablissements', len(sort_key)) if cursor_token else None
         
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -55,24 +54,38 @@ def get_etablissements():
             query += ' AND ville LIKE ?'
             params.append(f'%{ville}%')
         
-        query += ' ORDER BY nom LIMIT ? OFFSET ?'
-        params.extend([per_page, offset])
+        # Reprise après la dernière ligne servie
+        if cursor_values:
+            query += ' AND ' + keyset_condition(sort_key)
+            params.extend(cursor_values)
         
-        etablissements = cursor.execute(query, params).fetchall()
+        # Une ligne de plus que la page: elle indique qu'une page suivante existe
+        query += ' ORDER BY nom, id LIMIT ?'
+        params.append(per_page + 1)
+        if cursor_token is None:
+            query += ' OFFSET ?'
+            params.append(offset)
         
-        # Compter le total
-        count_query = 'SELECT COUNT(*) FROM etablissements WHERE actif = ?'
-        count_params = [actif]
+        rows = cursor.execute(query, params).fetchall()
+        etablissements, next_token = next_cursor(
+            rows, per_page, 'etablissements', lambda etab: [etab['nom'], etab['id']]
+        )
         
-        if type_etab:
-            count_query += ' AND type = ?'
-            count_params.append(type_etab)
-        
-        if ville:
-            count_query += ' AND ville LIKE ?'
-            count_params.append(f'%{ville}%')
-        
-        total = cursor.execute(count_query, count_params).fetchone()[0]
+        # Compter le total (mode page uniquement: le décompte parcourt toutes les lignes)
+        total = None
+        if cursor_token is None:
+            count_query = 'SELECT COUNT(*) FROM etablissements WHERE actif = ?'
+            count_params = [actif]
+            
+            if type_etab:
+                count_query += ' AND type = ?'
+                count_params.append(type_etab)
+            
+            if ville:
+                count_query += ' AND ville LIKE ?'
+                count_params.append(f'%{ville}%')
+            
+            total = cursor.execute(count_query, count_params).fetchone()[0]
         conn.close()
         
         result = []
@@ -93,14 +106,16 @@ def get_etablissements():
         return {
             'success': True,
             'data': result,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': total,
-                'pages': (total + per_page - 1) // per_page
-            }
+            'pagination': pagination_info(per_page, next_token, page, total)
         }, 200
         
+    except InvalidCursor as e:
+        return {
+            'success': False,
+            'error': f'Curseur de pagination invalide: {e}',
+            'code': 'INVALID_CURSOR'
+        }, 400
+        
     except Exception as e:
         print(f"❌ Erreur dans get_etablissements: {e}")
         return {
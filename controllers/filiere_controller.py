@@ -4,15 +4,10 @@ Gère les filières d'études
 """
 
 from flask import request
-import sqlite3
-
-DATABASE = 'database/chatbot.db'
-
-def get_db_connection():
-    """Crée une connexion à la base de données"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+from services.database import get_db_connection
+from services.pagination import (
+    InvalidCursor, decode_cursor, keyset_condition, next_cursor, pagination_info
+)
 
 # ============================================
 # CONTRÔLEUR - LISTE DES FILIÈRES
@@ -33,6 +28,11 @@ def get_filieres():
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         offset = (page - 1) * per_page
+        cursor_token = request.args.get('cursor')
+        
+        # Tri par niveau puis nom (niveau absent en premier, comme NULL)
+        sort_key = ["IFNULL(f.niveau, '')", 'f.nom', 'f.id']
+        cursor_values = decode_cursor(cursor_token, 'filieres', len(sort_key)) if cursor_token else None
         
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -62,28 +62,42 @@ def get_filieres():
             query += ' AND f.departement LIKE ?'
             params.append(f'%{departement}%')
         
-        query += ' ORDER BY f.niveau, f.nom LIMIT ? OFFSET ?'
-        params.extend([per_page, offset])
-        
-        filieres = cursor.execute(query, params).fetchall()
+        # Reprise après la dernière ligne servie
+        if cursor_values:
+            query += ' AND ' + keyset_condition(sort_key)
+            params.extend(cursor_values)
         
-        # Compter le total
-        count_query = 'SELECT COUNT(*) FROM filieres f WHERE f.actif = 1'
-        count_params = []
-        
-        if etablissement_id:
-            count_query += ' AND f.etablissement_id = ?'
-            count_params.append(etablissement_id)
-        
-        if niveau:
-            count_query += ' AND f.niveau = ?'
-            count_params.append(niveau)
+        # Une ligne de plus que la page: elle indique qu'une page suivante existe
+        query += ' ORDER BY ' + ', '.join(sort_key) + ' LIMIT ?'
+        params.append(per_page + 1)
+        if cursor_token is None:
+            query += ' OFFSET ?'
+            params.append(offset)
         
-        if departement:
-            count_query += ' AND f.departement LIKE ?'
-            count_params.append(f'%{departement}%')
+        rows = cursor.execute(query, params).fetchall()
+        filieres, next_token = next_cursor(
+            rows, per_page, 'filieres', lambda fil: [fil['niveau'] or '', fil['nom'], fil['id']]
+        )
         
-        total = cursor.execute(count_query, count_params).fetchone()[0]
+        # Compter le total (mode page uniquement: le décompte parcourt toutes les lignes)
+        total = None
+        if cursor_token is None:
+            count_query = 'SELECT COUNT(*) FROM filieres f WHERE f.actif = 1'
+            count_params = []
+            
+            if etablissement_id:
+                count_query += ' AND f.etablissement_id = ?'
+                count_params.append(etablissement_id)
+            
+            if niveau:
+                count_query += ' AND f.niveau = ?'
+                count_params.append(niveau)
+            
+            if departement:
+                count_query += ' AND f.departement LIKE ?'
+                count_params.append(f'%{departement}%')
+            
+            total = cursor.execute(count_query, count_params).fetchone()[0]
         conn.close()
         
         result = []
@@ -109,14 +123,16 @@ def get_filieres():
         return {
             'success': True,
             'data': result,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': total,
-                'pages': (total + per_page - 1) // per_page
-            }
+            'pagination': pagination_info(per_page, next_token, page, total)
         }, 200
         
+    except InvalidCursor as e:
+        return {
+            'success': False,
+            'error': f'Curseur de pagination invalide: {e}',
+            'code': 'INVALID_CURSOR'
+        }, 400
+        
     except Exception as e:
         print(f"❌ Erreur dans get_filieres: {e}")
         return {
@@ -11,16 +11,13 @@ import json
 import os
 
 from middleware import ValidationError, log_user_action
+from services.database import get_db_connection
+from services.pagination import (
+    InvalidCursor, decode_cursor, keyset_condition, next_cursor, pagination_info
+)
 
-DATABASE = 'database/chatbot.db'
 UPLOAD_FOLDER = 'uploads'
 
-def get_db_connection():
-    """Crée une connexion à la base de données"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
-
 def allowed_file(filename, allowed_extensions={'pdf', 'jpg', 'jpeg', 'png'}):
     """Vérifie si le fichier a une extension autorisée"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
@@ -207,30 +204,17 @@ def get_preinscriptions():
         user_id = g.user_id
         user_role = g.user_role if hasattr(g, 'user_role') else 'visiteur'
         
-        # Paramètres de pagination
+        # Paramètres de pagination: curseur (?cursor=, vide pour la première
+        # page) ou numéro de page
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         offset = (page - 1) * per_page
+        cursor_token = request.args.get('cursor')
         
         # Filtres
         statut = request.args.get('statut')
         niveau = request.args.get('niveau')
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Construction de la requête selon le rôle
-        base_query = '''
-            SELECT 
-                p.id, p.nom, p.prenom, p.email, p.telephone, p.niveau,
-                p.statut, p.date_soumission,
-                f.nom as filiere_nom, f.code as filiere_code,
-                e.nom as etablissement_nom
-            FROM preinscriptions p
-            LEFT JOIN filieres f ON p.filiere_id = f.id
-            LEFT JOIN etablissements e ON p.etablissement_id = e.id
-        '''
-        
         where_clauses = []
         params = []
         
@@ -247,20 +231,51 @@ def get_preinscriptions():
             where_clauses.append('p.niveau = ?')
             params.append(niveau)
         
-        if where_clauses:
-            base_query += ' WHERE ' + ' AND '.join(where_clauses)
+        # Reprise après la dernière ligne servie (du plus récent au plus ancien)
+        sort_key = ['p.date_soumission', 'p.id']
+        page_clauses = list(where_clauses)
+        page_params = list(params)
+        if cursor_token:
+            page_clauses.append(keyset_condition(sort_key, descending=True))
+            page_params.extend(decode_cursor(cursor_token, 'preinscriptions', len(sort_key)))
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Construction de la requête selon le rôle
+        base_query = '''
+            SELECT 
+                p.id, p.nom, p.prenom, p.email, p.telephone, p.niveau,
+                p.statut, p.date_soumission,
+                f.nom as filiere_nom, f.code as filiere_code,
+                e.nom as etablissement_nom
+            FROM preinscriptions p
+            LEFT JOIN filieres f ON p.filiere_id = f.id
+            LEFT JOIN etablissements e ON p.etablissement_id = e.id
+        '''
         
-        base_query += ' ORDER BY p.date_soumission DESC LIMIT ? OFFSET ?'
-        params.extend([per_page, offset])
+        if page_clauses:
+            base_query += ' WHERE ' + ' AND '.join(page_clauses)
         
-        preinscriptions = cursor.execute(base_query, params).fetchall()
+        # Une ligne de plus que la page: elle indique qu'une page suivante existe
+        base_query += ' ORDER BY p.date_soumission DESC, p.id DESC LIMIT ?'
+        page_params.append(per_page + 1)
+        if cursor_token is None:
+            base_query += ' OFFSET ?'
+            page_params.append(offset)
         
-        # Compter le total
-        count_query = 'SELECT COUNT(*) FROM preinscriptions p'
-        if where_clauses:
-            count_query += ' WHERE ' + ' AND '.join(where_clauses[:-2] if len(params) > 2 else where_clauses)
+        rows = cursor.execute(base_query, page_params).fetchall()
+        preinscriptions, next_token = next_cursor(
+            rows, per_page, 'preinscriptions', lambda row: [row['date_soumission'], row['id']]
+        )
         
-        total = cursor.execute(count_query, params[:-2] if len(params) > 2 else params).fetchone()[0]
+        # Compter le total (mode page uniquement: le décompte parcourt toutes les lignes)
+        total = None
+        if cursor_token is None:
+            count_query = 'SELECT COUNT(*) FROM preinscriptions p'
+            if where_clauses:
+                count_query += ' WHERE ' + ' AND '.join(where_clauses)
+            total = cursor.execute(count_query, params).fetchone()[0]
         conn.close()
         
         result = []
@@ -286,14 +301,16 @@ def get_preinscriptions():
         return {
             'success': True,
             'preinscriptions': result,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': total,
-                'pages': (total + per_page - 1) // per_page
-            }
+            'pagination': pagination_info(per_page, next_token, page, total)
         }, 200
         
+    except InvalidCursor as e:
+        return {
+            'success': False,
+            'error': f'Curseur de pagination invalide: {e}',
+            'code': 'INVALID_CURSOR'
+        }, 400
+        
     except Exception as e:
         print(f"❌ Erreur dans get_preinscriptions: {e}")
         return {
@@ -149,8 +149,14 @@ def init_db():
     cur.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_filiere ON preinscriptions(filiere_id)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_statut ON preinscriptions(statut)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_role ON messages(session_id, role)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_session_id ON chat_sessions(session_id)")
+    # Listes paginées par curseur (clé de tri + id)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_date ON preinscriptions(date_soumission)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_user_date ON preinscriptions(user_id, date_soumission)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_filieres_liste ON filieres(actif, IFNULL(niveau, ''), nom)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_etablissements_liste ON etablissements(actif, nom)")
     
     # ========================================
     # DONNÉES DE TEST (Établissement et Filières)
@@ -6,15 +6,7 @@ Gère la vérification des sessions et des permissions
 from flask import session, request, jsonify, g
 from functools import wraps
 from datetime import datetime, timedelta
-import sqlite3
-
-DATABASE = 'database/chatbot.db'
-
-def get_db_connection():
-    """Crée une connexion à la base de données"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+from services.database import get_db_connection
 
 # ============================================
 # DECORATORS D'AUTHENTIFICATION
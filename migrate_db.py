@@ -223,6 +223,12 @@ def migrate_database():
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_filiere ON preinscriptions(filiere_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_statut ON preinscriptions(statut)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_role ON messages(session_id, role)")
+        # Listes paginées par curseur (clé de tri + id)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_date ON preinscriptions(date_soumission)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_preinscriptions_user_date ON preinscriptions(user_id, date_soumission)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_filieres_liste ON filieres(actif, IFNULL(niveau, ''), nom)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_etablissements_liste ON etablissements(actif, nom)")
         print("✅ Index créés")
         
         # Afficher la structure finale de la table users
@@ -3,7 +3,7 @@ Routes API principales
 Gère les routes HTTP pour chat, préinscriptions, établissements et filières
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from controllers import (
     chat_controller,
     preinscription_controller,
@@ -17,6 +17,7 @@ from middleware import (
     validate_json,
     validate_file_upload
 )
+from services import gemini_chatbot
 
 # Créer le Blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
@@ -36,7 +37,8 @@ def send_message():
     Body (JSON):
         {
             "message": "string",
-            "session_id": "string (optional)"
+            "session_id": "string (optional)",
+            "mode": "job (optional, voir CHAT_JOB_MODE)"
         }
     
     Response:
@@ -46,11 +48,104 @@ def send_message():
             "session_id": "...",
             "timestamp": "..."
         }
+    
+    Response (mode job, 202):
+        {
+            "success": true,
+            "job_id": "...",
+            "status": "queued",
+            "poll_url": "/api/message/jobs/<job_id>"
+        }
     """
     response_data, status_code = chat_controller.send_message()
+    if status_code == 503:
+        return jsonify(response_data), status_code, {'Retry-After': '5'}
+    return jsonify(response_data), status_code
+
+
+@api_bp.route('/message/jobs/<job_id>', methods=['GET'])
+@optional_auth
+def get_message_job(job_id):
+    """
+    GET /api/message/jobs/<job_id>?wait=0
+    Récupère la réponse d'un message envoyé en mode job; attend jusqu'à
+    `wait` secondes qu'elle soit prête (plafonné à CHAT_JOB_POLL_WAIT_SECONDS,
+    0 par défaut: état immédiat, interroger de nouveau après Retry-After)
+    
+    Response (200 si prête, 202 sinon):
+        {
+            "success": true,
+            "job_id": "...",
+            "status": "queued | running | done",
+            "response": "... (si done)",
+            "session_id": "...",
+            "timestamp": "... (si done)"
+        }
+    """
+    response_data, status_code = chat_controller.get_message_job(
+        job_id, request.args.get('wait', type=float)
+    )
+    if status_code == 202:
+        retry_after = str(gemini_chatbot.CHAT_JOB_RETRY_AFTER_SECONDS)
+        return jsonify(response_data), status_code, {'Retry-After': retry_after}
+    return jsonify(response_data), status_code
+
+
+@optional_auth
+@validate_json('message')
+async def send_message_async():
+    """
+    POST /api/message (chemin asynchrone, servi par asgi.py)
+    Même contrat que send_message; non enregistrée sur le Blueprint:
+    le serveur ASGI l'appelle à la place de la route synchrone
+    """
+    response_data, status_code = await chat_controller.send_message_async()
+    if status_code == 503:
+        return jsonify(response_data), status_code, {'Retry-After': '5'}
     return jsonify(response_data), status_code
 
 
+# Routes servies en asynchrone par asgi.py: (méthode, chemin) -> vue
+ASYNC_ROUTES = {
+    ('POST', '/api/message'): send_message_async,
+}
+
+
+@api_bp.route('/message/stream', methods=['POST'])
+@optional_auth
+@validate_json('message')
+def stream_message():
+    """
+    POST /api/message/stream
+    Envoie un message au chatbot et diffuse la réponse au fil de la génération
+    
+    Body (JSON):
+        {
+            "message": "string",
+            "session_id": "string (optional)"
+        }
+    
+    Response (text/event-stream):
+        event: chunk
+        data: {"delta": "..."}
+        
+        event: done
+        data: {"session_id": "...", "timestamp": "..."}
+    """
+    result, status_code = chat_controller.stream_message()
+    if status_code != 200:
+        return jsonify(result), status_code
+    
+    return Response(
+        stream_with_context(result),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
 @api_bp.route('/messages/history/<session_id>', methods=['GET'])
 def get_message_history(session_id):
     """
@@ -104,6 +199,73 @@ def delete_chat_session(session_id):
     return jsonify(response_data), status_code
 
 
+@api_bp.route('/chat/metrics', methods=['GET'])
+@admin_required
+def get_chat_metrics():
+    """
+    GET /api/chat/metrics
+    Récupère les métriques du service de chat du worker courant (admin uniquement)
+    
+    Response:
+        {
+            "success": true,
+            "metrics": {
+                "pid": 1234,
+                "conversations": { "hits": 0, "misses": 0, "evictions": 0, "size": 0, ... }
+            },
+            "timestamp": "..."
+        }
+    """
+    response_data, status_code = chat_controller.get_chat_metrics()
+    return jsonify(response_data), status_code
+
+
+@api_bp.route('/chat/cache', methods=['GET'])
+@admin_required
+def get_response_cache():
+    """
+    GET /api/chat/cache
+    Récupère l'état du cache des réponses du worker courant (admin uniquement)
+    
+    Query Params:
+        - limit: int (default: 50, max: 500)
+    
+    Response:
+        {
+            "success": true,
+            "stats": { "size": 12, "hits": 340, "misses": 57, ... },
+            "entries": [{ "intent": "frais", "question": "...", "hits": 120, ... }]
+        }
+    """
+    response_data, status_code = chat_controller.get_response_cache()
+    return jsonify(response_data), status_code
+
+
+@api_bp.route('/chat/cache', methods=['DELETE'])
+@admin_required
+def purge_response_cache():
+    """
+    DELETE /api/chat/cache
+    Vide le cache des réponses de tous les workers (admin uniquement)
+    
+    La purge est notée dans la base; chaque worker écarte les réponses
+    antérieures à son prochain accès ("removed" compte celles du worker
+    qui a reçu la requête).
+    
+    Query Params:
+        - intent: string (optional, ne vide que cette intention)
+    
+    Response:
+        {
+            "success": true,
+            "message": "Cache des réponses vidé",
+            "removed": 12
+        }
+    """
+    response_data, status_code = chat_controller.purge_response_cache()
+    return jsonify(response_data), status_code
+
+
 # ============================================
 # ROUTES - PRÉINSCRIPTIONS
 # ============================================
@@ -146,6 +308,8 @@ def get_preinscriptions():
     Query Params:
         - page: int (default: 1)
         - per_page: int (default: 20, max: 100)
+        - cursor: string (pagination par curseur: vide pour la première page,
+          puis pagination.next_cursor; remplace page)
         - statut: string (nouveau, en_cours, validé, rejeté)
         - niveau: string (Licence, Master, Doctorat)
     
@@ -216,6 +380,8 @@ def get_etablissements():
         - ville: string
         - page: int (default: 1)
         - per_page: int (default: 20, max: 100)
+        - cursor: string (pagination par curseur: vide pour la première page,
+          puis pagination.next_cursor; remplace page)
     
     Response:
         {
@@ -280,6 +446,8 @@ def get_filieres():
         - departement: string
         - page: int (default: 1)
         - per_page: int (default: 20, max: 100)
+        - cursor: string (pagination par curseur: vide pour la première page,
+          puis pagination.next_cursor; remplace page)
     
     Response:
         {
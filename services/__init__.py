@@ -2,8 +2,50 @@
 Package services - Services utilitaires de l'application
 """
 
+from . import text_utils
+from . import database
+from . import pagination
+from . import message_writer
+from . import intent_matcher
+from . import intent_classifier
+from . import conversation_store
+from . import response_cache
+from . import catalog
+from . import catalog_answers
+from . import catalog_index
+from . import prompt_budget
+from . import circuit_breaker
+from . import single_flight
+from . import rate_limiter
+from . import llm_provider
+from . import model_routing
+from . import hedging
+from . import backend_pool
+from . import job_queue
+from . import stage_timings
 from . import gemini_chatbot
 
 __all__ = [
+    'text_utils',
+    'database',
+    'pagination',
+    'message_writer',
+    'intent_matcher',
+    'intent_classifier',
+    'conversation_store',
+    'response_cache',
+    'catalog',
+    'catalog_answers',
+    'catalog_index',
+    'prompt_budget',
+    'circuit_breaker',
+    'single_flight',
+    'rate_limiter',
+    'llm_provider',
+    'model_routing',
+    'hedging',
+    'backend_pool',
+    'job_queue',
+    'stage_timings',
     'gemini_chatbot'
 ]
@@ -0,0 +1,290 @@
+"""
+Pool de fournisseurs (plusieurs clés API et/ou modèles)
+Chaque requête part vers le fournisseur le plus rapide du moment (latence
+moyenne mobile exponentielle, appels en cours); en cas d'échec, le suivant
+prend le relais tant que l'échéance le permet
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .llm_provider import DeadlineExceeded, LatencyTracker
+from .circuit_breaker import CircuitOpenError
+from .rate_limiter import RateLimited
+
+# Refus sans appel réseau (circuit ouvert, quota épuisé): le fournisseur
+# suivant est essayé sans compter d'échec
+SKIPPED_ERRORS = (CircuitOpenError, RateLimited)
+
+
+class Backend:
+    """
+    Fournisseur du pool et son état de routage
+
+    Args:
+        provider (LLMProvider): Fournisseur (avec son disjoncteur et son quota)
+        label (str): Nom affiché dans les métriques (jamais la clé complète)
+    """
+
+    def __init__(self, provider, label):
+        self.provider = provider
+        self.label = label
+        self.ewma = None  # latence lissée (secondes), None tant que non mesurée
+        self.in_flight = 0
+        self.selected = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def cost(self):
+        """Coût estimé d'un nouvel appel: latence lissée × (appels en cours + 1)"""
+        return (self.ewma or 0.0) * (self.in_flight + 1)
+
+    def refusing(self):
+        breaker = self.provider.breaker
+        return self.provider.degraded() or (breaker is not None and breaker.is_open())
+
+
+class BackendPool:
+    """
+    Routage des appels entre plusieurs fournisseurs, avec bascule
+
+    Même interface que LLMProvider (`generate`, `stream`, `available`,
+    `degraded`, `stats`). Les fournisseurs sont classés par coût estimé
+    (un fournisseur jamais mesuré passe en premier); ceux dont le circuit
+    est ouvert ou qui sont hors service sont écartés. Une erreur fait
+    basculer sur le suivant, un dépassement de l'échéance non: il ne reste
+    plus de temps.
+
+    Avec une politique de couverture (`hedge`), une requête sans réponse
+    après le délai de la politique est doublée, de préférence vers un autre
+    fournisseur; la première réponse gagne, l'autre est ignorée (annulée si
+    elle n'a pas encore démarré). Le streaming et le chemin asynchrone
+    (`agenerate`) ne sont pas couverts.
+
+    Args:
+        backends (list): Liste de Backend
+        ewma_alpha (float): Poids de la dernière mesure dans la latence lissée
+        hedge (HedgePolicy): Politique de couverture (None: désactivée)
+        max_workers (int): Requêtes couvertes simultanées
+    """
+
+    name = 'pool'
+
+    def __init__(self, backends, ewma_alpha=0.2, hedge=None, max_workers=32):
+        if not backends:
+            raise ValueError("Pool de fournisseurs vide")
+        self.backends = backends
+        self.ewma_alpha = float(ewma_alpha)
+        self.hedge = hedge
+        self.tracker = LatencyTracker()
+        self._executor = None
+        if hedge is not None:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self.failovers = 0
+
+    def available(self):
+        return any(backend.provider.available() for backend in self.backends)
+
+    def degraded(self):
+        return all(backend.provider.degraded() for backend in self.backends)
+
+    def ranked(self, avoid=()):
+        """Fournisseurs utilisables, du moins coûteux au plus coûteux (`avoid` en dernier)"""
+        with self._lock:
+            candidates = [backend for backend in self.backends if not backend.refusing()]
+            return sorted(candidates, key=lambda backend: (
+                backend in avoid, backend.cost(), backend.selected
+            ))
+
+    def begin(self, backend):
+        with self._lock:
+            backend.in_flight += 1
+            backend.selected += 1
+
+    def end(self, backend, latency=None, failed=False, skipped=False):
+        """Fin d'un appel: latence lissée, échecs et bascules"""
+        with self._lock:
+            backend.in_flight -= 1
+            if skipped:
+                backend.skipped += 1
+                backend.selected -= 1
+                return
+            if failed:
+                backend.failures += 1
+            if latency is not None:
+                alpha = self.ewma_alpha
+                backend.ewma = latency if backend.ewma is None else alpha * latency + (1 - alpha) * backend.ewma
+
+    def count_failover(self):
+        with self._lock:
+            self.failovers += 1
+
+    def generate(self, prompt, intent='general', deadline=None, on_late=None, options=None):
+        """Génère une réponse avec le meilleur fournisseur (couverte si configuré)"""
+        if self.hedge is None or deadline is None:
+            return self.generate_once(prompt, intent, deadline, on_late, options)
+        return self.generate_hedged(prompt, intent, deadline, on_late, options)
+
+    def generate_hedged(self, prompt, intent, deadline, on_late, options=None):
+        """
+        Requête principale, doublée si elle tarde au-delà du délai de couverture
+        
+        Le délai est un percentile des latences récentes du pool; tant que les
+        mesures sont insuffisantes, la requête n'est pas couverte.
+        """
+        self.hedge.start()
+        tried = []
+        primary = self._executor.submit(
+            self.generate_once, prompt, intent, deadline, on_late, options, tried=tried
+        )
+        pending = {primary}
+
+        delay = self.hedge.delay(self.tracker)
+        if delay is not None and delay < deadline - time.monotonic():
+            done, _ = wait(pending, timeout=delay)
+            if not done and self.hedge.allow():
+                pending.add(self._executor.submit(
+                    self.generate_once, prompt, intent, deadline, on_late, options, avoid=list(tried)
+                ))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is not primary:
+                        self.hedge.record_win()
+                    return future.result()
+                error = future.exception()
+        for future in pending:
+            future.cancel()
+        if error is not None and not pending:
+            raise error
+        raise DeadlineExceeded(f"{self.name}: pas de réponse avant l'échéance")
+
+    def generate_once(self, prompt, intent, deadline=None, on_late=None, options=None, avoid=(), tried=None):
+        """Génère une réponse avec le meilleur fournisseur, en basculant sur erreur"""
+        error = None
+        for backend in self.ranked(avoid):
+            if error is not None and not isinstance(error, SKIPPED_ERRORS):
+                self.count_failover()
+            if tried is not None:
+                tried.append(backend)
+            self.begin(backend)
+            started = time.perf_counter()
+            try:
+                text = backend.provider.generate(
+                    prompt, intent, deadline=deadline, on_late=on_late, options=options
+                )
+            except SKIPPED_ERRORS as e:
+                self.end(backend, skipped=True)
+                error = e
+                continue
+            except DeadlineExceeded:
+                # Pénalité: la latence observée est au moins le temps écoulé
+                self.end(backend, time.perf_counter() - started, failed=True)
+                raise
+            except Exception as e:
+                self.end(backend, failed=True)
+                print(f"⚠️ Fournisseur {backend.label} en échec, bascule: {e}")
+                error = e
+                continue
+            latency = time.perf_counter() - started
+            self.end(backend, latency)
+            self.tracker.record(latency)
+            return text
+        raise error or CircuitOpenError("Aucun fournisseur disponible dans le pool")
+
+    async def agenerate(self, prompt, intent='general', deadline=None, options=None):
+        """Version asynchrone de `generate`: même routage et bascule, sans couverture"""
+        error = None
+        for backend in self.ranked():
+            if error is not None and not isinstance(error, SKIPPED_ERRORS):
+                self.count_failover()
+            self.begin(backend)
+            started = time.perf_counter()
+            try:
+                text = await backend.provider.agenerate(prompt, intent, deadline=deadline, options=options)
+            except SKIPPED_ERRORS as e:
+                self.end(backend, skipped=True)
+                error = e
+                continue
+            except DeadlineExceeded:
+                self.end(backend, time.perf_counter() - started, failed=True)
+                raise
+            except Exception as e:
+                self.end(backend, failed=True)
+                print(f"⚠️ Fournisseur {backend.label} en échec, bascule: {e}")
+                error = e
+                continue
+            except BaseException:
+                # Tâche annulée: l'appel n'est plus en cours (aucune latence mesurée)
+                self.end(backend)
+                raise
+            latency = time.perf_counter() - started
+            self.end(backend, latency)
+            self.tracker.record(latency)
+            return text
+        raise error or CircuitOpenError("Aucun fournisseur disponible dans le pool")
+
+    def stream(self, prompt, intent='general', deadline=None, options=None):
+        """Réponse fragment par fragment; bascule possible tant que rien n'est envoyé"""
+        error = None
+        for backend in self.ranked():
+            if error is not None and not isinstance(error, SKIPPED_ERRORS):
+                self.count_failover()
+            self.begin(backend)
+            started = time.perf_counter()
+            sent = False
+            outcome = {'failed': False, 'skipped': False, 'latency': None}
+            try:
+                for text in backend.provider.stream(prompt, intent, deadline=deadline, options=options):
+                    if not sent:
+                        outcome['latency'] = time.perf_counter() - started
+                        sent = True
+                    yield text
+                return
+            except SKIPPED_ERRORS as e:
+                outcome['skipped'] = True
+                error = e
+            except DeadlineExceeded:
+                outcome.update(failed=True, latency=time.perf_counter() - started)
+                raise
+            except Exception as e:
+                outcome['failed'] = True
+                if sent:
+                    raise
+                print(f"⚠️ Fournisseur {backend.label} en échec, bascule: {e}")
+                error = e
+            finally:
+                # Latence lissée du streaming: délai du premier fragment
+                self.end(backend, outcome['latency'], outcome['failed'], outcome['skipped'])
+        raise error or CircuitOpenError("Aucun fournisseur disponible dans le pool")
+
+    def stats(self):
+        with self._lock:
+            routing = [{
+                'label': backend.label,
+                'ewma_latency_ms': round(backend.ewma * 1000, 1) if backend.ewma is not None else None,
+                'in_flight': backend.in_flight,
+                'selected': backend.selected,
+                'failures': backend.failures,
+                'skipped': backend.skipped,
+            } for backend in self.backends]
+            failovers = self.failovers
+        for entry, backend in zip(routing, self.backends):
+            entry['provider'] = backend.provider.stats()
+        return {
+            'name': self.name,
+            'available': any(entry['provider']['available'] for entry in routing),
+            'failovers': failovers,
+            'hedging': self.hedge.stats() if self.hedge is not None else None,
+            'backends': routing,
+        }
@@ -0,0 +1,165 @@
+"""
+Catalogue des formations (établissements et filières actifs)
+Instantané en mémoire relu seulement quand le catalogue change: des
+déclencheurs SQLite incrémentent la table catalog_version à chaque écriture
+dans etablissements ou filieres, quel que soit le processus qui écrit
+"""
+
+import sqlite3
+import threading
+import time
+
+from .database import get_db_connection
+
+# Version du catalogue tenue à jour par la base elle-même (tout écrivain:
+# API, scripts d'administration, autre worker)
+CATALOG_VERSION_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)",
+) + tuple(
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_catalog_version
+    AFTER {event} ON {table}
+    BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END
+    """
+    for table in ('etablissements', 'filieres')
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+)
+
+
+def install_catalog_version(conn):
+    """Crée la table catalog_version et ses déclencheurs (idempotent)"""
+    for statement in CATALOG_VERSION_SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+class CatalogSnapshot:
+    """Contenu du catalogue à un instant donné"""
+
+    __slots__ = ('version', 'etablissements', 'filieres', 'loaded_at')
+
+    def __init__(self, version, etablissements, filieres):
+        self.version = version
+        self.etablissements = etablissements
+        self.filieres = filieres
+        self.loaded_at = time.time()
+
+    def filieres_by_niveau(self):
+        """Filières groupées par niveau (Licence, Master, Doctorat)"""
+        result = {}
+        for filiere in self.filieres:
+            result.setdefault(filiere['niveau'], []).append(filiere)
+        return result
+
+
+class Catalog:
+    """
+    Accès au catalogue avec rechargement sur changement
+
+    Chaque accès lit la version du catalogue (une ligne); les tables ne
+    sont relues que si elle a changé depuis le dernier chargement.
+
+    Args:
+        connect (callable): Fabrique de connexions (conn.close() après usage)
+        refresh_interval (float): Délai minimal (secondes) entre deux lectures
+            de la version (0: à chaque accès)
+    """
+
+    def __init__(self, connect=get_db_connection, refresh_interval=0):
+        self.connect = connect
+        self.refresh_interval = float(refresh_interval)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = None
+        self._installed = False
+        self.reloads = 0
+        self.checks = 0
+
+    def read_version(self, conn):
+        """Version courante du catalogue (déclencheurs installés au besoin)"""
+        if not self._installed:
+            install_catalog_version(conn)
+            self._installed = True
+        return conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+
+    def load(self, conn, version):
+        """Lit le catalogue actif depuis la base"""
+        conn.row_factory = sqlite3.Row
+        etablissements = [dict(row) for row in conn.execute('''
+            SELECT id, nom, code, adresse, ville, telephone, email, site_web, type
+            FROM etablissements
+            WHERE actif = 1
+            ORDER BY nom, id
+        ''').fetchall()]
+
+        filieres = [dict(row) for row in conn.execute('''
+            SELECT
+                f.id, f.etablissement_id, f.nom, f.code, f.niveau, f.departement,
+                f.duree, f.frais_inscription, f.frais_scolarite, f.places_disponibles,
+                f.description, f.prerequis, f.date_ouverture, f.date_fermeture,
+                e.nom as etablissement_nom
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE f.actif = 1 AND e.actif = 1
+            ORDER BY f.niveau, f.nom, f.id
+        ''').fetchall()]
+        return CatalogSnapshot(version, etablissements, filieres)
+
+    def is_fresh(self, now):
+        return (
+            self._snapshot is not None and self._checked_at is not None
+            and now - self._checked_at < self.refresh_interval
+        )
+
+    def get(self):
+        """
+        Retourne l'instantané courant
+
+        Relit les tables si la version a changé depuis le dernier
+        chargement. En cas d'erreur, le dernier instantané connu reste servi.
+        """
+        now = time.monotonic()
+        if self.is_fresh(now):
+            return self._snapshot
+
+        with self._lock:
+            if self.is_fresh(now):
+                return self._snapshot
+            try:
+                conn = self.connect()
+                try:
+                    version = self.read_version(conn)
+                    self.checks += 1
+                    if self._snapshot is None or version != self._snapshot.version:
+                        self._snapshot = self.load(conn, version)
+                        self.reloads += 1
+                finally:
+                    conn.close()
+            except Exception as e:
+                print(f"⚠️ Lecture du catalogue impossible: {e}")
+            self._checked_at = now
+            return self._snapshot
+
+    def invalidate(self):
+        """Force la lecture de la version au prochain accès"""
+        with self._lock:
+            self._checked_at = None
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot else None,
+            'etablissements': len(snapshot.etablissements) if snapshot else 0,
+            'filieres': len(snapshot.filieres) if snapshot else 0,
+            'reloads': self.reloads,
+            'checks': self.checks,
+            'refresh_interval': self.refresh_interval
+        }
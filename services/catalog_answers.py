@@ -0,0 +1,306 @@
+"""
+Réponses déterministes aux questions sur le catalogue
+Les intentions frais, programmes, contact et calendrier sont traitées à partir
+des tables filieres et etablissements, sans appel au modèle, tant que la
+question reste simple. Les questions complexes sont confiées à Gemini.
+"""
+
+import threading
+
+from .intent_matcher import intent_matcher
+from .text_utils import fold_accents, normalize_text
+
+# Calendrier académique publié (utilisé quand les filières n'ont pas de dates)
+CALENDRIER_ACADEMIQUE = [
+    ('Préinscriptions', 'Juillet - Septembre'),
+    ('Rentrée', 'Octobre'),
+    ('Examens 1er semestre', 'Janvier'),
+    ('Examens 2ème semestre', 'Juin'),
+]
+
+NIVEAUX = {'licence': 'Licence', 'master': 'Master', 'doctorat': 'Doctorat'}
+
+# Mots signalant une question qui demande du raisonnement plutôt qu'une fiche
+COMPLEX_MARKERS = (
+    'pourquoi', 'difference', 'compar', 'meilleur', 'conseil', 'recommand', 'choisir',
+    'bourse', 'reduction', 'echelonn', 'rembours', 'equivalence', 'transfert',
+    'mon dossier', 'ma candidature', 'mon cas', 'si je'
+)
+
+# Mots renvoyant à un échange précédent ("et celle-ci ?", "le même pour...")
+ANAPHORA_MARKERS = ('celle', 'celui', 'ceux', 'ca ', 'cela', 'meme', 'et pour', 'et en')
+
+# Mots génériques ignorés lors de la reconnaissance d'une filière
+FILIERE_STOPWORDS = frozenset({'licence', 'master', 'doctorat', 'generale', 'general'})
+
+# Score de mots-clés minimal de l'intention: en dessous, elle ne tient qu'à un
+# mot générique ("le master") et le message n'est pas une question de fiche
+MIN_INTENT_SCORE = 0.5
+
+
+def format_amount(value):
+    """Formate un montant en FCFA (450000.0 -> '450 000 FCFA')"""
+    return f"{int(round(value or 0)):,} FCFA".replace(',', ' ')
+
+
+def format_fee_range(values):
+    """Formate un montant unique ou une fourchette de montants"""
+    low, high = min(values), max(values)
+    if low == high:
+        return format_amount(low)
+    return f"de {format_amount(low)} à {format_amount(high)}"
+
+
+class CatalogAnswerEngine:
+    """
+    Moteur de réponses à base de règles et de gabarits
+
+    Args:
+        catalog (Catalog): Accès au catalogue des formations
+        threshold (float): Confiance minimale pour répondre sans le modèle
+        matcher (IntentMatcher): Scores des intentions du message
+    """
+
+    INTENTS = ('frais', 'programmes', 'contact', 'calendrier')
+
+    def __init__(self, catalog, threshold=0.7, matcher=intent_matcher):
+        self.catalog = catalog
+        self.threshold = float(threshold)
+        self.matcher = matcher
+        self._lock = threading.Lock()
+        self._memo = {}
+        self._memo_version = None
+        self.answered = {}
+        self.escalated = 0
+        # Fiches servies comme réponse de secours (modèle indisponible)
+        self.fallback_renders = {}
+
+    # ------------------------------------------------------------
+    # Analyse du message
+    # ------------------------------------------------------------
+
+    def detect_niveau(self, tokens):
+        for token, niveau in NIVEAUX.items():
+            if token in tokens:
+                return niveau
+        return None
+
+    def match_filiere(self, tokens, filieres):
+        """Filière désignée sans ambiguïté par le message (ou None)"""
+        best, best_score, tie = None, 0, False
+        for filiere in filieres:
+            keywords = set(normalize_text(filiere['nom']).split()) - FILIERE_STOPWORDS
+            code_suffix = normalize_text(filiere['code'].split('-')[-1])
+            if code_suffix:
+                keywords.add(code_suffix)
+
+            score = len(keywords & tokens)
+            if score > best_score:
+                best, best_score, tie = filiere, score, False
+            elif score and score == best_score:
+                tie = True
+        return None if tie else best
+
+    def confidence(self, intent, message, has_history):
+        """
+        Estime si une réponse de fiche suffit pour ce message
+
+        Une intention à égalité, mêlée à une autre intention du catalogue
+        ("les frais de la licence") ou portée par un seul mot générique
+        ("ma motivation pour le master") fait escalader vers le modèle:
+        la fiche d'une seule intention répondrait à côté.
+        """
+        folded = f" {fold_accents(message.lower())} "
+        score = 0.9
+
+        ranked = self.matcher.scores(message)
+        scores = dict(ranked)
+        if self.matcher.is_ambiguous(ranked):
+            score -= 0.5
+        if sum(1 for name in scores if name in self.INTENTS) > 1:
+            score -= 0.5
+        if scores.get(intent, 0.0) < MIN_INTENT_SCORE:
+            score -= 0.3
+
+        if len(message.split()) > 20:
+            score -= 0.3
+        if message.count('?') > 1:
+            score -= 0.2
+        if any(marker in folded for marker in COMPLEX_MARKERS):
+            score -= 0.4
+        if has_history:
+            score -= 0.1
+            if any(f" {marker}" in folded for marker in ANAPHORA_MARKERS):
+                score -= 0.3
+        return max(0.0, score)
+
+    # ------------------------------------------------------------
+    # Point d'entrée
+    # ------------------------------------------------------------
+
+    def answer(self, intent, message='', has_history=False, fallback=False):
+        """
+        Répond à partir du catalogue si l'intention s'y prête
+
+        Args:
+            fallback (bool): Réponse de secours (modèle indisponible): comptée
+                à part, pas comme une question résolue sans le modèle
+
+        Returns:
+            str | None: Réponse, ou None s'il faut escalader vers le modèle
+        """
+        if intent not in self.INTENTS:
+            return None
+
+        snapshot = self.catalog.get()
+        if snapshot is None:
+            return None
+
+        confidence = self.confidence(intent, message, has_history) if message else 1.0
+        tokens = set(normalize_text(message).split())
+        niveau = self.detect_niveau(tokens)
+        filiere = self.match_filiere(tokens, snapshot.filieres) if tokens else None
+
+        memo_key = (intent, niveau, filiere['id'] if filiere else None)
+        with self._lock:
+            if self._memo_version != snapshot.version:
+                self._memo = {}
+                self._memo_version = snapshot.version
+            rendered = self._memo.get(memo_key)
+
+        if rendered is None:
+            rendered = getattr(self, f"render_{intent}")(snapshot, niveau, filiere)
+            with self._lock:
+                self._memo[memo_key] = rendered
+
+        text, base_confidence = rendered
+        if text is None or min(confidence, base_confidence) < self.threshold:
+            if not fallback:
+                with self._lock:
+                    self.escalated += 1
+            return None
+
+        counters = self.fallback_renders if fallback else self.answered
+        with self._lock:
+            counters[intent] = counters.get(intent, 0) + 1
+        return text
+
+    # ------------------------------------------------------------
+    # Gabarits (retournent (texte, confiance))
+    # ------------------------------------------------------------
+
+    def render_frais(self, snapshot, niveau, filiere):
+        if filiere:
+            return (
+                f"💰 Frais pour la {filiere['nom']} ({filiere['etablissement_nom']}):\n\n"
+                f"- Inscription: {format_amount(filiere['frais_inscription'])}\n"
+                f"- Scolarité: {format_amount(filiere['frais_scolarite'])}/an\n"
+                f"- Durée: {filiere['duree']} ans\n\n"
+                "Des facilités de paiement sont possibles auprès du service des admissions. "
+                "Souhaitez-vous commencer votre préinscription ? 📝"
+            ), 1.0
+
+        groups = snapshot.filieres_by_niveau()
+        if niveau:
+            groups = {niveau: groups.get(niveau, [])}
+        groups = {k: v for k, v in groups.items() if v}
+        if not groups:
+            return None, 0.0
+
+        lines = ["💰 Nos frais de formation:"]
+        for level, filieres in groups.items():
+            lines.append(f"\n**{level}:**")
+            lines.append(f"- Inscription: {format_fee_range([f['frais_inscription'] for f in filieres])}")
+            lines.append(f"- Scolarité: {format_fee_range([f['frais_scolarite'] for f in filieres])}/an")
+        lines.append("\nDes facilités de paiement sont disponibles. "
+                     "Souhaitez-vous le détail pour une filière en particulier ? 📊")
+        return "\n".join(lines), 0.9
+
+    def render_programmes(self, snapshot, niveau, filiere):
+        if filiere:
+            lines = [f"🎓 {filiere['nom']} ({filiere['etablissement_nom']})\n"]
+            if filiere['description']:
+                lines.append(f"- Description: {filiere['description']}")
+            lines.append(f"- Niveau: {filiere['niveau']} ({filiere['duree']} ans)")
+            if filiere['departement']:
+                lines.append(f"- Département: {filiere['departement']}")
+            if filiere['prerequis']:
+                lines.append(f"- Prérequis: {filiere['prerequis']}")
+            lines.append(f"- Places disponibles: {filiere['places_disponibles']}")
+            lines.append("\nSouhaitez-vous connaître les conditions d'admission ? 📋")
+            return "\n".join(lines), 1.0
+
+        groups = snapshot.filieres_by_niveau()
+        if niveau:
+            groups = {niveau: groups.get(niveau, [])}
+        groups = {k: v for k, v in groups.items() if v}
+        if not groups:
+            return None, 0.0
+
+        lines = ["📚 Nos programmes disponibles:"]
+        for level, filieres in groups.items():
+            lines.append(f"\n**{level}:**")
+            for f in filieres:
+                lines.append(f"- {f['nom']} ({f['duree']} ans)")
+        lines.append("\nQuel programme vous intéresse ? 🎯")
+        return "\n".join(lines), 0.9
+
+    def render_contact(self, snapshot, niveau, filiere):
+        etablissements = snapshot.etablissements
+        if filiere:
+            etablissements = [e for e in etablissements if e['id'] == filiere['etablissement_id']]
+        etablissements = [
+            e for e in etablissements if e['email'] or e['telephone'] or e['site_web']
+        ][:3]
+        if not etablissements:
+            return None, 0.0
+
+        lines = ["📞 Comment nous contacter:"]
+        for etab in etablissements:
+            lines.append(f"\n🏫 {etab['nom']}")
+            if etab['email']:
+                lines.append(f"- 📧 Email: {etab['email']}")
+            if etab['telephone']:
+                lines.append(f"- 📱 Tél: {etab['telephone']}")
+            if etab['site_web']:
+                lines.append(f"- 🌐 Site: {etab['site_web']}")
+            adresse = ", ".join(part for part in (etab['adresse'], etab['ville']) if part)
+            if adresse:
+                lines.append(f"- 📍 Adresse: {adresse}")
+        lines.append("\nPuis-je vous aider avec autre chose ? 😊")
+        return "\n".join(lines), 0.9
+
+    def render_calendrier(self, snapshot, niveau, filiere):
+        filieres = [filiere] if filiere else snapshot.filieres
+        if niveau and not filiere:
+            filieres = [f for f in filieres if f['niveau'] == niveau]
+        windows = [f for f in filieres if f['date_ouverture'] or f['date_fermeture']]
+
+        if windows:
+            lines = ["📅 Périodes de préinscription:\n"]
+            for f in windows:
+                debut = (f['date_ouverture'] or '?')[:10]
+                fin = (f['date_fermeture'] or '?')[:10]
+                lines.append(f"- {f['nom']}: du {debut} au {fin}")
+            lines.append("\nN'attendez pas la clôture pour déposer votre dossier ! 🎓")
+            return "\n".join(lines), 1.0
+
+        # Pas de dates en base: calendrier académique publié
+        lines = ["📅 Calendrier académique:\n"]
+        for label, periode in CALENDRIER_ACADEMIQUE:
+            lines.append(f"- {label}: {periode}")
+        lines.append("\nC'est le moment idéal pour vous préinscrire ! 🎓")
+        return "\n".join(lines), 0.75
+
+    def stats(self):
+        with self._lock:
+            answered = dict(self.answered)
+            fallback_renders = dict(self.fallback_renders)
+        return {
+            'threshold': self.threshold,
+            'answered': answered,
+            'answered_total': sum(answered.values()),
+            'escalated': self.escalated,
+            'fallback_renders': fallback_renders,
+            'catalog': self.catalog.stats()
+        }
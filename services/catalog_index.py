@@ -0,0 +1,172 @@
+"""
+Index de recherche sur le catalogue (filières et établissements)
+Chaque entrée du catalogue devient une fiche courte; seules les fiches les
+plus proches du message sont injectées dans le prompt. L'index est
+reconstruit dès que la version du catalogue change.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from .text_utils import normalize_text, hashed_ngram_vector
+from .catalog_answers import format_amount, format_fee_range
+
+# Type de fiche privilégié pour certaines intentions
+INTENT_KINDS = {
+    'contact': 'etablissement',
+    'programmes': 'filiere',
+    'frais': 'filiere',
+    'admission': 'filiere',
+    'calendrier': 'filiere',
+    'preinscription': 'filiere',
+}
+
+# Bonus de similarité des fiches du type privilégié
+KIND_BONUS = 0.15
+
+# Une fiche n'est retenue que si son score atteint cette fraction du meilleur
+RELATIVE_CUTOFF = 0.5
+
+
+def filiere_snippet(filiere):
+    """Fiche d'une filière, sur une ligne"""
+    title = filiere['nom']
+    if not title.lower().startswith(filiere['niveau'].lower()):
+        title = f"{filiere['niveau']} {title}"
+    parts = [
+        f"{title} ({filiere['etablissement_nom']}, {filiere['duree']} ans)",
+        f"inscription {format_amount(filiere['frais_inscription'])}, "
+        f"scolarité {format_amount(filiere['frais_scolarite'])}/an",
+    ]
+    if filiere['prerequis']:
+        parts.append(f"prérequis: {filiere['prerequis']}")
+    if filiere['date_ouverture'] or filiere['date_fermeture']:
+        parts.append(f"préinscriptions du {(filiere['date_ouverture'] or '?')[:10]} "
+                     f"au {(filiere['date_fermeture'] or '?')[:10]}")
+    parts.append(f"{filiere['places_disponibles']} places")
+    return " - ".join(parts)
+
+
+def etablissement_snippet(etablissement):
+    """Fiche de contact d'un établissement, sur une ligne"""
+    parts = [etablissement['nom']]
+    adresse = ", ".join(p for p in (etablissement['adresse'], etablissement['ville']) if p)
+    if adresse:
+        parts.append(f"adresse: {adresse}")
+    if etablissement['email']:
+        parts.append(f"email: {etablissement['email']}")
+    if etablissement['telephone']:
+        parts.append(f"tél: {etablissement['telephone']}")
+    if etablissement['site_web']:
+        parts.append(f"site: {etablissement['site_web']}")
+    return " - ".join(parts)
+
+
+class CatalogIndex:
+    """
+    Recherche des fiches du catalogue les plus pertinentes pour un message
+
+    Les fiches sont comparées au message par similarité cosinus de leurs
+    n-grammes hachés (un produit matrice-vecteur). Au plus `k` fiches sont
+    retenues, à condition d'être assez proches de la meilleure.
+
+    Args:
+        catalog (Catalog): Accès au catalogue des formations
+        dim (int): Taille des vecteurs de n-grammes hachés
+        min_score (float): Similarité minimale d'une fiche retenue
+    """
+
+    def __init__(self, catalog, dim=1024, min_score=0.1):
+        self.catalog = catalog
+        self.dim = dim
+        self.min_score = float(min_score)
+        self._lock = threading.Lock()
+        self.version = None
+        self.kinds = np.zeros(0, dtype=object)
+        self.snippets = []
+        self.overview = ''
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.rebuilds = 0
+        self.searches = 0
+        self.search_time = 0.0
+
+    def build(self, snapshot):
+        """Reconstruit l'index pour un instantané du catalogue"""
+        kinds, snippets, texts = [], [], []
+        for filiere in snapshot.filieres:
+            kinds.append('filiere')
+            snippets.append(filiere_snippet(filiere))
+            texts.append(" ".join(str(filiere[key] or '') for key in (
+                'niveau', 'nom', 'code', 'departement', 'description', 'prerequis', 'etablissement_nom'
+            )))
+        for etab in snapshot.etablissements:
+            kinds.append('etablissement')
+            snippets.append(etablissement_snippet(etab))
+            texts.append(f"{etab['nom']} {etab['code']} {etab['ville'] or ''} "
+                         "contact adresse telephone email site localisation")
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = hashed_ngram_vector(normalize_text(text), self.dim)
+
+        # Vue d'ensemble compacte: intitulés et fourchettes de frais par niveau
+        overview = [
+            f"{niveau} (inscription {format_fee_range([f['frais_inscription'] for f in filieres])}, "
+            f"scolarité {format_fee_range([f['frais_scolarite'] for f in filieres])}/an): "
+            + ", ".join(f['nom'] for f in filieres)
+            for niveau, filieres in snapshot.filieres_by_niveau().items()
+        ]
+
+        self.kinds = np.array(kinds, dtype=object)
+        self.snippets = snippets
+        self.overview = "\n".join(overview)
+        self.matrix = matrix
+        self.version = snapshot.version
+        self.rebuilds += 1
+
+    def search(self, message, intent=None, k=4):
+        """
+        Fiches les plus proches du message
+
+        Returns:
+            tuple: (vue d'ensemble, liste des fiches retenues)
+        """
+        snapshot = self.catalog.get()
+        if snapshot is None:
+            return '', []
+
+        start = time.perf_counter()
+        with self._lock:
+            if snapshot.version != self.version:
+                self.build(snapshot)
+            matrix, kinds, snippets, overview = self.matrix, self.kinds, self.snippets, self.overview
+
+        results = []
+        if len(snippets) and k > 0:
+            similarity = matrix @ hashed_ngram_vector(normalize_text(message), self.dim)
+            scores = similarity
+            preferred = INTENT_KINDS.get(intent)
+            if preferred:
+                scores = similarity + KIND_BONUS * (kinds == preferred)
+            top = np.argsort(-scores)[:k]
+            cutoff = scores[top[0]] * RELATIVE_CUTOFF
+            results = [
+                snippets[i] for i in top
+                if similarity[i] >= self.min_score and scores[i] >= cutoff
+            ]
+
+        with self._lock:
+            self.searches += 1
+            self.search_time += time.perf_counter() - start
+        return overview, results
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'documents': len(self.snippets),
+            'rebuilds': self.rebuilds,
+            'searches': self.searches,
+            'avg_search_ms': round(self.search_time / self.searches * 1000, 3) if self.searches else None
+        }
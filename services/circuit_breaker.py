@@ -0,0 +1,238 @@
+"""
+Disjoncteur (circuit breaker) des appels au modèle
+Quand le fournisseur échoue ou ralentit trop souvent, le circuit s'ouvre et
+les appels sont refusés immédiatement (réponse de secours en quelques
+microsecondes) au lieu d'attendre un aller-retour voué à l'échec
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+# Autorisation d'un appel, rendue à record(): génération du circuit au
+# départ de l'appel (incrémentée à chaque ouverture) et numéro de l'appel
+# d'essai (0: appel ordinaire)
+Permit = namedtuple('Permit', ['generation', 'probe'])
+
+
+class CircuitOpenError(RuntimeError):
+    """Appel refusé: le circuit du fournisseur est ouvert"""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur fermé / ouvert / semi-ouvert, partagé par les threads d'un worker
+
+    Fermé: les appels passent; leurs résultats des `window_seconds`
+    dernières secondes sont conservés. Dès que `min_calls` appels sont
+    connus et que le taux d'échec (erreurs et dépassements de délai) ou le
+    taux d'appels lents atteint son seuil, le circuit s'ouvre.
+
+    Ouvert: tous les appels sont refusés pendant `open_seconds`.
+
+    Semi-ouvert: au plus `half_open_calls` appels d'essai passent; s'ils
+    réussissent tous le circuit se referme, au premier échec il se rouvre.
+    Seuls les résultats des appels d'essai comptent: un appel parti avant
+    l'ouverture (autre génération) est ignoré, même s'il finit par réussir.
+    Un essai sans résultat après `probe_timeout` secondes (appel perdu ou
+    bloqué) compte comme un échec: le circuit se rouvre.
+
+    Args:
+        window_seconds (float): Fenêtre d'observation des appels
+        min_calls (int): Appels minimum dans la fenêtre avant de décider
+        error_rate (float): Taux d'échec qui ouvre le circuit
+        slow_call_seconds (float): Latence à partir de laquelle un appel est lent (0: ignoré)
+        slow_call_rate (float): Taux d'appels lents qui ouvre le circuit
+        open_seconds (float): Durée d'ouverture avant les appels d'essai
+        half_open_calls (int): Appels d'essai en semi-ouvert
+        probe_timeout (float): Attente maximale des résultats d'essai (0: illimitée)
+    """
+
+    def __init__(self, window_seconds=30, min_calls=10, error_rate=0.5, slow_call_seconds=5,
+                 slow_call_rate=0.8, open_seconds=15, half_open_calls=1, probe_timeout=30):
+        self.window_seconds = float(window_seconds)
+        self.min_calls = max(1, int(min_calls))
+        self.error_rate = float(error_rate)
+        self.slow_call_seconds = float(slow_call_seconds)
+        self.slow_call_rate = float(slow_call_rate)
+        self.open_seconds = float(open_seconds)
+        self.half_open_calls = max(1, int(half_open_calls))
+        self.probe_timeout = float(probe_timeout)
+
+        self._lock = threading.Lock()
+        self._calls = deque()  # (instant, échec, lent)
+        self._failures = 0
+        self._slow = 0
+        self.state = CLOSED
+        self._opened_at = None
+        self._half_open_at = None
+        self._generation = 0
+        self._probes = 0
+        self._probe_successes = 0
+        self._probe_seq = 0
+        self._pending = set()  # essais partis, ni rapportés ni rendus
+
+        self.opened = 0
+        self.rejected = 0
+        self.last_opened_reason = None
+
+    # ============================================
+    # FENÊTRE D'OBSERVATION
+    # ============================================
+
+    def _trim(self, now):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            _, failed, slow = self._calls.popleft()
+            self._failures -= failed
+            self._slow -= slow
+
+    def _reset_window(self):
+        self._calls.clear()
+        self._failures = 0
+        self._slow = 0
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self._opened_at = now
+        self._generation += 1
+        self._probes = 0
+        self._probe_successes = 0
+        self._pending.clear()
+        self.opened += 1
+        self.last_opened_reason = reason
+        self._reset_window()
+        print(f"⚠️ Circuit du fournisseur ouvert ({reason}) pour {self.open_seconds:g} s")
+
+    # ============================================
+    # API
+    # ============================================
+
+    def allow(self):
+        """
+        Autorise un appel s'il peut partir maintenant
+
+        Chaque appel autorisé doit ensuite être suivi de `record`, avec
+        l'autorisation reçue.
+
+        Returns:
+            Permit | None: Autorisation, None si l'appel est refusé
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN:
+                if now - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return None
+                self.state = HALF_OPEN
+                self._half_open_at = now
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    if self.probe_timeout > 0 and now - self._half_open_at >= self.probe_timeout:
+                        self._open(now, 'essai sans réponse')
+                    self.rejected += 1
+                    return None
+                self._probes += 1
+                self._probe_seq += 1
+                self._pending.add(self._probe_seq)
+                return Permit(self._generation, self._probe_seq)
+            return Permit(self._generation, 0)
+
+    def is_open(self):
+        """Vrai si le circuit refuse les appels (lecture seule: aucun essai consommé)"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self._opened_at < self.open_seconds
+            return self.state == HALF_OPEN and self._probes >= self.half_open_calls
+
+    def check(self):
+        """
+        Autorisation de l'appel (voir allow)
+
+        Returns:
+            Permit: Autorisation, à rendre à record()
+
+        Raises:
+            CircuitOpenError: L'appel doit être refusé
+        """
+        permit = self.allow()
+        if permit is None:
+            raise CircuitOpenError("Circuit du fournisseur ouvert: appel refusé")
+        return permit
+
+    def release(self, permit):
+        """
+        Rend l'autorisation d'un appel abandonné sans résultat (annulation)
+
+        Un essai rendu libère sa place: un autre appel d'essai peut partir.
+        Sans effet pour un essai déjà rendu ou rapporté.
+        """
+        if permit is None or not permit.probe:
+            return
+        with self._lock:
+            if permit.generation == self._generation and permit.probe in self._pending:
+                self._pending.discard(permit.probe)
+                self._probes -= 1
+
+    def record(self, latency, ok=True, permit=None):
+        """
+        Résultat d'un appel autorisé
+
+        Args:
+            latency (float): Durée de l'appel (secondes)
+            ok (bool): Faux pour une erreur ou un dépassement de délai
+            permit (Permit): Autorisation reçue de allow() / check()
+        """
+        now = time.monotonic()
+        slow = ok and self.slow_call_seconds > 0 and latency >= self.slow_call_seconds
+        with self._lock:
+            if permit is not None and permit.generation != self._generation:
+                # Appel parti avant la dernière ouverture: sans effet sur la décision
+                return
+            if self.state == HALF_OPEN:
+                if permit is None or permit.probe not in self._pending:
+                    # Seuls les appels d'essai décident en semi-ouvert, une fois chacun
+                    return
+                self._pending.discard(permit.probe)
+                if not ok or slow:
+                    self._open(now, 'essai en échec' if not ok else 'essai trop lent')
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    self.state = CLOSED
+                    print("✅ Circuit du fournisseur refermé")
+                return
+            if self.state == OPEN:
+                # Appel parti avant l'ouverture: sans effet sur la décision
+                return
+
+            self._calls.append((now, not ok, slow))
+            self._failures += not ok
+            self._slow += slow
+            self._trim(now)
+
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            if self._failures / total >= self.error_rate:
+                self._open(now, f"{self._failures}/{total} échecs")
+            elif self.slow_call_seconds > 0 and self._slow / total >= self.slow_call_rate:
+                self._open(now, f"{self._slow}/{total} appels lents")
+
+    def stats(self):
+        with self._lock:
+            self._trim(time.monotonic())
+            total = len(self._calls)
+            return {
+                'state': self.state,
+                'window_calls': total,
+                'window_error_rate': round(self._failures / total, 4) if total else None,
+                'window_slow_rate': round(self._slow / total, 4) if total else None,
+                'opened': self.opened,
+                'rejected': self.rejected,
+                'last_opened_reason': self.last_opened_reason,
+            }
@@ -0,0 +1,280 @@
+"""
+Stockage des contextes de conversation du chatbot
+Mémoire bornée par worker: éviction LRU + expiration par inactivité,
+sessions réparties en segments verrouillés indépendamment (lock striping).
+La table messages reste la source de vérité: un contexte absent ou périmé
+est rechargé depuis la base, ce qui rend l'historique cohérent entre workers.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from datetime import datetime
+
+from .database import get_db_connection
+
+# Entrée compacte de l'historique (un tuple plutôt qu'un dict par message)
+HistoryEntry = namedtuple('HistoryEntry', ['role', 'content', 'timestamp'])
+
+
+class SessionContext:
+    """Contexte d'une session de conversation"""
+
+    __slots__ = ('history', 'user_info', 'intent', 'created_at', 'last_access', 'synced_id',
+                 'validated_at')
+
+    def __init__(self, history_size):
+        self.history = deque(maxlen=history_size)
+        self.user_info = {}
+        self.intent = None
+        self.created_at = datetime.now().isoformat()
+        self.last_access = time.monotonic()
+        # ID du dernier message bot de la base reflété dans l'historique en mémoire
+        self.synced_id = None
+        # Dernière confrontation avec la base (None: jamais, contexte neuf)
+        self.validated_at = None
+
+    def recent_history(self, count):
+        """Retourne les `count` derniers messages (du plus ancien au plus récent)"""
+        if count >= len(self.history):
+            return list(self.history)
+        return list(self.history)[-count:]
+
+
+class MessageHistoryLoader:
+    """
+    Recharge l'historique d'une session depuis la table messages
+
+    Seuls les messages jusqu'au dernier message du bot sont chargés: le message
+    utilisateur en cours de traitement (déjà enregistré) n'apparaît pas dans
+    l'historique du prompt.
+
+    Args:
+        connect (callable): Fournit une connexion (pool partagé par défaut)
+        limit (int): Nombre de messages chargés au plus
+    """
+
+    def __init__(self, connect=get_db_connection, limit=10):
+        self.connect = connect
+        self.limit = limit
+
+    def get_connection(self):
+        return self.connect()
+
+    def last_bot_message_id(self, session_id):
+        """ID du dernier message bot de la session (None si aucun)"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT MAX(id) FROM messages WHERE session_id = ? AND role = 'bot'",
+                (session_id,)
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def load(self, session_id, upto_id):
+        """Charge les derniers messages de la session jusqu'à `upto_id` inclus"""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                """
+                SELECT role, contenu, timestamp
+                FROM messages
+                WHERE session_id = ? AND id <= ?
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (session_id, upto_id, self.limit)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return [
+            HistoryEntry('assistant' if role == 'bot' else 'user', contenu, timestamp)
+            for role, contenu, timestamp in reversed(rows)
+        ]
+
+
+class _Shard:
+    """Segment du store: un verrou, une table LRU et ses compteurs"""
+
+    __slots__ = ('lock', 'sessions', 'hits', 'misses', 'evictions', 'expirations', 'rehydrations')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rehydrations = 0
+
+
+class ConversationContext:
+    """
+    Gère le contexte des conversations avec historique
+
+    Args:
+        max_sessions (int): Nombre maximal de sessions gardées en mémoire
+        idle_ttl (float): Durée d'inactivité (secondes) avant expiration d'une session
+        shards (int): Nombre de segments verrouillés indépendamment
+        history_size (int): Nombre de messages conservés par session
+        loader (MessageHistoryLoader): Source de rechargement de l'historique (optionnelle)
+    """
+
+    def __init__(self, max_sessions=5000, idle_ttl=3600, shards=16, history_size=10, loader=None,
+                 revalidate_interval=5):
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_ttl = float(idle_ttl)
+        self.revalidate_interval = float(revalidate_interval)
+        self.history_size = int(history_size)
+        self.loader = loader
+        self.loader_errors = 0
+        self._shards = [_Shard() for _ in range(max(1, int(shards)))]
+        # Capacité par segment (arrondie au supérieur)
+        self._shard_capacity = -(-self.max_sessions // len(self._shards))
+
+    def _shard_for(self, session_id):
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def _is_expired(self, context, now):
+        return self.idle_ttl > 0 and now - context.last_access > self.idle_ttl
+
+    def _get_or_create(self, shard, session_id):
+        """Récupère ou crée un contexte (le verrou du segment doit être tenu)"""
+        now = time.monotonic()
+        sessions = shard.sessions
+
+        context = sessions.get(session_id)
+        if context is not None and self._is_expired(context, now):
+            del sessions[session_id]
+            shard.expirations += 1
+            context = None
+
+        if context is not None:
+            shard.hits += 1
+            sessions.move_to_end(session_id)
+        else:
+            shard.misses += 1
+            context = SessionContext(self.history_size)
+            sessions[session_id] = context
+
+            # Purger les sessions expirées en tête de LRU, puis respecter la capacité
+            while sessions:
+                oldest = next(iter(sessions.values()))
+                if oldest is context or not self._is_expired(oldest, now):
+                    break
+                sessions.popitem(last=False)
+                shard.expirations += 1
+            while len(sessions) > self._shard_capacity:
+                sessions.popitem(last=False)
+                shard.evictions += 1
+
+        context.last_access = now
+        return context
+
+    def get_context(self, session_id):
+        """
+        Récupère le contexte d'une session
+
+        Avec un loader, un contexte absent de la mémoire, ou confronté à la
+        base depuis plus de `revalidate_interval` secondes, est validé contre
+        le dernier message bot enregistré (une requête indexée); si un autre
+        worker a traité un échange depuis, l'historique est rechargé. Les
+        accès plus rapprochés sont servis par la mémoire seule.
+        """
+        now = time.monotonic()
+        shard = self._shard_for(session_id)
+        with shard.lock:
+            context = self._get_or_create(shard, session_id)
+            synced_id = context.synced_id
+            fresh = (
+                context.validated_at is not None
+                and now - context.validated_at < self.revalidate_interval
+            )
+            if not fresh:
+                context.validated_at = now
+
+        if self.loader is None or fresh:
+            return context
+
+        try:
+            latest_id = self.loader.last_bot_message_id(session_id)
+            if latest_id is None or latest_id == synced_id:
+                return context
+            entries = self.loader.load(session_id, latest_id)
+        except Exception as e:
+            self.loader_errors += 1
+            print(f"⚠️ Rechargement du contexte impossible ({session_id}): {e}")
+            return context
+
+        with shard.lock:
+            context.history.clear()
+            context.history.extend(entries)
+            context.synced_id = latest_id
+            shard.rehydrations += 1
+        return context
+
+    def mark_synced(self, session_id, message_id, content):
+        """
+        Signale qu'un message bot a été enregistré en base
+
+        Le contexte n'est marqué synchronisé que si sa dernière entrée correspond
+        au message enregistré; sinon il sera rechargé au prochain accès.
+        """
+        shard = self._shard_for(session_id)
+        with shard.lock:
+            context = shard.sessions.get(session_id)
+            if context is not None and context.history and context.history[-1].content == content:
+                context.synced_id = message_id
+                # La mémoire reflète la base à cet instant
+                context.validated_at = time.monotonic()
+
+    def add_message(self, session_id, role, content):
+        """Ajoute un message à l'historique (les plus anciens sortent automatiquement)"""
+        shard = self._shard_for(session_id)
+        with shard.lock:
+            context = self._get_or_create(shard, session_id)
+            context.history.append(HistoryEntry(role, content, time.time()))
+
+    def update_user_info(self, session_id, info):
+        """Met à jour les infos utilisateur"""
+        shard = self._shard_for(session_id)
+        with shard.lock:
+            self._get_or_create(shard, session_id).user_info.update(info)
+
+    def set_intent(self, session_id, intent):
+        """Définit l'intention de l'utilisateur"""
+        shard = self._shard_for(session_id)
+        with shard.lock:
+            self._get_or_create(shard, session_id).intent = intent
+
+    def clear(self, session_id):
+        """Supprime le contexte d'une session"""
+        shard = self._shard_for(session_id)
+        with shard.lock:
+            shard.sessions.pop(session_id, None)
+
+    def __len__(self):
+        return sum(len(shard.sessions) for shard in self._shards)
+
+    def stats(self):
+        """Compteurs agrégés du store"""
+        totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'rehydrations': 0, 'size': 0}
+        for shard in self._shards:
+            with shard.lock:
+                totals['hits'] += shard.hits
+                totals['misses'] += shard.misses
+                totals['evictions'] += shard.evictions
+                totals['expirations'] += shard.expirations
+                totals['rehydrations'] += shard.rehydrations
+                totals['size'] += len(shard.sessions)
+
+        lookups = totals['hits'] + totals['misses']
+        totals['hit_rate'] = round(totals['hits'] / lookups, 4) if lookups else 0.0
+        totals['max_sessions'] = self.max_sessions
+        totals['idle_ttl'] = self.idle_ttl
+        totals['shards'] = len(self._shards)
+        totals['loader_errors'] = self.loader_errors
+        return totals
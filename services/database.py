@@ -0,0 +1,261 @@
+"""
+Accès à la base SQLite de l'application
+Pool de connexions partagé par les contrôleurs et les middlewares: une
+connexion rendue (conn.close()) est réutilisée par la requête suivante au
+lieu d'être rouverte, et les connexions oubliées par une requête (exception
+avant conn.close()) sont rendues au pool en fin de requête
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+
+from flask import g, has_app_context
+
+# Base de l'application (chemin relatif au répertoire de lancement)
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'database/chatbot.db')
+
+# Profils de réglage des connexions (PRAGMA appliqués à l'ouverture)
+PRAGMA_PROFILES = {
+    # Réglages par défaut de SQLite: journal de rollback, synchronous=FULL,
+    # clés étrangères ignorées (référence des benchmarks)
+    'legacy': {},
+    # WAL (lectures et écriture simultanées), commit durable à chaque transaction
+    'safe': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'foreign_keys': 'ON',
+    },
+    # WAL, synchronous=NORMAL (pas de corruption possible; une coupure de
+    # courant peut perdre les dernières transactions), cache et mmap agrandis
+    'performance': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+}
+
+# Profil des connexions du pool, et réglages qui le complètent ou le
+# remplacent ("mmap_size=0,cache_size=-16000")
+DB_PRAGMA_PROFILE = os.getenv('DB_PRAGMA_PROFILE', 'performance')
+DB_PRAGMAS = os.getenv('DB_PRAGMAS', '')
+
+
+def pragma_settings(profile=DB_PRAGMA_PROFILE, overrides=DB_PRAGMAS):
+    """
+    Réglages d'un profil, complétés par les surcharges
+
+    Args:
+        profile (str): Nom du profil (voir PRAGMA_PROFILES)
+        overrides (str): Réglages "nom=valeur" séparés par des virgules
+
+    Returns:
+        dict: PRAGMA -> valeur, dans l'ordre d'application
+    """
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Profil SQLite inconnu: {profile} (profils: {', '.join(PRAGMA_PROFILES)})")
+    settings = dict(PRAGMA_PROFILES[profile])
+    for item in overrides.split(','):
+        if item.strip():
+            name, _, value = item.partition('=')
+            settings[name.strip()] = value.strip()
+    return settings
+
+
+def apply_pragmas(conn, settings):
+    """Applique des réglages PRAGMA à une connexion"""
+    for name, value in settings.items():
+        if not name.isidentifier() or not str(value).replace('-', '').isalnum():
+            raise ValueError(f"Réglage SQLite invalide: {name}={value}")
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connexion SQLite dont close() la rend à son pool"""
+
+    pool = None
+    checked_out = False
+    # Numéro du dernier emprunt: distingue l'emprunt d'une requête des
+    # emprunts suivants de la même connexion par d'autres threads
+    checkout = 0
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def discard(self):
+        """Ferme réellement la connexion"""
+        sqlite3.Connection.close(self)
+
+
+class ConnectionPool:
+    """
+    Pool de connexions SQLite réutilisables
+
+    Une connexion n'est confiée qu'à un appelant à la fois, quel que soit
+    son thread. Au-delà de `size` connexions en cours, de nouvelles
+    connexions sont ouvertes sans attente; seules `size` sont conservées au
+    retour. Une transaction laissée ouverte est annulée au retour.
+
+    Args:
+        path (str): Fichier de la base
+        size (int): Connexions inactives conservées au plus
+        timeout (float): Attente d'un verrou d'écriture (secondes)
+        pragmas (dict): Réglages appliqués à chaque nouvelle connexion
+    """
+
+    def __init__(self, path, size=16, timeout=5, pragmas=None):
+        self.path = path
+        self.size = int(size)
+        self.timeout = float(timeout)
+        self.pragmas = pragmas or {}
+        self._lock = threading.Lock()
+        self._idle = []
+        self._checkouts = itertools.count(1)
+        self.created = 0
+        self.acquired = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.leaked = 0
+        self.discarded = 0
+
+    def connect(self):
+        conn = sqlite3.connect(
+            self.path, timeout=self.timeout, check_same_thread=False, factory=PooledConnection
+        )
+        conn.pool = self
+        try:
+            apply_pragmas(conn, self.pragmas)
+        except Exception:
+            conn.discard()
+            raise
+        return conn
+
+    def acquire(self):
+        """Connexion du pool (rendue par conn.close())"""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self.acquired += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            if conn is None:
+                self.created += 1
+        if conn is None:
+            try:
+                conn = self.connect()
+            except Exception:
+                with self._lock:
+                    self.in_use -= 1
+                raise
+        conn.row_factory = sqlite3.Row
+        conn.checkout = next(self._checkouts)
+        conn.checked_out = True
+        return conn
+
+    def release(self, conn, checkout=None):
+        """
+        Rend une connexion au pool (sans effet si elle l'est déjà)
+
+        Args:
+            checkout (int): Ne la rendre que si elle est toujours confiée à
+                cet emprunt (pas à un emprunt suivant, d'un autre thread)
+
+        Returns:
+            bool: Vrai si la connexion a été rendue par cet appel
+        """
+        with self._lock:
+            if not conn.checked_out or (checkout is not None and conn.checkout != checkout):
+                return False
+            conn.checked_out = False
+        keep = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            print(f"⚠️ Connexion écartée du pool: {e}")
+            keep = False
+        with self._lock:
+            self.in_use -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return True
+            self.discarded += 1
+        conn.discard()
+        return True
+
+    def count_leak(self):
+        with self._lock:
+            self.leaked += 1
+
+    def close_all(self):
+        """Ferme les connexions inactives"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'pragmas': dict(self.pragmas),
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'acquired': self.acquired,
+                'created': self.created,
+                'reuse_rate': round(1 - self.created / self.acquired, 4) if self.acquired else None,
+                'leaked': self.leaked,
+                'discarded': self.discarded,
+            }
+
+
+# Instance globale (DB_POOL_SIZE connexions inactives conservées par worker)
+pool = ConnectionPool(
+    DATABASE_PATH,
+    size=int(os.getenv('DB_POOL_SIZE', 16)),
+    pragmas=pragma_settings()
+)
+
+
+def get_db_connection():
+    """
+    Connexion à la base de données, prise dans le pool
+
+    conn.close() la rend au pool; pendant une requête, une connexion qui ne
+    l'a pas été est rendue à la fin de la requête (release_request_connections).
+
+    Returns:
+        PooledConnection: Connexion (lignes en sqlite3.Row)
+    """
+    conn = pool.acquire()
+    if has_app_context():
+        g.setdefault('db_connections', []).append((conn, conn.checkout))
+    return conn
+
+
+def release_request_connections(error=None):
+    """
+    Rend au pool les connexions de la requête restées ouvertes
+
+    Une connexion déjà rendue par la requête a pu être reprise depuis par un
+    autre thread: seul l'emprunt de la requête (même numéro) est rendu.
+    """
+    for conn, checkout in g.pop('db_connections', ()):
+        if pool.release(conn, checkout):
+            pool.count_leak()
+
+
+def init_database_pool(app):
+    """Enregistre la restitution des connexions en fin de requête"""
+    app.teardown_appcontext(release_request_connections)
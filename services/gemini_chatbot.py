@@ -3,154 +3,177 @@ Module Gemini AI pour le Chatbot de Préinscription Universitaire
 Utilise Google Gemini pour générer des réponses contextuelles et personnalisées
 """
 
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+import hashlib
+import asyncio
+import contextlib
 import json
+import threading
+import time
 from datetime import datetime
 
+from .conversation_store import ConversationContext, MessageHistoryLoader
+from .response_cache import ResponseCache, PurgeGenerations
+from .catalog import Catalog
+from .catalog_answers import CatalogAnswerEngine, CALENDRIER_ACADEMIQUE
+from .catalog_index import CatalogIndex
+from .intent_matcher import intent_matcher
+from .intent_classifier import IntentClassifier
+from .prompt_budget import PromptStats, estimate_tokens, truncate_to_tokens, fit_history
+from .llm_provider import GeminiProvider, LocalProvider, DeadlineExceeded
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .single_flight import SingleFlight
+from .rate_limiter import RateLimiter, RateLimited, DEFAULT_STATE_PATH
+from .backend_pool import Backend, BackendPool
+from .hedging import HedgePolicy
+from .model_routing import ModelRouter
+from .text_utils import normalize_text
+from .job_queue import JobQueue
+from .database import DATABASE_PATH, pool as db_pool
+from .message_writer import MessageWriter
+
 # Charger les variables d'environnement
 load_dotenv()
 
-# Configuration Gemini
+# Configuration Gemini (le SDK n'est importé qu'au premier appel)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if not GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY non trouvée dans .env")
+GEMINI_MODEL_NAME = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
+GEMINI_INIT_RETRY_SECONDS = float(os.getenv('GEMINI_INIT_RETRY_SECONDS', 60))
+
+# Plusieurs clés et/ou modèles: "cle1@modele1,cle2@modele2" (voir create_provider)
+GEMINI_BACKENDS = os.getenv('GEMINI_BACKENDS', '')
 
-# Configurer Gemini avec la clé API
-genai.configure(api_key=GEMINI_API_KEY)
+DATABASE = DATABASE_PATH
 
 # ============================================
 # PROMPT SYSTÈME POUR LA PRÉINSCRIPTION
 # ============================================
 
+# Bloc d'instructions fixe. Les programmes, frais et contacts ne sont plus
+# recopiés ici: les fiches utiles sont extraites du catalogue (tables
+# filieres/etablissements) pour chaque message, voir build_prompt().
 SYSTEM_PROMPT = """Tu es un assistant virtuel spécialisé pour ICT University au Cameroun.
-
-🎓 TON RÔLE:
-Tu aides les étudiants avec leur processus de préinscription universitaire. Tu es courtois, professionnel et très informatif.
-
-📚 PROGRAMMES DISPONIBLES:
-
-**LICENCE (BAC+3):**
-- Génie Logiciel
-- Réseaux et Télécommunications
-- Cybersécurité
-- Intelligence Artificielle
-- Science des Données
-
-**MASTER (BAC+5):**
-- Génie Logiciel Avancé
-- Sécurité des Systèmes d'Information
-- Intelligence Artificielle et Big Data
-- Cloud Computing et DevOps
-- Management des Systèmes d'Information
+Tu aides les étudiants dans leur préinscription universitaire, avec un ton courtois, professionnel et chaleureux.
 
 📋 CONDITIONS D'ADMISSION:
+- Licence: Baccalauréat (toutes séries, priorité C, D, F), relevé de notes du BAC, acte de naissance, 4 photos d'identité
+- Master: Licence en informatique ou domaine connexe, relevé de notes de Licence, CV académique, lettre de motivation
 
-**Licence:**
-- Baccalauréat (toutes séries, priorité C, D, F)
-- Relevé de notes du BAC
-- Acte de naissance
-- 4 photos d'identité
+🎯 TES INSTRUCTIONS:
+1. Réponds en français, de façon concise (150 mots maximum sauf demande de détails)
+2. Utilise des emojis avec modération
+3. Appuie-toi UNIQUEMENT sur les informations du catalogue fournies pour les programmes, frais, dates et contacts; n'invente jamais un montant ou une filière
+4. Si l'information manque, redirige vers le service des admissions
+5. Guide vers la préinscription et propose des actions concrètes quand c'est approprié
 
-**Master:**
-- Licence en informatique ou domaine connexe
-- Relevé de notes de Licence
-- CV académique
-- Lettre de motivation
+IMPORTANT: Tu réponds UNIQUEMENT sur les sujets liés à ICT University et la préinscription. Pour d'autres sujets, redirige poliment vers ton domaine d'expertise.
+"""
 
-💰 FRAIS (Année 2024-2025):
+# Budget de tokens du prompt (estimation locale, voir services/prompt_budget.py)
+PROMPT_MAX_TOKENS = int(os.getenv('PROMPT_MAX_TOKENS', 1500))
+PROMPT_MAX_USER_TOKENS = int(os.getenv('PROMPT_MAX_USER_TOKENS', 400))
+PROMPT_HISTORY_TURN_TOKENS = int(os.getenv('PROMPT_HISTORY_TURN_TOKENS', 150))
 
-**Licence:**
-- Inscription: 50,000 FCFA
-- Scolarité: 850,000 FCFA/an
+# Taille des prompts et latence des appels au modèle
+prompt_stats = PromptStats()
 
-**Master:**
-- Inscription: 75,000 FCFA
-- Scolarité: 1,200,000 FCFA/an
+# ============================================
+# CONTEXTE DES CONVERSATIONS
+# ============================================
 
-📅 CALENDRIER:
-- Préinscriptions: Juillet - Septembre
-- Rentrée: Octobre
-- Examens 1er semestre: Janvier
-- Examens 2ème semestre: Juin
+HISTORY_SIZE = 10
+
+# L'historique est rechargé depuis la table messages quand le contexte local
+# est absent ou périmé (requête traitée par un autre worker, redémarrage...).
+# Un contexte en mémoire n'est confronté à la base qu'au-delà de
+# CHAT_CONTEXT_REVALIDATE_SECONDS depuis la dernière vérification
+history_loader = None
+if os.getenv('CHAT_CONTEXT_REHYDRATE', '1') == '1':
+    history_loader = MessageHistoryLoader(limit=HISTORY_SIZE)
+
+# Instance globale (bornée, voir services/conversation_store.py)
+conversation_context = ConversationContext(
+    max_sessions=int(os.getenv('CHAT_CONTEXT_MAX_SESSIONS', 5000)),
+    idle_ttl=float(os.getenv('CHAT_CONTEXT_TTL_SECONDS', 3600)),
+    shards=int(os.getenv('CHAT_CONTEXT_SHARDS', 16)),
+    history_size=HISTORY_SIZE,
+    loader=history_loader,
+    revalidate_interval=float(os.getenv('CHAT_CONTEXT_REVALIDATE_SECONDS', 5))
+)
 
-📍 CONTACT:
-- Site web: www.ict-university.cm
-- Email: admissions@ict-university.cm
-- Téléphone: +237 6XX XXX XXX
-- Adresse: Yaoundé, Cameroun
+# Écriture différée des messages: un commit par lot (MESSAGE_WRITE_MAX_BATCH
+# écritures, ou toutes les MESSAGE_WRITE_FLUSH_MS ms), file bornée. Le thread
+# d'écriture garde sa propre connexion (mêmes réglages), hors des emprunts du pool
+message_writer = None
+if os.getenv('MESSAGE_WRITE_BEHIND', '1') == '1':
+    message_writer = MessageWriter(
+        db_pool.connect,
+        max_batch=int(os.getenv('MESSAGE_WRITE_MAX_BATCH', 200)),
+        flush_interval=float(os.getenv('MESSAGE_WRITE_FLUSH_MS', 5)) / 1000,
+        max_queue=int(os.getenv('MESSAGE_WRITE_MAX_QUEUE', 10000))
+    )
 
-🎯 TES INSTRUCTIONS:
+# ============================================
+# CATALOGUE ET RÉPONSES DÉTERMINISTES
+# ============================================
 
-1. **Réponds en français** avec un ton professionnel mais chaleureux
-2. **Sois concis** - max 150 mots par réponse sauf si plus de détails sont demandés
-3. **Utilise des emojis** pour rendre les réponses plus engageantes (avec modération)
-4. **Guide vers la préinscription** quand approprié
-5. **Propose des actions** concrètes (ex: "Voulez-vous remplir le formulaire de préinscription ?")
-6. **Si tu ne sais pas**, redirige vers le service des admissions
-7. **Personnalise** les réponses selon le contexte de la conversation
+# Instantané des tables filieres/etablissements (connexions du pool), relu
+# dès que leur version change; CATALOG_REFRESH_SECONDS espace les lectures
+# de la version (0: à chaque accès)
+catalog = Catalog(refresh_interval=float(os.getenv('CATALOG_REFRESH_SECONDS', 0)))
 
-📝 EXEMPLES DE RÉPONSES:
+# Réponses aux questions simples sur le catalogue sans appel à Gemini
+catalog_answers = None
+if os.getenv('CATALOG_ANSWERS_ENABLED', '1') == '1':
+    catalog_answers = CatalogAnswerEngine(
+        catalog,
+        threshold=float(os.getenv('CATALOG_ANSWERS_THRESHOLD', 0.7))
+    )
 
-**Question sur un programme:**
-"Le programme de [NOM] est une formation de [NIVEAU] sur [DURÉE]. Il couvre [DOMAINES]. Les débouchés incluent [MÉTIERS]. Souhaitez-vous en savoir plus sur les conditions d'admission ? 🎓"
+# Index des fiches du catalogue injectées dans le prompt (reconstruit quand
+# la version du catalogue change)
+CATALOG_CONTEXT_TOP_K = int(os.getenv('CATALOG_CONTEXT_TOP_K', 4))
+catalog_index = CatalogIndex(catalog)
 
-**Question sur les frais:**
-"Pour [NIVEAU], les frais sont: Inscription [MONTANT] + Scolarité [MONTANT]/an. Des facilités de paiement sont possibles. Voulez-vous discuter des modalités ? 💰"
+# ============================================
+# CLASSIFIEUR D'INTENTION
+# ============================================
 
-**Demande de préinscription:**
-"Excellent choix ! 🎉 Pour vous préinscrire, j'ai besoin de quelques informations. Cliquez sur 'Préinscription' ou je peux vous guider étape par étape. Préférez-vous quel programme ?"
+# Classifieur entraîné par train_intent_classifier.py (optionnel). En dessous
+# du seuil de confiance, les règles par mots-clés décident (et 'general' sans
+# mot-clé); sa classe 'general' reconnaît les messages hors sujet.
+INTENT_CLASSIFIER_PATH = os.getenv('INTENT_CLASSIFIER_PATH', 'database/intent_classifier.npz')
+INTENT_CLASSIFIER_THRESHOLD = float(os.getenv('INTENT_CLASSIFIER_THRESHOLD', 0.6))
 
-IMPORTANT: Tu réponds UNIQUEMENT sur les sujets liés à ICT University et la préinscription. Pour d'autres sujets, redirige poliment vers ton domaine d'expertise.
-"""
+intent_classifier = None
+if os.getenv('INTENT_CLASSIFIER_ENABLED', '1') == '1' and os.path.exists(INTENT_CLASSIFIER_PATH):
+    try:
+        intent_classifier = IntentClassifier.load(INTENT_CLASSIFIER_PATH)
+    except Exception as e:
+        print(f"⚠️ Classifieur d'intention non chargé: {e}")
 
 # ============================================
-# CONTEXTE DES CONVERSATIONS
+# CACHE DES RÉPONSES
 # ============================================
 
-class ConversationContext:
-    """Gère le contexte des conversations avec historique"""
-    
-    def __init__(self):
-        self.conversations = {}
-    
-    def get_context(self, session_id):
-        """Récupère le contexte d'une session"""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = {
-                'history': [],
-                'user_info': {},
-                'intent': None,
-                'created_at': datetime.now().isoformat()
-            }
-        return self.conversations[session_id]
-    
-    def add_message(self, session_id, role, content):
-        """Ajoute un message à l'historique"""
-        context = self.get_context(session_id)
-        context['history'].append({
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Garder seulement les 10 derniers messages
-        if len(context['history']) > 10:
-            context['history'] = context['history'][-10:]
-    
-    def update_user_info(self, session_id, info):
-        """Met à jour les infos utilisateur"""
-        context = self.get_context(session_id)
-        context['user_info'].update(info)
-    
-    def set_intent(self, session_id, intent):
-        """Définit l'intention de l'utilisateur"""
-        context = self.get_context(session_id)
-        context['intent'] = intent
-
-# Instance globale
-conversation_context = ConversationContext()
+# Réponses aux questions sans historique, réutilisées pour les questions
+# équivalentes (même intention, texte normalisé proche). Les purges sont
+# notées dans la base: elles s'appliquent au cache de chaque worker
+response_cache = None
+if os.getenv('RESPONSE_CACHE_ENABLED', '1') == '1':
+    response_cache = ResponseCache(
+        max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1000)),
+        ttl=float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', 21600)),
+        threshold=float(os.getenv('RESPONSE_CACHE_THRESHOLD', 0.9)),
+        generations=PurgeGenerations()
+    )
+
+# Messages sans historique identiques (texte normalisé) envoyés pendant qu'un
+# appel au modèle est en cours: ils attendent sa réponse au lieu d'en lancer un
+single_flight = None
+if os.getenv('SINGLE_FLIGHT_ENABLED', '1') == '1':
+    single_flight = SingleFlight()
 
 # ============================================
 # CONFIGURATION DU MODÈLE GEMINI
@@ -183,43 +206,449 @@ safety_settings = [
     },
 ]
 
-# Initialiser le modèle
-model = genai.GenerativeModel(
-    model_name='gemini-2.0-flash-exp',
-    generation_config=generation_config,
-    safety_settings=safety_settings
-)
+# ============================================
+# ROUTAGE DES MODÈLES PAR CLASSE DE QUESTION
+# ============================================
+
+# Modèle rapide et économique des questions simples (défaut: GEMINI_MODEL)
+GEMINI_SIMPLE_MODEL = os.getenv('GEMINI_SIMPLE_MODEL') or None
+
+# Prix des modèles (USD par million de tokens), pour l'estimation du coût
+MODEL_PRICES = {'input_price': 0.075, 'output_price': 0.30}
+SIMPLE_MODEL_PRICES = {'input_price': 0.0375, 'output_price': 0.15} if GEMINI_SIMPLE_MODEL else MODEL_PRICES
+
+# Table de routage, évaluée dans l'ordre (voir ModelRouter): conditions sur
+# l'intention et la longueur du message, puis modèle, budget de réponse,
+# température et prix du modèle. Remplaçable par un fichier JSON de même forme (MODEL_ROUTES_PATH).
+MODEL_ROUTES = {
+    'simple': {
+        'intents': ('salutation', 'aide'), 'max_words': 12, 'courtesy': True,
+        'model': GEMINI_SIMPLE_MODEL, 'max_output_tokens': 150, 'temperature': 0.5,
+        **SIMPLE_MODEL_PRICES,
+    },
+    'lookup': {
+        'intents': ('programmes', 'frais', 'calendrier', 'contact'), 'max_words': 20,
+        'model': GEMINI_SIMPLE_MODEL, 'max_output_tokens': 300, 'temperature': 0.3,
+        **SIMPLE_MODEL_PRICES,
+    },
+    'complex': {
+        'min_words': 40,
+        'model': None, 'max_output_tokens': 800, 'temperature': 0.4,
+        **MODEL_PRICES,
+    },
+    'standard': {
+        'model': None, 'max_output_tokens': generation_config['max_output_tokens'],
+        'temperature': generation_config['temperature'],
+        **MODEL_PRICES,
+    },
+}
+
+MODEL_ROUTES_PATH = os.getenv('MODEL_ROUTES_PATH')
+if MODEL_ROUTES_PATH:
+    try:
+        with open(MODEL_ROUTES_PATH, encoding='utf-8') as routes_file:
+            MODEL_ROUTES = json.load(routes_file)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Table de routage {MODEL_ROUTES_PATH} non chargée: {e}")
+
+model_router = ModelRouter(MODEL_ROUTES)
 
 # ============================================
-# FONCTIONS DE DÉTECTION D'INTENTION
+# FOURNISSEUR DE GÉNÉRATION
 # ============================================
 
-def detect_intent(message):
-    """Détecte l'intention de l'utilisateur"""
-    message_lower = message.lower()
-    
-    intents = {
-        'preinscription': ['préinscription', 'preinscription', "m'inscrire", 'inscription', 'postuler', 'candidature'],
-        'programmes': ['programme', 'filière', 'formation', 'licence', 'master', 'cursus', 'étude'],
-        'frais': ['frais', 'coût', 'prix', 'payer', 'paiement', 'combien', 'tarif'],
-        'admission': ['admission', 'condition', 'requis', 'document', 'dossier', 'exigence'],
-        'calendrier': ['date', 'quand', 'rentrée', 'calendrier', 'délai', 'inscription'],
-        'contact': ['contact', 'téléphone', 'email', 'adresse', 'localisation', 'où'],
-        'salutation': ['bonjour', 'salut', 'bonsoir', 'hello', 'hey', 'coucou'],
-        'aide': ['aide', 'aider', 'comment', 'info', 'information', 'renseigner']
+# LLM_PROVIDER=gemini (production) ou local (réponses gabarits, latence et
+# erreurs simulées: tests de charge et développement hors ligne)
+LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'gemini')
+
+# Délai maximal d'une requête de chat: au-delà, la réponse de secours de
+# l'intention est servie immédiatement (à ajuster d'après le p95 du fournisseur)
+CHAT_DEADLINE_SECONDS = float(os.getenv('CHAT_DEADLINE_SECONDS', 8))
+
+# Appels simultanés au modèle par worker, attente maximale entre deux fragments
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 16))
+LLM_STREAM_CHUNK_TIMEOUT = float(os.getenv('LLM_STREAM_CHUNK_TIMEOUT', 10))
+
+# Chemin asynchrone (asgi.py): appels au modèle simultanés par processus
+LLM_ASYNC_MAX_INFLIGHT = int(os.getenv('LLM_ASYNC_MAX_INFLIGHT', 256))
+
+# Disjoncteur: ouvert quand les échecs (erreurs, délais dépassés) ou les appels
+# lents des dernières LLM_BREAKER_WINDOW_SECONDS dépassent leur seuil; les
+# appels sont alors refusés (réponse de secours) pendant LLM_BREAKER_OPEN_SECONDS
+LLM_BREAKER_ENABLED = os.getenv('LLM_BREAKER_ENABLED', 'true').lower() == 'true'
+LLM_BREAKER_WINDOW_SECONDS = float(os.getenv('LLM_BREAKER_WINDOW_SECONDS', 30))
+LLM_BREAKER_MIN_CALLS = int(os.getenv('LLM_BREAKER_MIN_CALLS', 10))
+LLM_BREAKER_ERROR_RATE = float(os.getenv('LLM_BREAKER_ERROR_RATE', 0.5))
+LLM_BREAKER_SLOW_CALL_SECONDS = float(os.getenv('LLM_BREAKER_SLOW_CALL_SECONDS', 5))
+LLM_BREAKER_SLOW_CALL_RATE = float(os.getenv('LLM_BREAKER_SLOW_CALL_RATE', 0.8))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv('LLM_BREAKER_OPEN_SECONDS', 15))
+# Essai semi-ouvert sans résultat au-delà de ce délai: compté comme un échec
+LLM_BREAKER_PROBE_TIMEOUT_SECONDS = float(os.getenv('LLM_BREAKER_PROBE_TIMEOUT_SECONDS', 30))
+
+# Quota du fournisseur (requêtes et tokens par minute, 0 = sans limite),
+# partagé par les workers de la machine via un fichier SQLite. Un appel hors
+# quota attend au plus LLM_RATE_LIMIT_MAX_WAIT_SECONDS, sinon réponse de secours.
+LLM_RATE_LIMIT_RPM = float(os.getenv('LLM_RATE_LIMIT_RPM', 0))
+LLM_RATE_LIMIT_TPM = float(os.getenv('LLM_RATE_LIMIT_TPM', 0))
+LLM_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv('LLM_RATE_LIMIT_MAX_WAIT_SECONDS', 2))
+LLM_RATE_LIMIT_STATE_PATH = os.getenv('LLM_RATE_LIMIT_STATE_PATH', DEFAULT_STATE_PATH)
+
+# Pool de fournisseurs: poids de la dernière latence mesurée dans la moyenne lissée
+LLM_POOL_EWMA_ALPHA = float(os.getenv('LLM_POOL_EWMA_ALPHA', 0.2))
+
+# Requêtes couvertes (opt-in): sans réponse au bout du percentile
+# LLM_HEDGE_PERCENTILE des latences récentes, une seconde requête part (vers
+# un autre fournisseur du pool s'il y en a); au plus LLM_HEDGE_BUDGET des requêtes
+LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'false').lower() == 'true'
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', 95))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv('LLM_HEDGE_MIN_DELAY_SECONDS', 0.3))
+LLM_HEDGE_BUDGET = float(os.getenv('LLM_HEDGE_BUDGET', 0.1))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', 20))
+
+
+def new_deadline():
+    """Échéance (horloge monotone) d'une requête qui commence maintenant"""
+    return time.monotonic() + CHAT_DEADLINE_SECONDS
+
+
+def parse_gemini_backends(spec):
+    """
+    Liste des couples (clé, modèle) de GEMINI_BACKENDS
+    
+    Format: "cle1@modele1,cle2@modele2"; sans "@modele", GEMINI_MODEL est
+    utilisé. Sans GEMINI_BACKENDS, un seul couple (GEMINI_API_KEY, GEMINI_MODEL).
+    """
+    if not spec:
+        return [(GEMINI_API_KEY, GEMINI_MODEL_NAME)]
+    backends = []
+    for entry in spec.split(','):
+        key, _, model = entry.strip().partition('@')
+        if key:
+            backends.append((key, model or GEMINI_MODEL_NAME))
+    return backends
+
+
+def backend_label(api_key, model_name):
+    """Nom d'un fournisseur Gemini dans les métriques (fin de clé seulement)"""
+    return f"{model_name}/…{api_key[-4:]}" if api_key else model_name
+
+
+def provider_options(quota_name):
+    """Pool, disjoncteur et quota propres à un fournisseur"""
+    return {
+        'max_workers': LLM_MAX_CONCURRENCY,
+        'stream_chunk_timeout': LLM_STREAM_CHUNK_TIMEOUT,
+        'breaker': CircuitBreaker(
+            window_seconds=LLM_BREAKER_WINDOW_SECONDS,
+            min_calls=LLM_BREAKER_MIN_CALLS,
+            error_rate=LLM_BREAKER_ERROR_RATE,
+            slow_call_seconds=LLM_BREAKER_SLOW_CALL_SECONDS,
+            slow_call_rate=LLM_BREAKER_SLOW_CALL_RATE,
+            open_seconds=LLM_BREAKER_OPEN_SECONDS,
+            probe_timeout=LLM_BREAKER_PROBE_TIMEOUT_SECONDS
+        ) if LLM_BREAKER_ENABLED else None,
+        'limiter': RateLimiter(
+            path=LLM_RATE_LIMIT_STATE_PATH,
+            name=quota_name,
+            requests_per_minute=LLM_RATE_LIMIT_RPM,
+            tokens_per_minute=LLM_RATE_LIMIT_TPM,
+            max_wait_seconds=LLM_RATE_LIMIT_MAX_WAIT_SECONDS,
+            output_tokens=generation_config['max_output_tokens']
+        ) if LLM_RATE_LIMIT_RPM > 0 or LLM_RATE_LIMIT_TPM > 0 else None
     }
+
+
+def create_provider(name):
+    """
+    Instancie le fournisseur de génération configuré
     
-    for intent, keywords in intents.items():
-        if any(keyword in message_lower for keyword in keywords):
-            return intent
+    Avec plusieurs fournisseurs (GEMINI_BACKENDS, ou LOCAL_LLM_BACKENDS pour
+    le fournisseur local), un pool les répartit selon leur latence. Les
+    requêtes couvertes passent aussi par le pool, même à un seul fournisseur.
+    """
+    backends = []
+    if name == 'local':
+        seed = os.getenv('LOCAL_LLM_SEED')
+        latencies = os.getenv('LOCAL_LLM_BACKENDS') or os.getenv('LOCAL_LLM_LATENCY_MS', '800')
+        for position, latency_ms in enumerate(latencies.split(',')):
+            label = f"local-{position}"
+            backends.append(Backend(LocalProvider(
+                latency_ms=float(latency_ms),
+                distribution=os.getenv('LOCAL_LLM_LATENCY_DISTRIBUTION', 'lognormal'),
+                spread=float(os.getenv('LOCAL_LLM_LATENCY_SPREAD', 0.5)),
+                error_rate=float(os.getenv('LOCAL_LLM_ERROR_RATE', 0.0)),
+                seed=int(seed) + position if seed else None,
+                **provider_options(label)
+            ), label))
+    else:
+        if name != 'gemini':
+            print(f"⚠️ LLM_PROVIDER inconnu ({name}), utilisation de Gemini")
+        # Modèles construits paresseusement: l'import du SDK google n'est payé
+        # qu'au premier message qui en a besoin. Sans clé, le chatbot fonctionne
+        # en mode dégradé (réponses de secours uniquement).
+        for api_key, model_name in parse_gemini_backends(GEMINI_BACKENDS):
+            label = backend_label(api_key, model_name)
+            # Quota par projet (clé) et par modèle; la clé n'apparaît pas en clair
+            key_id = hashlib.sha1((api_key or '').encode()).hexdigest()[:8]
+            backends.append(Backend(GeminiProvider(
+                api_key=api_key,
+                model_name=model_name,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+                retry_seconds=GEMINI_INIT_RETRY_SECONDS,
+                **provider_options(f"gemini:{model_name}:{key_id}")
+            ), label))
     
-    return 'general'
+    hedge = None
+    if LLM_HEDGE_ENABLED:
+        hedge = HedgePolicy(
+            percentile=LLM_HEDGE_PERCENTILE,
+            min_delay=LLM_HEDGE_MIN_DELAY_SECONDS,
+            budget=LLM_HEDGE_BUDGET,
+            min_samples=LLM_HEDGE_MIN_SAMPLES
+        )
+    
+    if len(backends) == 1 and hedge is None:
+        return backends[0].provider
+    return BackendPool(
+        backends,
+        ewma_alpha=LLM_POOL_EWMA_ALPHA,
+        hedge=hedge,
+        max_workers=2 * LLM_MAX_CONCURRENCY
+    )
+
+
+provider = create_provider(LLM_PROVIDER)
+
+
+# Réponses de secours servies, par cause
+fallback_lock = threading.Lock()
+fallback_counts = {'timeout': 0, 'error': 0, 'degraded': 0, 'circuit_open': 0, 'rate_limited': 0}
+
+
+def serve_fallback(intent, reason):
+    """Compte et retourne la réponse de secours d'une intention"""
+    with fallback_lock:
+        fallback_counts[reason] += 1
+    return get_fallback_response(intent)
+
+
+def fallback_reason(error):
+    """Cause (compteur de fallback_counts) d'une erreur de génération, journalisée"""
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(error, RateLimited):
+        return 'rate_limited'
+    if isinstance(error, TimeoutError):
+        # DeadlineExceeded, ou attente d'un appel identique en cours
+        print(f"⏱️ Délai dépassé: {error}")
+        return 'timeout'
+    print(f"❌ Erreur Gemini: {error}")
+    return 'error'
+
+
+def is_degraded():
+    """Vrai si le fournisseur est indisponible (réponses de secours uniquement)"""
+    return provider.degraded()
+
+# ============================================
+# FILE DES MESSAGES (MODE JOB)
+# ============================================
+
+# POST /api/message en mode job: le message est déposé dans une file SQLite
+# et la réponse récupérée par GET /api/message/jobs/<id>; la génération est
+# faite par des workers dédiés (python chat_worker.py) et non par les
+# workers HTTP. off: désactivé; optional: sur demande du client
+# ("mode": "job"); always: tous les messages
+CHAT_JOB_MODE = os.getenv('CHAT_JOB_MODE', 'off').lower()
+CHAT_JOBS_PATH = os.getenv('CHAT_JOBS_PATH', 'database/chat_jobs.db')
+# Workers lancés dans le processus de l'application (0: processus séparé)
+CHAT_JOB_WORKERS_INPROCESS = int(os.getenv('CHAT_JOB_WORKERS_INPROCESS', 0))
+# Attente maximale d'une interrogation (long-polling) du résultat. 0 par
+# défaut: réponse immédiate avec l'état du travail, car une attente occupe
+# un worker HTTP synchrone; à augmenter avec des workers à threads ou ASGI
+CHAT_JOB_POLL_WAIT_SECONDS = float(os.getenv('CHAT_JOB_POLL_WAIT_SECONDS', 0))
+# Délai conseillé au client avant l'interrogation suivante (en-tête Retry-After)
+CHAT_JOB_RETRY_AFTER_SECONDS = int(os.getenv('CHAT_JOB_RETRY_AFTER_SECONDS', 1))
+
+chat_jobs = None
+if CHAT_JOB_MODE in ('optional', 'always'):
+    # Contre-pression: au-delà de CHAT_JOBS_MAX_PENDING, les dépôts sont refusés (503)
+    chat_jobs = JobQueue(
+        CHAT_JOBS_PATH,
+        max_pending=int(os.getenv('CHAT_JOBS_MAX_PENDING', 200)),
+        max_age_seconds=float(os.getenv('CHAT_JOBS_MAX_AGE_SECONDS', 60))
+    )
+
+# ============================================
+# FONCTIONS DE DÉTECTION D'INTENTION
+# ============================================
+
+def detect_intent(message):
+    """
+    Détecte l'intention de l'utilisateur
+
+    Classifieur local si disponible et suffisamment confiant, sinon règles
+    par mots-clés (voir services/intent_matcher.py)
+    """
+    if intent_classifier is not None:
+        intent = intent_classifier.classify(message, INTENT_CLASSIFIER_THRESHOLD)
+        if intent is not None:
+            return intent
+    return intent_matcher.match(message)
 
 # ============================================
 # FONCTION PRINCIPALE DE GÉNÉRATION
 # ============================================
 
-def generate_response(user_message, session_id='default', user_name=None):
+def build_catalog_context(user_message, intent):
+    """
+    Informations du catalogue utiles pour répondre au message
+    
+    Returns:
+        str: Bloc de contexte (vue d'ensemble + fiches les plus proches)
+    """
+    overview, snippets = catalog_index.search(user_message, intent, k=CATALOG_CONTEXT_TOP_K)
+    
+    lines = ["[Informations du catalogue:"]
+    if overview:
+        lines.append(f"Programmes:\n{overview}")
+    if snippets:
+        lines.append("Détails:\n" + "\n".join(f"- {snippet}" for snippet in snippets))
+    if intent in ('calendrier', 'preinscription'):
+        lines.append("Calendrier: " + "; ".join(f"{label}: {periode}" for label, periode in CALENDRIER_ACADEMIQUE))
+    lines[-1] += "]"
+    return "\n".join(lines)
+
+
+def build_prompt(user_message, intent, history=(), user_name=None):
+    """
+    Construit le prompt complet envoyé à Gemini
+    
+    Le prompt respecte un budget de PROMPT_MAX_TOKENS tokens: le message
+    de l'utilisateur est plafonné à PROMPT_MAX_USER_TOKENS, puis
+    l'historique occupe la place restante (messages tronqués, les plus
+    anciens abandonnés en premier).
+    
+    Args:
+        user_message (str): Message de l'utilisateur
+        intent (str): Intention détectée
+        history (list): Messages récents de la conversation
+        user_name (str): Nom de l'utilisateur si disponible
+    
+    Returns:
+        str: Prompt complet (prompt système inclus)
+    """
+    header = [build_catalog_context(user_message, intent)]
+    
+    # Ajouter le nom si disponible
+    if user_name:
+        header.append(f"[L'utilisateur s'appelle {user_name}]")
+    
+    # Ajouter l'intention détectée
+    header.append(f"[Intention détectée: {intent}]")
+    
+    # Ajouter le message actuel (plafonné: une lettre collée ne doit pas
+    # occuper tout le budget)
+    capped_message = truncate_to_tokens(user_message, PROMPT_MAX_USER_TOKENS)
+    footer = [f"\nUtilisateur: {capped_message}"]
+    
+    # Prompt d'enrichissement selon l'intention
+    enrichments = {
+        'preinscription': "\n[Guide l'utilisateur vers le formulaire de préinscription en ligne]",
+        'programmes': "\n[Donne des détails sur les programmes et propose de parler d'admission]",
+        'frais': "\n[Sois transparent sur les coûts et mentionne les facilités de paiement]",
+        'admission': "\n[Liste les documents requis et les conditions spécifiques]",
+        'salutation': "\n[Accueille chaleureusement et propose ton aide]"
+    }
+    
+    if intent in enrichments:
+        footer.append(enrichments[intent])
+    
+    # L'historique récent occupe le budget restant
+    history_parts = []
+    dropped = 0
+    if history:
+        used = estimate_tokens(SYSTEM_PROMPT) + sum(estimate_tokens(part) for part in header + footer)
+        turns, dropped = fit_history(history, PROMPT_MAX_TOKENS - used, PROMPT_HISTORY_TURN_TOKENS)
+        if turns:
+            history_text = "\n".join([
+                f"{'Utilisateur' if role == 'user' else 'Assistant'}: {content}"
+                for role, content in turns
+            ])
+            history_parts.append(f"\n[Historique récent:\n{history_text}]")
+    
+    prompt_stats.record_prompt(capped_message != user_message, dropped)
+    full_prompt = "\n".join(header + history_parts + footer)
+    
+    # Inclure le prompt système au début
+    return f"{SYSTEM_PROMPT}\n\n{full_prompt}"
+
+
+def prepare_turn(user_message, session_id, user_name=None):
+    """
+    Prépare un tour de conversation: contexte, intention et réponse sans modèle
+    
+    Deux niveaux sont consultés avant Gemini:
+    1. Les réponses déterministes du catalogue (frais, programmes, contact, calendrier)
+    2. Le cache des réponses, pour les messages sans historique
+    
+    Un message sans historique est « partageable »: sa réponse ne dépend que
+    de la question, elle peut donc être servie depuis le cache et y être
+    stockée. Le nom de l'utilisateur n'est alors pas inclus dans le prompt
+    pour que la réponse reste valable pour tous.
+    
+    Returns:
+        dict: intent, shareable, answer (ou None), source ('catalog', 'cache' ou None),
+              prompt et prompt_tokens (ou None)
+    """
+    context = conversation_context.get_context(session_id)
+    
+    # Détecter l'intention
+    intent = detect_intent(user_message)
+    conversation_context.set_intent(session_id, intent)
+    
+    history = context.recent_history(6)  # 3 échanges (user + bot)
+    shareable = not history
+    
+    turn = {
+        'intent': intent, 'shareable': shareable, 'answer': None, 'source': None,
+        'prompt': None, 'prompt_tokens': None, 'route': None
+    }
+    
+    if catalog_answers is not None:
+        turn['answer'] = catalog_answers.answer(intent, user_message, has_history=bool(history))
+        if turn['answer'] is not None:
+            turn['source'] = 'catalog'
+            return turn
+    
+    if shareable and response_cache is not None:
+        turn['answer'] = response_cache.get(user_message, intent)
+        if turn['answer'] is not None:
+            turn['source'] = 'cache'
+            return turn
+    
+    turn['prompt'] = build_prompt(
+        user_message,
+        intent,
+        history,
+        user_name=None if shareable else user_name
+    )
+    turn['prompt_tokens'] = estimate_tokens(turn['prompt'])
+    turn['route'] = model_router.route(intent, user_message)
+    return turn
+
+
+def complete_turn(user_message, session_id, turn, bot_response):
+    """Enregistre l'échange dans l'historique et alimente le cache"""
+    conversation_context.add_message(session_id, 'user', user_message)
+    conversation_context.add_message(session_id, 'assistant', bot_response)
+    
+    if turn['shareable'] and turn['source'] is None and response_cache is not None:
+        response_cache.put(user_message, turn['intent'], bot_response)
+
+
+def generate_response(user_message, session_id='default', user_name=None, deadline=None):
     """
     Génère une réponse avec Gemini en utilisant le contexte
     
@@ -227,72 +656,251 @@ def generate_response(user_message, session_id='default', user_name=None):
         user_message (str): Message de l'utilisateur
         session_id (str): ID de la session pour le contexte
         user_name (str): Nom de l'utilisateur si disponible
+        deadline (float): Échéance de la requête (time.monotonic); par défaut
+                          maintenant + CHAT_DEADLINE_SECONDS
     
     Returns:
-        str: Réponse générée
+        str: Réponse générée (ou réponse de secours si l'échéance est dépassée)
     """
+    if deadline is None:
+        deadline = new_deadline()
+    
+    intent = 'general'
     try:
-        # Récupérer le contexte
-        context = conversation_context.get_context(session_id)
-        
-        # Détecter l'intention
-        intent = detect_intent(user_message)
-        conversation_context.set_intent(session_id, intent)
+        turn = prepare_turn(user_message, session_id, user_name)
+        intent = turn['intent']
         
-        # Construire le prompt avec contexte
-        prompt_parts = []
+        if turn['answer'] is not None:
+            bot_response = turn['answer']
+        else:
+            if not provider.available():
+                return serve_fallback(intent, 'degraded')
+            
+            started = time.perf_counter()
+            
+            def call():
+                try:
+                    return provider.generate(
+                        turn['prompt'], intent,
+                        deadline=deadline,
+                        on_late=late_answer_handler(user_message, turn),
+                        options=model_router.options(turn['route'])
+                    )
+                except Exception:
+                    model_router.record(turn['route'], time.perf_counter() - started, ok=False)
+                    raise
+            
+            if turn['shareable'] and single_flight is not None:
+                # Même question déjà en cours: partager la réponse du premier appel
+                bot_response, shared = single_flight.do(
+                    (intent, normalize_text(user_message)), call,
+                    timeout=deadline - time.monotonic()
+                )
+            else:
+                bot_response, shared = call(), False
+            if not shared:
+                latency = time.perf_counter() - started
+                prompt_stats.record(turn['prompt_tokens'], latency)
+                model_router.record(turn['route'], latency, turn['prompt_tokens'], estimate_tokens(bot_response))
         
-        # Ajouter le nom si disponible
-        if user_name:
-            prompt_parts.append(f"[L'utilisateur s'appelle {user_name}]")
-        
-        # Ajouter l'intention détectée
-        prompt_parts.append(f"[Intention détectée: {intent}]")
-        
-        # Ajouter l'historique récent (3 derniers échanges)
-        if context['history']:
-            recent_history = context['history'][-6:]  # 3 échanges (user + bot)
-            history_text = "\n".join([
-                f"{'Utilisateur' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
-                for msg in recent_history
-            ])
-            prompt_parts.append(f"\n[Historique récent:\n{history_text}]")
-        
-        # Ajouter le message actuel
-        prompt_parts.append(f"\nUtilisateur: {user_message}")
+        # Sauvegarder dans l'historique
+        complete_turn(user_message, session_id, turn, bot_response)
         
-        # Prompt d'enrichissement selon l'intention
-        enrichments = {
-            'preinscription': "\n[Guide l'utilisateur vers le formulaire de préinscription en ligne]",
-            'programmes': "\n[Donne des détails sur les programmes et propose de parler d'admission]",
-            'frais': "\n[Sois transparent sur les coûts et mentionne les facilités de paiement]",
-            'admission': "\n[Liste les documents requis et les conditions spécifiques]",
-            'salutation': "\n[Accueille chaleureusement et propose ton aide]"
+        return bot_response
+    
+    except Exception as e:
+        return serve_fallback(intent, fallback_reason(e))
+
+
+class AsyncCallSlots:
+    """
+    Plafond des appels asynchrones au modèle en cours dans le processus
+    
+    L'attente d'une place compte dans l'échéance de la requête
+    (DeadlineExceeded si aucune place ne se libère à temps).
+    
+    Args:
+        limit (int): Appels simultanés au plus
+    """
+    
+    def __init__(self, limit):
+        self.limit = int(limit)
+        self.semaphore = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_in_flight = 0
+    
+    @contextlib.asynccontextmanager
+    async def slot(self, deadline):
+        if self.semaphore is None:
+            # Créé à la première requête, dans la boucle d'événements du worker
+            self.semaphore = asyncio.Semaphore(self.limit)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Aucune place libre pour l'appel au modèle avant l'échéance")
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+    
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'max_in_flight': self.max_in_flight,
         }
+
+
+async_calls = AsyncCallSlots(LLM_ASYNC_MAX_INFLIGHT)
+
+
+async def generate_response_async(user_message, session_id='default', user_name=None, deadline=None):
+    """
+    Version asynchrone de generate_response (chemin ASGI, voir asgi.py)
+    
+    Même pipeline (catalogue, cache, regroupement, routage, réponses de
+    secours); l'appel au modèle est attendu sans bloquer de thread et au
+    plus LLM_ASYNC_MAX_INFLIGHT appels sont en cours dans le processus.
+    
+    Returns:
+        str: Réponse générée (ou réponse de secours)
+    """
+    if deadline is None:
+        deadline = new_deadline()
+    
+    intent = 'general'
+    try:
+        # Contexte froid: rechargement de l'historique depuis la base
+        turn = await asyncio.to_thread(prepare_turn, user_message, session_id, user_name)
+        intent = turn['intent']
         
-        if intent in enrichments:
-            prompt_parts.append(enrichments[intent])
-        
-        full_prompt = "\n".join(prompt_parts)
-        
-        # Générer la réponse avec Gemini
-        # Inclure le prompt système au début
-        complete_prompt = f"{SYSTEM_PROMPT}\n\n{full_prompt}"
-        
-        # Utiliser l'API compatible avec version 0.3.2
-        response = model.generate_content(complete_prompt)
-        
-        bot_response = response.text.strip()
-        
-        # Sauvegarder dans l'historique
-        conversation_context.add_message(session_id, 'user', user_message)
-        conversation_context.add_message(session_id, 'assistant', bot_response)
+        if turn['answer'] is not None:
+            bot_response = turn['answer']
+        else:
+            if not await asyncio.to_thread(provider.available):
+                return serve_fallback(intent, 'degraded')
+            
+            started = time.perf_counter()
+            
+            async def call():
+                async with async_calls.slot(deadline):
+                    try:
+                        return await provider.agenerate(
+                            turn['prompt'], intent,
+                            deadline=deadline,
+                            options=model_router.options(turn['route'])
+                        )
+                    except Exception:
+                        model_router.record(turn['route'], time.perf_counter() - started, ok=False)
+                        raise
+            
+            if turn['shareable'] and single_flight is not None:
+                bot_response, shared = await single_flight.do_async(
+                    (intent, normalize_text(user_message)), call,
+                    timeout=deadline - time.monotonic()
+                )
+            else:
+                bot_response, shared = await call(), False
+            if not shared:
+                latency = time.perf_counter() - started
+                prompt_stats.record(turn['prompt_tokens'], latency)
+                model_router.record(turn['route'], latency, turn['prompt_tokens'], estimate_tokens(bot_response))
         
+        complete_turn(user_message, session_id, turn, bot_response)
         return bot_response
     
     except Exception as e:
-        print(f"❌ Erreur Gemini: {e}")
-        return get_fallback_response(intent)
+        return serve_fallback(intent, fallback_reason(e))
+
+
+def late_answer_handler(user_message, turn):
+    """
+    Sort d'une réponse arrivée après l'échéance
+    
+    L'utilisateur a déjà reçu la réponse de secours; une réponse partageable
+    alimente le cache pour les prochaines questions équivalentes, les autres
+    sont ignorées.
+    """
+    if not turn['shareable'] or response_cache is None:
+        return None
+    return lambda text: response_cache.put(user_message, turn['intent'], text.strip())
+
+
+def generate_response_stream(user_message, session_id='default', user_name=None, deadline=None):
+    """
+    Génère une réponse avec Gemini en streaming
+    
+    Les fragments sont produits au fur et à mesure de la génération, ce qui
+    réduit le temps avant le premier octet affiché à l'utilisateur.
+    
+    Args:
+        user_message (str): Message de l'utilisateur
+        session_id (str): ID de la session pour le contexte
+        user_name (str): Nom de l'utilisateur si disponible
+        deadline (float): Échéance du premier fragment (time.monotonic)
+    
+    Yields:
+        str: Fragments de la réponse générée
+    """
+    if deadline is None:
+        deadline = new_deadline()
+    
+    intent = 'general'
+    turn = None
+    chunks = []
+    try:
+        turn = prepare_turn(user_message, session_id, user_name)
+        intent = turn['intent']
+        
+        if turn['answer'] is not None:
+            chunks.append(turn['answer'])
+            yield turn['answer']
+        elif not provider.available():
+            # Mode dégradé: réponse de secours, jamais mise en cache
+            turn = None
+            fallback = serve_fallback(intent, 'degraded')
+            chunks.append(fallback)
+            yield fallback
+        else:
+            started = time.perf_counter()
+            try:
+                for text in provider.stream(turn['prompt'], intent, deadline=deadline,
+                                            options=model_router.options(turn['route'])):
+                    chunks.append(text)
+                    yield text
+            except Exception:
+                model_router.record(turn['route'], time.perf_counter() - started, ok=False)
+                raise
+            latency = time.perf_counter() - started
+            prompt_stats.record(turn['prompt_tokens'], latency)
+            model_router.record(turn['route'], latency, turn['prompt_tokens'], estimate_tokens("".join(chunks)))
+    
+    except Exception as e:
+        reason = fallback_reason(e)
+        # Si rien n'a encore été envoyé, basculer sur la réponse de secours
+        if not chunks:
+            fallback = serve_fallback(intent, reason)
+            chunks.append(fallback)
+            yield fallback
+        # Une réponse de secours ou tronquée ne doit pas être mise en cache
+        turn = None
+    
+    bot_response = "".join(chunks).strip()
+    
+    # Sauvegarder dans l'historique une fois le flux terminé
+    if turn is not None:
+        complete_turn(user_message, session_id, turn, bot_response)
+    else:
+        conversation_context.add_message(session_id, 'user', user_message)
+        conversation_context.add_message(session_id, 'assistant', bot_response)
 
 # ============================================
 # RÉPONSES DE SECOURS
@@ -301,6 +909,16 @@ def generate_response(user_message, session_id='default', user_name=None):
 def get_fallback_response(intent='general'):
     """Réponses de secours si Gemini n'est pas disponible"""
     
+    # Les intentions couvertes par le catalogue sont servies depuis la base,
+    # pour que les montants et contacts restent à jour
+    if catalog_answers is not None:
+        try:
+            catalog_response = catalog_answers.answer(intent, fallback=True)
+            if catalog_response:
+                return catalog_response
+        except Exception as e:
+            print(f"⚠️ Réponse catalogue indisponible: {e}")
+    
     fallback_responses = {
         'preinscription': "Je serais ravi de vous aider avec votre préinscription ! 🎓 Pour commencer, cliquez sur le bouton 'Préinscription' ci-dessus ou dites-moi quel programme vous intéresse (Licence ou Master).",
         
@@ -328,25 +946,65 @@ def get_fallback_response(intent='general'):
 
 def clear_context(session_id):
     """Efface le contexte d'une session"""
-    if session_id in conversation_context.conversations:
-        del conversation_context.conversations[session_id]
+    conversation_context.clear(session_id)
+
+def mark_context_synced(session_id, message_id, bot_response):
+    """Signale que la réponse du bot a été enregistrée dans la table messages"""
+    conversation_context.mark_synced(session_id, message_id, bot_response)
 
 def get_conversation_summary(session_id):
     """Obtient un résumé de la conversation"""
     context = conversation_context.get_context(session_id)
     return {
-        'message_count': len(context['history']),
-        'intent': context['intent'],
-        'user_info': context['user_info'],
-        'created_at': context['created_at']
+        'message_count': len(context.history),
+        'intent': context.intent,
+        'user_info': context.user_info,
+        'created_at': context.created_at
+    }
+
+def get_metrics():
+    """Métriques du service de chat pour ce worker"""
+    return {
+        'pid': os.getpid(),
+        'provider': provider.stats(),
+        'deadline_seconds': CHAT_DEADLINE_SECONDS,
+        'fallbacks': dict(fallback_counts),
+        'conversations': conversation_context.stats(),
+        'intent_classifier': intent_classifier.stats() if intent_classifier is not None else None,
+        'response_cache': response_cache.stats() if response_cache is not None else None,
+        'single_flight': single_flight.stats() if single_flight is not None else None,
+        'catalog_answers': catalog_answers.stats() if catalog_answers is not None else None,
+        'catalog_index': catalog_index.stats(),
+        'prompts': prompt_stats.stats(),
+        'model_routes': model_router.stats(),
+        'async_calls': async_calls.stats(),
+        'jobs': chat_jobs.stats() if chat_jobs is not None else None,
+        'db_pool': db_pool.stats(),
+        'message_writer': message_writer.stats() if message_writer is not None else None
     }
 
+def purge_response_cache(intent=None):
+    """
+    Vide le cache des réponses (toutes ou celles d'une intention)
+
+    Les autres workers écartent les réponses purgées à leur prochain accès.
+
+    Returns:
+        int: Réponses supprimées du cache de ce worker
+    """
+    if response_cache is None:
+        return 0
+    return response_cache.purge(intent)
+
 # ============================================
 # FONCTION DE TEST
 # ============================================
 
 def test_gemini():
     """Teste la connexion avec Gemini"""
+    if not provider.available():
+        print(f"❌ Fournisseur {provider.name} indisponible (mode dégradé)")
+        return False
     try:
         test_response = generate_response("Bonjour, je veux m'inscrire", "test_session")
         print("✅ Gemini fonctionne correctement!")
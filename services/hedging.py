@@ -0,0 +1,74 @@
+"""
+Requêtes couvertes (hedging) contre la latence de queue
+Si la réponse n'est pas arrivée au bout d'un percentile de la latence
+récente, une seconde requête identique part; la première réponse gagne.
+Le surcoût est plafonné par un budget (fraction des requêtes).
+"""
+
+import threading
+
+
+class HedgePolicy:
+    """
+    Délai de déclenchement et budget des requêtes couvertes
+
+    Args:
+        percentile (float): Percentile de la latence récente qui déclenche la couverture
+        min_delay (float): Délai minimal avant couverture (secondes)
+        budget (float): Fraction maximale des requêtes couvertes
+        min_samples (int): Latences mesurées nécessaires avant de couvrir
+    """
+
+    def __init__(self, percentile=95, min_delay=0.3, budget=0.1, min_samples=20):
+        self.percentile = float(percentile)
+        self.min_delay = float(min_delay)
+        self.budget = float(budget)
+        self.min_samples = int(min_samples)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def delay(self, tracker):
+        """
+        Délai avant couverture d'après les latences du `tracker`
+
+        Returns:
+            float | None: Secondes, None tant que les mesures sont insuffisantes
+        """
+        if tracker.sample_count() < self.min_samples:
+            return None
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def start(self):
+        """Compte une requête éligible (le budget grandit avec le trafic)"""
+        with self._lock:
+            self.requests += 1
+
+    def allow(self):
+        """Vrai si une requête couverte reste dans le budget; la compte"""
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                self.over_budget += 1
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        """La requête couverte a répondu la première"""
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'percentile': self.percentile,
+                'budget': self.budget,
+                'requests': self.requests,
+                'hedges': self.hedges,
+                'hedge_rate': round(self.hedges / self.requests, 4) if self.requests else None,
+                'hedge_wins': self.hedge_wins,
+                'win_rate': round(self.hedge_wins / self.hedges, 4) if self.hedges else None,
+                'over_budget': self.over_budget,
+            }
@@ -0,0 +1,246 @@
+"""
+Classifieur d'intention local (régression logistique multinomiale)
+Les messages sont projetés sur des n-grammes de caractères et des mots
+hachés; toutes les intentions sont scorées par un seul produit
+matrice-vecteur (NumPy). Les poids sont entraînés hors ligne à partir
+de la table messages (voir train_intent_classifier.py).
+"""
+
+import json
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+from .text_utils import normalize_text, ngram_indices
+
+# Exemples de référence: garantissent que chaque intention est représentée
+# même quand la table messages contient peu de questions étiquetées
+SEED_EXAMPLES = {
+    'preinscription': [
+        "Comment puis-je m'inscrire ?", "Je veux faire ma préinscription",
+        "Je souhaite postuler", "Comment déposer ma candidature ?",
+        "Je voudrais m'inscrire en licence", "Comment candidater en master ?",
+    ],
+    'programmes': [
+        "Quels sont les programmes disponibles ?", "Quelles filières proposez-vous ?",
+        "Quelles formations avez-vous en informatique ?", "Parlez-moi du master cloud computing",
+        "Vous avez une licence en cybersécurité ?", "Quelles spécialités en génie logiciel ?",
+    ],
+    'frais': [
+        "Quels sont les frais de scolarité ?", "Combien coûte la licence ?",
+        "C'est combien le master ?", "Quel est le prix de la formation ?",
+        "Comment payer les frais ?", "Le paiement peut se faire en plusieurs tranches ?",
+    ],
+    'admission': [
+        "Quelles sont les conditions d'admission ?", "Quels documents sont nécessaires ?",
+        "Quelles pièces fournir pour le dossier ?", "Quels sont les prérequis du master ?",
+        "Faut-il un bac C pour être admis ?", "Quels diplômes faut-il pour entrer en master ?",
+    ],
+    'calendrier': [
+        "Quel est le calendrier académique ?", "Quand commence la rentrée ?",
+        "Quelle est la date limite ?", "Jusqu'à quand peut-on s'inscrire ?",
+        "Quand sont les examens ?", "Quelle est la période de préinscription ?",
+    ],
+    'contact': [
+        "Comment vous contacter ?", "Quel est votre numéro de téléphone ?",
+        "Où se trouve l'université ?", "Quelle est votre adresse email ?",
+        "Où êtes-vous situés ?", "Je peux vous appeler ?",
+    ],
+    'salutation': [
+        "Bonjour", "Salut", "Bonsoir", "Hello", "Coucou", "Bonjour à vous",
+    ],
+    'aide': [
+        "J'ai besoin d'aide", "Pouvez-vous m'aider ?", "Je voudrais des informations",
+        "Je cherche des renseignements", "Aidez-moi s'il vous plaît", "Que pouvez-vous faire ?",
+    ],
+    # Hors sujet: le classifieur peut répondre 'general' au lieu de forcer
+    # une intention de préinscription
+    'general': [
+        "Quel temps fait-il aujourd'hui ?", "Raconte-moi une blague", "Qui a gagné le match hier ?",
+        "Quelle heure est-il ?", "Tu es un robot ?", "J'aime la musique",
+        "Quel est ton film préféré ?", "Donne-moi une recette de cuisine",
+    ],
+}
+
+
+def feature_vector(message, dim):
+    """
+    Vecteur L2-normalisé d'un message
+
+    Trigrammes de caractères (robustes aux fautes et aux flexions) et mots
+    entiers, hachés dans le même espace de `dim` composantes.
+    """
+    text = normalize_text(message)
+    indices = ngram_indices(text, dim)
+    indices.extend(zlib.crc32(f"#{word}".encode('utf-8')) % dim for word in text.split())
+    vector = np.bincount(indices, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def softmax(scores):
+    scores = scores - scores.max(axis=-1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class IntentClassifier:
+    """
+    Classifieur linéaire: probabilités = softmax(W·x + b)
+
+    Args:
+        intents (list): Noms des intentions (une ligne de W par intention)
+        weights (np.ndarray): Matrice (intentions x dim)
+        bias (np.ndarray): Biais par intention
+    """
+
+    def __init__(self, intents, weights, bias):
+        self.intents = list(intents)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.dim = self.weights.shape[1]
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+
+    # ------------------------------------------------------------
+    # Prédiction
+    # ------------------------------------------------------------
+
+    def probabilities(self, message):
+        """Probabilité de chaque intention ({intent: proba})"""
+        probs = softmax(self.weights @ feature_vector(message, self.dim) + self.bias)
+        return dict(zip(self.intents, probs.tolist()))
+
+    def predict(self, message):
+        """
+        Intention la plus probable
+
+        Returns:
+            tuple: (intent, confiance)
+        """
+        probs = softmax(self.weights @ feature_vector(message, self.dim) + self.bias)
+        best = int(probs.argmax())
+        return self.intents[best], float(probs[best])
+
+    def classify(self, message, threshold):
+        """
+        Intention prédite si la confiance atteint le seuil
+
+        Returns:
+            str | None: Intention, ou None pour se rabattre sur les mots-clés
+        """
+        intent, confidence = self.predict(message)
+        accepted = confidence >= threshold
+        with self._lock:
+            if accepted:
+                self.accepted += 1
+            else:
+                self.rejected += 1
+        return intent if accepted else None
+
+    def stats(self):
+        total = self.accepted + self.rejected
+        return {
+            'intents': self.intents,
+            'dim': self.dim,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'acceptance_rate': round(self.accepted / total, 3) if total else None
+        }
+
+    # ------------------------------------------------------------
+    # Entraînement et persistance
+    # ------------------------------------------------------------
+
+    @classmethod
+    def train(cls, texts, labels, dim=4096, epochs=300, learning_rate=2.0, l2=1e-4):
+        """
+        Entraîne les poids par descente de gradient (lot complet)
+
+        Args:
+            texts (list): Messages
+            labels (list): Intention de chaque message
+            dim (int): Taille de l'espace de hachage
+            epochs (int): Nombre de passes
+            learning_rate (float): Pas de gradient
+            l2 (float): Régularisation des poids
+        """
+        intents = sorted(set(labels))
+        index = {intent: i for i, intent in enumerate(intents)}
+        features = np.stack([feature_vector(text, dim) for text in texts])
+        targets = np.zeros((len(texts), len(intents)), dtype=np.float32)
+        targets[np.arange(len(texts)), [index[label] for label in labels]] = 1.0
+
+        weights = np.zeros((len(intents), dim), dtype=np.float32)
+        bias = np.zeros(len(intents), dtype=np.float32)
+        for _ in range(epochs):
+            probs = softmax(features @ weights.T + bias)
+            error = (probs - targets) / len(texts)
+            weights -= learning_rate * (error.T @ features + l2 * weights)
+            bias -= learning_rate * error.sum(axis=0)
+        return cls(intents, weights, bias)
+
+    def save(self, path):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias,
+                            intents=np.array(self.intents))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['intents'].tolist(), data['weights'], data['bias'])
+
+
+def label_from_metadata(metadata):
+    """Intention annotée dans la colonne metadata (JSON) d'un message"""
+    if not metadata:
+        return None
+    try:
+        return json.loads(metadata).get('intent')
+    except (ValueError, AttributeError):
+        return None
+
+
+def load_training_data(database, limit=50000):
+    """
+    Construit le jeu d'entraînement depuis la table messages
+
+    Seuls les messages utilisateurs dont l'intention est annotée dans
+    `metadata` sont retenus: étiqueter les autres avec les mots-clés ne
+    ferait que réapprendre les règles que le classifieur doit dépasser.
+    Les exemples de référence (SEED_EXAMPLES, dont la classe 'general' des
+    messages hors sujet) sont toujours ajoutés.
+
+    Returns:
+        tuple: (textes, étiquettes, nombre de messages issus de la base)
+    """
+    conn = sqlite3.connect(database)
+    try:
+        rows = conn.execute('''
+            SELECT contenu, metadata FROM messages
+            WHERE role = 'user' AND metadata IS NOT NULL
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (limit,)).fetchall()
+    finally:
+        conn.close()
+
+    texts, labels = [], []
+    for contenu, metadata in rows:
+        if not contenu or not contenu.strip():
+            continue
+        label = label_from_metadata(metadata)
+        if label is None:
+            continue
+        texts.append(contenu)
+        labels.append(label)
+
+    from_database = len(texts)
+    for intent, examples in SEED_EXAMPLES.items():
+        texts.extend(examples)
+        labels.extend([intent] * len(examples))
+    return texts, labels, from_database
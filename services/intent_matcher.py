@@ -0,0 +1,162 @@
+"""
+Détection d'intention par mots-clés compilés
+Une seule expression régulière (construite à l'import) parcourt le message
+une fois et attribue un score à chaque intention
+"""
+
+import re
+
+from .text_utils import fold_accents
+
+# Mots-clés par intention, sans accents. Un mot-clé est un radical
+# ("programme" reconnaît "programmes") sauf s'il figure dans EXACT_KEYWORDS.
+# L'ordre des intentions ne départage que les égalités de score: un message
+# à égalité reste ambigu (voir IntentMatcher.is_ambiguous).
+INTENT_KEYWORDS = {
+    'preinscription': ['preinscription', 'preinscrire', 'inscrire', 'inscription',
+                       'postuler', 'candidature', 'candidater'],
+    'programmes': ['programme', 'filiere', 'formation', 'licence', 'master', 'doctorat',
+                   'cursus', 'etude', 'specialite'],
+    'frais': ['frais', 'cout', 'prix', 'payer', 'paiement', 'combien', 'tarif', 'scolarite'],
+    'admission': ['admission', 'condition', 'requis', 'document', 'dossier', 'exigence',
+                  'prerequis', 'piece a fournir', 'pieces a fournir'],
+    'calendrier': ['date', 'dates', 'quand', 'rentree', 'calendrier', 'delai', 'inscription',
+                   'periode', 'cloture', 'date limite'],
+    'contact': ['contact', 'telephone', 'email', 'mail', 'adresse', 'localisation',
+                'ou se trouve', 'ou etes vous', 'situe'],
+    'salutation': ['bonjour', 'salut', 'bonsoir', 'hello', 'hey', 'coucou'],
+    'aide': ['aide', 'aider', 'comment', 'info', 'infos', 'information', 'renseigner', 'renseignement'],
+}
+
+# Mots-clés qui doivent correspondre à un mot entier
+EXACT_KEYWORDS = frozenset({'info', 'infos', 'hey', 'prix', 'mail', 'date', 'dates'})
+
+# Poids des mots-clés trop génériques pour trancher seuls: les niveaux et
+# noms de formation accompagnent presque toute question ("les frais de la
+# licence"), un terme précis (frais, date, dossier...) l'emporte sur eux
+KEYWORD_WEIGHTS = {
+    'comment': 0.5,
+    'licence': 0.3, 'master': 0.3, 'doctorat': 0.3,
+    'formation': 0.3, 'cursus': 0.3, 'etude': 0.3,
+}
+
+# Variantes accentuées acceptées pour chaque lettre: le message n'a pas
+# besoin d'être désaccentué avant la recherche
+ACCENT_CLASSES = {
+    'a': 'aàâä', 'c': 'cç', 'e': 'eéèêë', 'i': 'iîï', 'o': 'oôö', 'u': 'uùûü',
+}
+
+
+def trie_pattern(words):
+    """
+    Compile une liste de mots en expression régulière arborescente
+
+    Les préfixes communs sont factorisés ("pre(?:inscri(?:ption|re)|requis)"):
+    à chaque début de mot, le moteur écarte d'emblée les branches dont la
+    première lettre ne correspond pas au lieu d'essayer chaque mot-clé.
+    Chaque lettre accepte ses variantes accentuées (ACCENT_CLASSES).
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def atom(char):
+        variants = ACCENT_CLASSES.get(char)
+        return f"[{variants}]" if variants else re.escape(char)
+
+    def build(node):
+        branches = [atom(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            body = f"(?:{body})?" if len(branches) == 1 else body + '?'
+        return body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """
+    Automate de reconnaissance des intentions
+
+    Les mots-clés sont compilés en une expression arborescente unique;
+    `findall` parcourt le texte une seule fois et chaque mot-clé reconnu
+    crédite les intentions qui lui sont associées.
+
+    Args:
+        keywords (dict): Intention -> liste de mots-clés (sans accents)
+        exact (set): Mots-clés à reconnaître uniquement comme mots entiers
+        weights (dict): Poids par mot-clé (1.0 par défaut)
+    """
+
+    def __init__(self, keywords=None, exact=EXACT_KEYWORDS, weights=KEYWORD_WEIGHTS):
+        keywords = keywords or INTENT_KEYWORDS
+        self.priority = {intent: rank for rank, intent in enumerate(keywords)}
+        self.exact = frozenset(exact)
+
+        # Un même mot-clé peut servir plusieurs intentions ("inscription")
+        self._credits = {}
+        for intent, words in keywords.items():
+            for word in words:
+                word = fold_accents(word.lower())
+                weight = weights.get(word, 1.0)
+                self._credits.setdefault(word, []).append((intent, weight))
+
+        self.pattern = re.compile(r"\b(?P<kw>" + trie_pattern(self._credits) + r")(?P<tail>\w*)")
+
+    def totals(self, message):
+        """Score cumulé par intention (un seul parcours du texte)"""
+        totals = {}
+        # Traits d'union lus comme des espaces ("êtes-vous", "e-mail")
+        text = message.lower().replace('-', ' ')
+        for keyword, tail in self.pattern.findall(text):
+            if keyword not in self._credits:
+                keyword = fold_accents(keyword)
+            if tail and keyword in self.exact:
+                continue
+            for intent, weight in self._credits[keyword]:
+                totals[intent] = totals.get(intent, 0.0) + weight
+        return totals
+
+    def sort_key(self, item):
+        return (-item[1], self.priority[item[0]])
+
+    def scores(self, message):
+        """
+        Scores des intentions reconnues dans le message
+
+        Returns:
+            list: [(intent, score)] triés par score décroissant puis par priorité
+        """
+        return sorted(self.totals(message).items(), key=self.sort_key)
+
+    @staticmethod
+    def is_ambiguous(ranked):
+        """
+        Vrai si les deux meilleures intentions sont à égalité
+
+        match() retient alors la première dans l'ordre de INTENT_KEYWORDS:
+        ce choix n'est qu'une étiquette, un appelant qui répond sans le
+        modèle (réponses du catalogue) doit s'abstenir.
+
+        Args:
+            ranked (list): Résultat de scores()
+        """
+        return len(ranked) > 1 and ranked[0][1] == ranked[1][1]
+
+    def match(self, message):
+        """Intention la plus probable ('general' si aucun mot-clé)"""
+        best, best_key = 'general', None
+        for item in self.totals(message).items():
+            key = self.sort_key(item)
+            if best_key is None or key < best_key:
+                best, best_key = item[0], key
+        return best
+
+
+# Automate construit une seule fois à l'import
+intent_matcher = IntentMatcher()
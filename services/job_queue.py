@@ -0,0 +1,372 @@
+"""
+File de travaux durable (SQLite) et workers qui la vident
+Les requêtes HTTP déposent un travail et repartent aussitôt avec son
+identifiant; des workers dédiés (threads d'un processus séparé ou de
+l'application) l'exécutent et enregistrent le résultat, que le client
+récupère en interrogeant la file (long-polling). La longueur de la file
+sert de signal de contre-pression: au-delà d'un plafond, les dépôts sont
+refusés.
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# États d'un travail
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFull(RuntimeError):
+    """Dépôt refusé: trop de travaux en attente"""
+
+
+class JobQueue:
+    """
+    File de travaux partagée entre processus
+
+    Un worker réserve le plus ancien travail en attente pour `lease_seconds`;
+    un travail dont la réservation expire (worker arrêté en cours de route)
+    est repris, au plus `max_attempts` fois. Un travail resté en attente plus
+    de `max_age_seconds` est abandonné sans être exécuté: son client est
+    parti depuis longtemps. Les travaux terminés sont conservés
+    `retention_seconds` pour être récupérés.
+
+    Args:
+        path (str): Fichier SQLite de la file
+        max_pending (int): Travaux en attente ou en cours au plus
+        lease_seconds (float): Durée de réservation d'un travail par un worker
+        max_attempts (int): Exécutions au plus d'un même travail
+        max_age_seconds (float): Attente maximale d'un travail avant exécution
+        retention_seconds (float): Conservation des travaux terminés
+        poll_interval (float): Intervalle d'interrogation de la base pendant une attente
+    """
+
+    def __init__(self, path, max_pending=200, lease_seconds=120, max_attempts=2,
+                 max_age_seconds=60, retention_seconds=3600, poll_interval=0.2):
+        self.path = path
+        self.max_pending = int(max_pending)
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = int(max_attempts)
+        self.max_age_seconds = float(max_age_seconds)
+        self.retention_seconds = float(retention_seconds)
+        self.poll_interval = float(poll_interval)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Réveille les attentes du processus (dépôt, fin d'un travail)
+        self._changed = threading.Condition(self._lock)
+        self._waits = deque(maxlen=1000)
+        self.enqueued = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    lease_until REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+    def connect(self):
+        """Connexion SQLite du thread courant (transactions explicites)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def enqueue(self, payload):
+        """
+        Dépose un travail
+
+        Args:
+            payload (dict): Données du travail (sérialisables en JSON)
+
+        Returns:
+            tuple: (identifiant du travail, travaux en attente ou en cours)
+
+        Raises:
+            QueueFull: La file a atteint `max_pending`
+        """
+        conn = self.connect()
+        job_id = secrets.token_hex(16)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            depth = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+            if depth >= self.max_pending:
+                conn.execute("ROLLBACK")
+                with self._lock:
+                    self.rejected += 1
+                raise QueueFull(f"File pleine ({depth} travaux en attente)")
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload, ensure_ascii=False), time.time())
+            )
+            conn.execute("COMMIT")
+        except QueueFull:
+            raise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._changed:
+            self.enqueued += 1
+            self._changed.notify_all()
+        return job_id, depth + 1
+
+    def claim(self):
+        """
+        Réserve le plus ancien travail à exécuter
+
+        Returns:
+            tuple | None: (identifiant, payload, numéro de l'exécution), None
+                si la file est vide. Le numéro identifie la réservation: seul
+                ce worker peut enregistrer le résultat (complete/fail)
+        """
+        conn = self.connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Travaux trop anciens ou repris trop souvent: abandonnés
+            expired = conn.execute("""
+                UPDATE jobs SET status = ?, error = 'expired', finished_at = ?
+                WHERE (status = ? AND created_at < ?)
+                   OR (status = ? AND lease_until < ? AND attempts >= ?)
+            """, (FAILED, now, QUEUED, now - self.max_age_seconds,
+                  RUNNING, now, self.max_attempts)).rowcount
+            row = conn.execute("""
+                SELECT id, payload, created_at, attempts FROM jobs
+                WHERE status = ? OR (status = ? AND lease_until < ?)
+                ORDER BY created_at LIMIT 1
+            """, (QUEUED, RUNNING, now)).fetchone()
+            if row is not None:
+                conn.execute("""
+                    UPDATE jobs SET status = ?, attempts = attempts + 1,
+                                    started_at = ?, lease_until = ?
+                    WHERE id = ?
+                """, (RUNNING, now, now + self.lease_seconds, row['id']))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._changed:
+            self.expired += expired
+            if expired:
+                self._changed.notify_all()
+            if row is not None:
+                self._waits.append(max(0.0, now - row['created_at']))
+        if row is None:
+            return None
+        return row['id'], json.loads(row['payload']), row['attempts'] + 1
+
+    def finish(self, job_id, attempt, status, result=None, error=None):
+        """
+        Termine un travail, s'il est toujours réservé par cette exécution
+
+        Un travail abandonné (expiré) ou repris par un autre worker depuis sa
+        réservation n'est pas modifié.
+
+        Returns:
+            bool: Vrai si le résultat a été enregistré
+        """
+        conn = self.connect()
+        updated = conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL "
+            "WHERE id = ? AND status = ? AND attempts = ?",
+            (status, None if result is None else json.dumps(result, ensure_ascii=False),
+             error, time.time(), job_id, RUNNING, attempt)
+        ).rowcount
+        if not updated:
+            print(f"⚠️ Travail {job_id} repris ou abandonné entre-temps: résultat ignoré")
+            return False
+        with self._changed:
+            if status == DONE:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._changed.notify_all()
+        return True
+
+    def complete(self, job_id, attempt, result):
+        """Enregistre le résultat d'un travail"""
+        return self.finish(job_id, attempt, DONE, result=result)
+
+    def fail(self, job_id, attempt, error):
+        """Enregistre l'échec d'un travail"""
+        return self.finish(job_id, attempt, FAILED, error=str(error))
+
+    def get(self, job_id):
+        """
+        État d'un travail
+
+        Returns:
+            dict | None: status, payload, result, error, created_at, finished_at
+        """
+        row = self.connect().execute(
+            "SELECT status, payload, result, error, created_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def wait(self, job_id, timeout):
+        """
+        Attend la fin d'un travail (long-polling)
+
+        Les travaux terminés par ce processus réveillent l'attente aussitôt;
+        ceux des autres processus sont vus à l'interrogation suivante.
+
+        Returns:
+            dict | None: État du travail (terminé ou non à l'échéance)
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in (DONE, FAILED) or remaining <= 0:
+                return job
+            with self._changed:
+                self._changed.wait(min(self.poll_interval, remaining))
+
+    def wait_for_work(self, timeout):
+        """Attente d'un worker quand la file est vide"""
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def purge(self):
+        """Supprime les travaux terminés au-delà de la durée de conservation"""
+        return self.connect().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (DONE, FAILED, time.time() - self.retention_seconds)
+        ).rowcount
+
+    def depth(self):
+        """Travaux par état (toute la file, tous processus confondus)"""
+        rows = self.connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def stats(self):
+        with self._lock:
+            waits = np.array(self._waits, dtype=np.float64) * 1000
+            result = {
+                'max_pending': self.max_pending,
+                'enqueued': self.enqueued,
+                'rejected': self.rejected,
+                'completed': self.completed,
+                'failed': self.failed,
+                'expired': self.expired,
+            }
+        if len(waits):
+            result.update({
+                'avg_queue_wait_ms': round(float(waits.mean()), 1),
+                'p95_queue_wait_ms': round(float(np.percentile(waits, 95)), 1),
+            })
+        try:
+            result['depth'] = self.depth()
+        except sqlite3.Error as e:
+            result['depth'] = None
+            print(f"⚠️ Lecture de la file impossible: {e}")
+        return result
+
+
+class JobWorkers:
+    """
+    Threads qui vident une file de travaux
+
+    Args:
+        queue (JobQueue): File à vider
+        handler (callable): handler(payload) -> résultat (dict sérialisable)
+        threads (int): Travaux exécutés simultanément
+        idle_seconds (float): Attente quand la file est vide
+        purge_seconds (float): Intervalle de purge des travaux terminés
+    """
+
+    def __init__(self, queue, handler, threads=4, idle_seconds=0.2, purge_seconds=60):
+        self.queue = queue
+        self.handler = handler
+        self.threads = int(threads)
+        self.idle_seconds = float(idle_seconds)
+        self.purge_seconds = float(purge_seconds)
+        self._stop = threading.Event()
+        self._threads = []
+        self._last_purge = time.monotonic()
+
+    def start(self):
+        for index in range(self.threads):
+            thread = threading.Thread(target=self.run, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """Arrête les workers après leur travail en cours"""
+        self._stop.set()
+        self.queue.notify()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error as e:
+                print(f"⚠️ Réservation d'un travail impossible: {e}")
+                self._stop.wait(1)
+                continue
+            if job is None:
+                self.purge_if_due()
+                self.queue.wait_for_work(self.idle_seconds)
+                continue
+
+            job_id, payload, attempt = job
+            try:
+                result = self.handler(payload)
+            except Exception as e:
+                print(f"❌ Travail {job_id} en échec: {e}")
+                self.queue.fail(job_id, attempt, e)
+            else:
+                self.queue.complete(job_id, attempt, result)
+
+    def purge_if_due(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_seconds:
+            return
+        self._last_purge = now
+        try:
+            self.queue.purge()
+        except sqlite3.Error as e:
+            print(f"⚠️ Purge de la file impossible: {e}")
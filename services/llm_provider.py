@@ -0,0 +1,593 @@
+"""
+Fournisseurs de génération de texte (LLM)
+Interface commune autour de l'appel au modèle: Gemini en production, et un
+fournisseur local déterministe (réponses gabarits, latence et taux d'erreur
+configurables) pour les tests de charge et le travail hors ligne
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import numpy as np
+
+from .prompt_budget import estimate_tokens
+
+
+class DeadlineExceeded(TimeoutError):
+    """Le délai de la requête a expiré avant la réponse du fournisseur"""
+
+
+# Marqueur de fin d'un flux (next(iterator, END_OF_STREAM))
+END_OF_STREAM = object()
+
+
+class LatencyTracker:
+    """
+    Latences et erreurs récentes d'un fournisseur
+
+    Args:
+        window (int): Nombre d'appels récents conservés pour les percentiles
+    """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.late_answers = 0
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_late(self):
+        with self._lock:
+            self.late_answers += 1
+
+    def record(self, latency, ok=True):
+        with self._lock:
+            self.calls += 1
+            if ok:
+                self._latencies.append(latency)
+            else:
+                self.errors += 1
+
+    def sample_count(self):
+        with self._lock:
+            return len(self._latencies)
+
+    def percentile(self, q):
+        """Percentile `q` des latences récentes (secondes, None si aucune)"""
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64)
+        return float(np.percentile(latencies, q)) if len(latencies) else None
+
+    def stats(self):
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64) * 1000
+            calls, errors = self.calls, self.errors
+            timeouts, late_answers = self.timeouts, self.late_answers
+        result = {
+            'calls': calls,
+            'errors': errors,
+            'error_rate': round(errors / calls, 4) if calls else None,
+            'timeouts': timeouts,
+            'late_answers': late_answers,
+        }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            result.update({
+                'avg_latency_ms': round(float(latencies.mean()), 1),
+                'p50_latency_ms': round(float(p50), 1),
+                'p95_latency_ms': round(float(p95), 1),
+                'p99_latency_ms': round(float(p99), 1),
+            })
+        return result
+
+
+class LLMProvider:
+    """
+    Interface d'un fournisseur de génération
+
+    Les sous-classes implémentent `_generate` et `_stream`; les appels
+    publics mesurent la latence et comptent les erreurs. Avec une échéance
+    (`deadline`, horloge time.monotonic), l'appel s'exécute dans le pool
+    du fournisseur et DeadlineExceeded est levée dès qu'elle est dépassée:
+    le worker HTTP n'attend jamais un modèle lent au-delà du délai.
+
+    Avec un disjoncteur (`breaker`), chaque appel lui est soumis avant de
+    partir (CircuitOpenError s'il est ouvert) et son résultat lui est
+    rapporté; un dépassement de délai compte comme un échec. Avec un
+    limiteur de débit (`limiter`), l'appel attend d'abord son tour dans le
+    quota du fournisseur (RateLimited si l'attente serait trop longue).
+
+    Args:
+        max_workers (int): Appels simultanés au modèle (taille du pool)
+        stream_chunk_timeout (float): Attente maximale entre deux fragments
+        breaker (CircuitBreaker): Disjoncteur partagé par les threads du worker
+        limiter (RateLimiter): Quota par minute partagé par les workers
+    """
+
+    name = 'base'
+
+    def __init__(self, max_workers=16, stream_chunk_timeout=10, breaker=None, limiter=None):
+        self.tracker = LatencyTracker()
+        self.breaker = breaker
+        self.limiter = limiter
+        self.stream_chunk_timeout = float(stream_chunk_timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"llm-{self.name}")
+
+    def available(self):
+        """Vrai si le fournisseur peut être appelé (sinon: réponses de secours)"""
+        return True
+
+    def degraded(self):
+        """Vrai si le fournisseur est connu pour être hors service (sans l'initialiser)"""
+        return False
+
+    def timed_generate(self, prompt, intent, options=None):
+        started = time.perf_counter()
+        try:
+            text = self._generate(prompt, intent, options or {})
+        except Exception:
+            self.tracker.record(time.perf_counter() - started, ok=False)
+            raise
+        self.tracker.record(time.perf_counter() - started)
+        return text
+
+    def wait(self, future, timeout):
+        """Résultat d'un appel soumis au pool, ou DeadlineExceeded"""
+        try:
+            return future.result(timeout=max(0.0, timeout))
+        except FutureTimeout:
+            self.tracker.record_timeout()
+            raise DeadlineExceeded(f"{self.name}: pas de réponse en {timeout:.2f} s")
+
+    def admit(self, prompt, deadline, options=None):
+        """
+        Disjoncteur puis attente du quota, avant le départ d'un appel
+
+        Un appel refusé par le disjoncteur ne consomme pas de quota; un appel
+        refusé faute de quota rend son autorisation au disjoncteur.
+
+        Returns:
+            Permit | None: Autorisation du disjoncteur, à rendre à report()
+        """
+        permit = self.breaker.check() if self.breaker is not None else None
+        if self.limiter is not None:
+            try:
+                self.limiter.acquire(estimate_tokens(prompt), deadline,
+                                     output_tokens=(options or {}).get('max_output_tokens'))
+            except BaseException:
+                self.release(permit)
+                raise
+        return permit
+
+    def generate(self, prompt, intent='general', deadline=None, on_late=None, options=None):
+        """
+        Génère une réponse complète
+
+        Args:
+            prompt (str): Prompt complet
+            intent (str): Intention détectée
+            deadline (float): Échéance (time.monotonic), None = sans limite
+            on_late (callable): Reçoit la réponse arrivée après l'échéance
+            options (dict): Paramètres de la route (model, max_output_tokens,
+                            temperature); None = configuration du fournisseur
+        """
+        permit = self.admit(prompt, deadline, options)
+
+        started = time.perf_counter()
+        try:
+            if deadline is None:
+                text = self.timed_generate(prompt, intent, options)
+            else:
+                text = self.generate_before(deadline, prompt, intent, on_late, options)
+        except Exception:
+            self.report(started, ok=False, permit=permit)
+            raise
+        self.report(started, permit=permit)
+        return text
+
+    def generate_before(self, deadline, prompt, intent, on_late, options):
+        future = self._executor.submit(self.timed_generate, prompt, intent, options)
+        try:
+            return self.wait(future, deadline - time.monotonic())
+        except DeadlineExceeded:
+            # Appel pas encore démarré: annulé. Sinon la réponse tardive est
+            # transmise à on_late (ou ignorée).
+            if not future.cancel() and on_late is not None:
+                future.add_done_callback(lambda done: self.deliver_late(done, on_late))
+            raise
+
+    def report(self, started, ok=True, permit=None):
+        """Rapporte le résultat d'un appel au disjoncteur"""
+        if self.breaker is not None:
+            self.breaker.record(time.perf_counter() - started, ok, permit)
+
+    def release(self, permit):
+        """Rend au disjoncteur l'autorisation d'un appel annulé (ni succès ni échec)"""
+        if self.breaker is not None:
+            self.breaker.release(permit)
+
+    def deliver_late(self, future, on_late):
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.tracker.record_late()
+        try:
+            on_late(future.result())
+        except Exception as e:
+            print(f"⚠️ Réponse tardive non exploitée: {e}")
+
+    def stream(self, prompt, intent='general', deadline=None, options=None):
+        """
+        Génère une réponse fragment par fragment
+
+        Avec une échéance, le premier fragment doit arriver avant elle, puis
+        chaque fragment suivant dans les `stream_chunk_timeout` secondes.
+        """
+        permit = self.admit(prompt, deadline, options)
+
+        started = time.perf_counter()
+        iterator = self._stream(prompt, intent, options or {})
+        first = True
+        failed = False
+        try:
+            while True:
+                if deadline is None:
+                    text = next(iterator, END_OF_STREAM)
+                else:
+                    timeout = deadline - time.monotonic() if first else self.stream_chunk_timeout
+                    text = self.wait(self._executor.submit(next, iterator, END_OF_STREAM), timeout)
+                if text is END_OF_STREAM:
+                    break
+                first = False
+                yield text
+        except DeadlineExceeded:
+            failed = True
+            raise
+        except Exception:
+            failed = True
+            self.tracker.record(time.perf_counter() - started, ok=False)
+            raise
+        finally:
+            # Flux abandonné par le client (GeneratorExit): pas un échec du fournisseur
+            self.report(started, ok=not failed, permit=permit)
+        self.tracker.record(time.perf_counter() - started)
+
+    async def agenerate(self, prompt, intent='general', deadline=None, options=None):
+        """
+        Version asynchrone de `generate` (chemin ASGI)
+
+        Aucun thread n'attend le modèle: l'échéance est appliquée par
+        asyncio.wait_for, qui annule l'appel (pas de réponse tardive).
+        """
+        if self.limiter is not None:
+            # L'attente du quota bloque: hors de la boucle d'événements. Si la
+            # tâche est annulée pendant l'attente, l'autorisation obtenue
+            # ensuite par le thread est rendue
+            admitting = asyncio.ensure_future(asyncio.to_thread(self.admit, prompt, deadline, options))
+            try:
+                permit = await asyncio.shield(admitting)
+            except asyncio.CancelledError:
+                admitting.add_done_callback(
+                    lambda done: self.release(done.result())
+                    if not done.cancelled() and done.exception() is None else None
+                )
+                raise
+        else:
+            permit = self.admit(prompt, deadline, options)
+
+        started = time.perf_counter()
+        try:
+            call = self._agenerate(prompt, intent, options or {})
+            if deadline is None:
+                text = await call
+            else:
+                timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    text = await asyncio.wait_for(call, timeout)
+                except asyncio.TimeoutError:
+                    self.tracker.record_timeout()
+                    raise DeadlineExceeded(f"{self.name}: pas de réponse en {timeout:.2f} s")
+        except DeadlineExceeded:
+            self.report(started, ok=False, permit=permit)
+            raise
+        except Exception:
+            self.tracker.record(time.perf_counter() - started, ok=False)
+            self.report(started, ok=False, permit=permit)
+            raise
+        except BaseException:
+            # Tâche annulée (asyncio.CancelledError): pas un échec du
+            # fournisseur, mais un essai semi-ouvert ne doit pas rester pris
+            self.release(permit)
+            raise
+        self.tracker.record(time.perf_counter() - started)
+        self.report(started, permit=permit)
+        return text
+
+    def _generate(self, prompt, intent, options):
+        raise NotImplementedError
+
+    async def _agenerate(self, prompt, intent, options):
+        # Par défaut: l'appel synchrone dans le pool du fournisseur
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._generate, prompt, intent, options)
+
+    def _stream(self, prompt, intent, options):
+        yield self._generate(prompt, intent, options)
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'available': self.available(),
+            **self.tracker.stats(),
+            'breaker': self.breaker.stats() if self.breaker is not None else None,
+            'rate_limiter': self.limiter.stats() if self.limiter is not None else None
+        }
+
+
+# ============================================
+# GEMINI
+# ============================================
+
+class GeminiProvider(LLMProvider):
+    """
+    Fournisseur Google Gemini, construit paresseusement
+
+    Le SDK google (plusieurs centaines de ms à importer) n'est chargé qu'au
+    premier appel. Sans clé, ou après un échec d'initialisation, le
+    fournisseur est indisponible; un nouvel essai a lieu après
+    `retry_seconds`.
+
+    Args:
+        api_key (str): Clé API Gemini (None: mode dégradé)
+        model_name (str): Nom du modèle
+        generation_config (dict): Paramètres de génération
+        safety_settings (list): Filtres de sécurité
+        retry_seconds (float): Délai avant un nouvel essai d'initialisation
+    """
+
+    name = 'gemini'
+
+    def __init__(self, api_key, model_name, generation_config=None, safety_settings=None,
+                 retry_seconds=60, **kwargs):
+        super().__init__(**kwargs)
+        self.api_key = api_key
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.safety_settings = safety_settings
+        self.retry_seconds = float(retry_seconds)
+        self._model = None
+        self._models = {}
+        self._genai = None
+        self._lock = threading.Lock()
+        self.status = {
+            'status': 'lazy' if api_key else 'degraded',
+            'model_name': model_name,
+            'sdk_import_ms': None,
+            'init_ms': None,
+            'error': None if api_key else 'GEMINI_API_KEY non configurée',
+        }
+        self._failed_at = None
+
+    def get_model(self):
+        """
+        Modèle Gemini, construit au premier appel
+
+        Returns:
+            GenerativeModel | None: Modèle, ou None en mode dégradé
+        """
+        if self._model is not None or not self.api_key:
+            return self._model
+
+        with self._lock:
+            failed_at = self._failed_at
+            if self._model is None and (failed_at is None or time.monotonic() - failed_at >= self.retry_seconds):
+                self.init_model()
+        return self._model
+
+    def init_model(self):
+        """Importe le SDK, configure la clé et construit le modèle (mesures incluses)"""
+        started = time.perf_counter()
+        try:
+            import google.generativeai as genai
+            imported = time.perf_counter()
+
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+            self._model = genai.GenerativeModel(
+                model_name=self.model_name,
+                generation_config=self.generation_config,
+                safety_settings=self.safety_settings
+            )
+            self._failed_at = None
+            self.status.update({
+                'status': 'ready',
+                'sdk_import_ms': round((imported - started) * 1000, 1),
+                'init_ms': round((time.perf_counter() - started) * 1000, 1),
+                'error': None,
+            })
+            print(f"🤖 Modèle Gemini initialisé en {self.status['init_ms']} ms "
+                  f"(import du SDK: {self.status['sdk_import_ms']} ms)")
+        except Exception as e:
+            self._failed_at = time.monotonic()
+            self.status.update({'status': 'degraded', 'error': str(e)})
+            print(f"❌ Initialisation de Gemini impossible: {e}")
+
+    def available(self):
+        return self.get_model() is not None
+
+    def degraded(self):
+        return self.status['status'] == 'degraded'
+
+    def model_for(self, options):
+        """
+        Modèle et paramètres de génération d'un appel
+
+        Un modèle différent de celui du fournisseur (route) est construit au
+        premier usage avec la même clé, puis réutilisé.
+        """
+        model = self.get_model()
+        model_name = options.get('model')
+        if model_name and model_name != self.model_name:
+            with self._lock:
+                if model_name not in self._models:
+                    self._models[model_name] = self._genai.GenerativeModel(
+                        model_name=model_name,
+                        generation_config=self.generation_config,
+                        safety_settings=self.safety_settings
+                    )
+                model = self._models[model_name]
+
+        # Le SDK fusionne ces valeurs avec la configuration du modèle
+        overrides = {key: options[key] for key in ('max_output_tokens', 'temperature')
+                     if options.get(key) is not None}
+        return model, overrides or None
+
+    def _generate(self, prompt, intent, options):
+        # Utiliser l'API compatible avec version 0.3.2
+        model, config = self.model_for(options)
+        response = model.generate_content(prompt, generation_config=config)
+        return response.text.strip()
+
+    async def _agenerate(self, prompt, intent, options):
+        if self._model is None:
+            # Première initialisation (import du SDK) hors de la boucle d'événements
+            await asyncio.to_thread(self.get_model)
+        model, config = self.model_for(options)
+        response = await model.generate_content_async(prompt, generation_config=config)
+        return response.text.strip()
+
+    def _stream(self, prompt, intent, options):
+        model, config = self.model_for(options)
+        response = model.generate_content(prompt, generation_config=config, stream=True)
+        for chunk in response:
+            text = chunk.text
+            if text:
+                yield text
+
+    def stats(self):
+        # Pas d'initialisation déclenchée par la lecture des métriques
+        return {
+            'name': self.name,
+            'available': self._model is not None,
+            **self.status,
+            **self.tracker.stats(),
+            'breaker': self.breaker.stats() if self.breaker is not None else None,
+            'rate_limiter': self.limiter.stats() if self.limiter is not None else None
+        }
+
+
+# ============================================
+# FOURNISSEUR LOCAL (TESTS DE CHARGE, HORS LIGNE)
+# ============================================
+
+LOCAL_TEMPLATES = {
+    'preinscription': "📝 Pour vous préinscrire, remplissez le formulaire de préinscription en ligne "
+                      "et joignez vos documents. Quel programme vous intéresse ?",
+    'programmes': "🎓 Nous proposons des Licences et des Masters en informatique. "
+                  "Souhaitez-vous le détail d'une filière ?",
+    'frais': "💰 Les frais comprennent l'inscription et la scolarité annuelle; "
+             "des facilités de paiement existent. Pour quelle filière ?",
+    'admission': "📋 L'admission se fait sur dossier (diplôme, relevés de notes, pièces d'identité). "
+                 "Voulez-vous la liste complète ?",
+    'calendrier': "📅 Les préinscriptions ont lieu de juillet à septembre, la rentrée en octobre.",
+    'contact': "📞 Le service des admissions est joignable par email et par téléphone.",
+    'salutation': "Bonjour ! 👋 Comment puis-je vous aider dans votre préinscription ?",
+    'aide': "🤝 Je peux vous renseigner sur les programmes, l'admission, les frais et les dates.",
+}
+
+LOCAL_DEFAULT_TEMPLATE = "🎓 Je suis l'assistant de préinscription d'ICT University. Comment puis-je vous aider ?"
+
+
+class LocalProvider(LLMProvider):
+    """
+    Fournisseur local déterministe
+
+    Répond par des gabarits selon l'intention, après une latence tirée d'une
+    distribution configurable, et échoue avec une probabilité donnée.
+
+    Args:
+        latency_ms (float): Latence médiane (ms)
+        distribution (str): 'constant', 'uniform', 'exponential' ou 'lognormal'
+        spread (float): Dispersion (uniform: ±fraction, lognormal: sigma)
+        error_rate (float): Probabilité d'échec d'un appel
+        seed (int): Graine du générateur (reproductibilité)
+        chunk_words (int): Mots par fragment en streaming
+    """
+
+    name = 'local'
+    DISTRIBUTIONS = ('constant', 'uniform', 'exponential', 'lognormal')
+
+    def __init__(self, latency_ms=800, distribution='lognormal', spread=0.5,
+                 error_rate=0.0, seed=None, chunk_words=4, **kwargs):
+        super().__init__(**kwargs)
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Distribution de latence inconnue: {distribution}")
+        self.latency_ms = float(latency_ms)
+        self.distribution = distribution
+        self.spread = float(spread)
+        self.error_rate = float(error_rate)
+        self.chunk_words = max(1, int(chunk_words))
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def sample_latency(self):
+        """Latence (secondes) d'un appel"""
+        median = self.latency_ms / 1000
+        with self._random_lock:
+            if self.distribution == 'uniform':
+                value = self._random.uniform(median * (1 - self.spread), median * (1 + self.spread))
+            elif self.distribution == 'exponential':
+                value = self._random.expovariate(1 / median) if median > 0 else 0.0
+            elif self.distribution == 'lognormal':
+                value = median * self._random.lognormvariate(0, self.spread)
+            else:
+                value = median
+            failed = self._random.random() < self.error_rate
+        return max(0.0, value), failed
+
+    def render(self, intent):
+        return LOCAL_TEMPLATES.get(intent, LOCAL_DEFAULT_TEMPLATE)
+
+    def _generate(self, prompt, intent, options):
+        latency, failed = self.sample_latency()
+        time.sleep(latency)
+        if failed:
+            raise RuntimeError("Erreur simulée du fournisseur local")
+        return self.render(intent)
+
+    async def _agenerate(self, prompt, intent, options):
+        latency, failed = self.sample_latency()
+        await asyncio.sleep(latency)
+        if failed:
+            raise RuntimeError("Erreur simulée du fournisseur local")
+        return self.render(intent)
+
+    def _stream(self, prompt, intent, options):
+        latency, failed = self.sample_latency()
+        words = self.render(intent).split(' ')
+        chunks = [' '.join(words[i:i + self.chunk_words]) + ' '
+                  for i in range(0, len(words), self.chunk_words)]
+        # Premier fragment après ~la moitié de la latence, le reste réparti
+        time.sleep(latency / 2)
+        if failed:
+            raise RuntimeError("Erreur simulée du fournisseur local")
+        for chunk in chunks:
+            yield chunk
+            time.sleep(latency / 2 / len(chunks))
+
+    def stats(self):
+        return {
+            **super().stats(),
+            'latency_ms': self.latency_ms,
+            'distribution': self.distribution,
+            'spread': self.spread,
+            'configured_error_rate': self.error_rate,
+        }
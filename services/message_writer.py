@@ -0,0 +1,295 @@
+"""
+Écriture différée (write-behind) des messages du chat
+Un thread par worker regroupe les insertions de messages et les mises à
+jour d'activité des sessions en une transaction toutes les quelques
+millisecondes (ou tous les N écritures): un seul commit pour plusieurs tours
+de chat, et moins d'attente sur le verrou d'écriture aux heures de pointe
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Écritures en attente
+SESSION = 'session'
+MESSAGE = 'message'
+TOUCH = 'touch'
+
+
+class MessageWriter:
+    """
+    File d'écriture des messages et thread qui la vide par lots
+
+    Les écritures sont appliquées dans l'ordre de dépôt (le message de
+    l'utilisateur précède la réponse du bot). Dans un lot, les sessions sont
+    créées en premier et les mises à jour de last_activity d'une même session
+    sont fusionnées. Quand la file est pleine, le dépôt attend qu'elle se
+    vide (contre-pression), au plus `put_timeout` secondes.
+
+    Durabilité: une écriture déposée est en base après au plus
+    `flush_interval` secondes; `flush()` attend que tout ce qui a été déposé
+    soit enregistré, et la file est vidée à l'arrêt normal du processus.
+    Un arrêt brutal (SIGKILL, coupure) perd les écritures encore en file.
+
+    Args:
+        connect (callable): Ouvre la connexion du thread d'écriture
+        max_batch (int): Écritures au plus par transaction
+        flush_interval (float): Attente maximale d'une écriture avant son commit (secondes)
+        max_queue (int): Écritures en attente au plus
+        put_timeout (float): Attente maximale d'un dépôt quand la file est pleine
+    """
+
+    def __init__(self, connect, max_batch=200, flush_interval=0.005, max_queue=10000, put_timeout=5):
+        self.connect = connect
+        self.max_batch = int(max_batch)
+        self.flush_interval = float(flush_interval)
+        self.put_timeout = float(put_timeout)
+        self._queue = queue.Queue(maxsize=int(max_queue))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._batches = deque(maxlen=1000)
+        self.written = 0
+        self.batches = 0
+        self.blocked_puts = 0
+        self.errors = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.restarts = 0
+        atexit.register(self.close)
+
+    def is_running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def ensure_started(self):
+        # Démarré au premier dépôt, dans le processus qui écrit (après le fork
+        # des workers), et redémarré si le thread s'est arrêté
+        if self.is_running():
+            return
+        with self._lock:
+            if self.is_running():
+                return
+            if self._thread is not None and self._pid == os.getpid():
+                self.restarts += 1
+                print("⚠️ Thread d'écriture des messages arrêté, redémarrage")
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self.run, name="message-writer", daemon=True)
+            self._thread.start()
+
+    def put(self, item):
+        self.ensure_started()
+        try:
+            self._queue.put_nowait(item)
+            return
+        except queue.Full:
+            with self._lock:
+                self.blocked_puts += 1
+        # Contre-pression: le dépôt attend la place libérée par le thread d'écriture
+        self._queue.put(item, timeout=self.put_timeout)
+
+    def add_session(self, session_id, user_id):
+        """Crée la session de chat si elle n'existe pas"""
+        self.put((SESSION, session_id, user_id))
+
+    def add_message(self, session_id, user_id, role, content, on_saved=None):
+        """
+        Dépose un message
+
+        Args:
+            on_saved (callable): on_saved(message_id), appelé après le commit
+        """
+        self.put((MESSAGE, session_id, user_id, role, content, on_saved))
+
+    def touch_session(self, session_id):
+        """Met à jour last_activity de la session (fusionné dans le lot)"""
+        self.put((TOUCH, session_id))
+
+    def flush(self, timeout=None):
+        """
+        Attend que les écritures déjà déposées soient enregistrées
+
+        Returns:
+            bool: Vrai si tout est enregistré avant `timeout`
+        """
+        if not self.is_running():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        """Enregistre les écritures en attente et arrête le thread (arrêt du processus)"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.flush(timeout):
+            return
+        print(f"⚠️ Écritures de messages non enregistrées à l'arrêt: {self._queue.qsize()}")
+
+    def run(self):
+        """
+        Boucle du thread d'écriture
+
+        Une erreur hors des écritures elles-mêmes (ouverture de la connexion,
+        rollback impossible) abandonne le lot en cours et la connexion, rouverte
+        au lot suivant: le thread ne s'arrête pas et la file continue de se vider.
+        """
+        conn = None
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            barriers = [item for item in batch if isinstance(item, threading.Event)]
+            writes = [item for item in batch if not isinstance(item, threading.Event)]
+            try:
+                if writes:
+                    if conn is None:
+                        conn = self.connect()
+                    self.write(conn, writes)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    self.dropped += len(writes)
+                print(f"❌ Lot de {len(writes)} écritures abandonné, reconnexion: {e}")
+                conn = self.reconnect(conn)
+            finally:
+                for done in barriers:
+                    done.set()
+
+    def reconnect(self, conn):
+        """Ferme une connexion inutilisable (rouverte au lot suivant)"""
+        if conn is not None:
+            try:
+                # Connexion du pool ouverte hors emprunt: discard() la ferme réellement
+                getattr(conn, 'discard', conn.close)()
+            except Exception as e:
+                print(f"⚠️ Fermeture de la connexion d'écriture impossible: {e}")
+        with self._lock:
+            self.reconnects += 1
+        return None
+
+    def write(self, conn, writes):
+        """
+        Applique un lot d'écritures en une transaction
+
+        Un nouvel essai du lot en cas d'échec (verrou passager), puis écriture
+        ligne par ligne: une ligne refusée (clé étrangère, contrainte)
+        n'emporte pas les messages des autres utilisateurs du lot.
+        """
+        started = time.perf_counter()
+        failed = 0
+        for attempt in (1, 2):
+            try:
+                saved = self.apply(conn, writes)
+                break
+            except Exception as e:
+                conn.rollback()
+                if attempt == 2:
+                    with self._lock:
+                        self.errors += 1
+                    print(f"⚠️ Lot de {len(writes)} écritures en échec, écriture ligne par ligne: {e}")
+                    saved, failed = self.write_each(conn, writes)
+                    break
+                print(f"⚠️ Écriture des messages en échec, nouvel essai: {e}")
+                time.sleep(0.1)
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.batches += 1
+            self.written += len(writes) - failed
+            self._batches.append((len(writes), elapsed))
+
+        for on_saved, message_id in saved:
+            try:
+                on_saved(message_id)
+            except Exception as e:
+                print(f"⚠️ Suite d'écriture en échec: {e}")
+
+    def write_each(self, conn, writes):
+        """
+        Applique les écritures une par une (une transaction chacune)
+
+        Returns:
+            tuple: (suites d'écriture à appeler, nombre d'écritures abandonnées)
+        """
+        saved = []
+        failed = 0
+        for item in writes:
+            try:
+                saved.extend(self.apply(conn, [item]))
+            except Exception as e:
+                conn.rollback()
+                failed += 1
+                with self._lock:
+                    self.dropped += 1
+                print(f"❌ Écriture abandonnée ({item[0]} de la session {item[1]}): {e}")
+        return saved, failed
+
+    def apply(self, conn, writes):
+        sessions = {}
+        touched = {}
+        saved = []
+        for item in writes:
+            if item[0] == SESSION:
+                sessions.setdefault(item[1], item[2])
+            elif item[0] == TOUCH:
+                touched[item[1]] = None
+
+        conn.executemany(
+            'INSERT OR IGNORE INTO chat_sessions (session_id, user_id) VALUES (?, ?)',
+            list(sessions.items())
+        )
+        for item in writes:
+            if item[0] == MESSAGE:
+                _, session_id, user_id, role, content, on_saved = item
+                cursor = conn.execute(
+                    'INSERT INTO messages (session_id, user_id, role, contenu) VALUES (?, ?, ?, ?)',
+                    (session_id, user_id, role, content)
+                )
+                if on_saved is not None:
+                    saved.append((on_saved, cursor.lastrowid))
+        conn.executemany(
+            'UPDATE chat_sessions SET last_activity = CURRENT_TIMESTAMP WHERE session_id = ?',
+            [(session_id,) for session_id in touched]
+        )
+        conn.commit()
+        return saved
+
+    def stats(self):
+        with self._lock:
+            samples = np.array(self._batches, dtype=np.float64).reshape(-1, 2)
+            result = {
+                'queued': self._queue.qsize(),
+                'max_queue': self._queue.maxsize,
+                'written': self.written,
+                'batches': self.batches,
+                'blocked_puts': self.blocked_puts,
+                'errors': self.errors,
+                'dropped': self.dropped,
+                'reconnects': self.reconnects,
+                'restarts': self.restarts,
+            }
+        if len(samples):
+            sizes, flush_ms = samples[:, 0], samples[:, 1] * 1000
+            result.update({
+                'avg_batch_size': round(float(sizes.mean()), 2),
+                'max_batch_size': int(sizes.max()),
+                'avg_flush_ms': round(float(flush_ms.mean()), 2),
+                'p95_flush_ms': round(float(np.percentile(flush_ms, 95)), 2),
+            })
+        return result
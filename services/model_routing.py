@@ -0,0 +1,125 @@
+"""
+Routage des questions vers un modèle selon leur classe
+Les salutations, remerciements et questions factuelles courtes n'ont pas
+besoin du même modèle ni du même budget de réponse que les questions
+d'admission détaillées: chaque classe (route) fixe son modèle, son
+max_output_tokens et sa température, et ses latences et coûts sont suivis
+"""
+
+import re
+import threading
+from collections import deque
+
+import numpy as np
+
+from .text_utils import FRENCH_STOPWORDS, fold_accents
+
+# Messages de politesse traités comme des salutations (merci, d'accord...)
+COURTESY_WORDS = frozenset({
+    'merci', 'beaucoup', 'ok', 'okay', 'accord', 'daccord', 'super', 'parfait', 'genial',
+    'cool', 'top', 'tout', 'revoir', 'bye', 'bonne', 'journee', 'soiree', 'bientot',
+})
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class ModelRouter:
+    """
+    Choix de la route d'un message et suivi par route
+
+    Les routes sont évaluées dans l'ordre de la table; la première dont les
+    conditions sont remplies est retenue. Conditions possibles:
+    - `intents`: intentions acceptées (absente: toutes)
+    - `max_words` / `min_words`: longueur du message en mots
+    - `courtesy`: vrai si le message peut aussi n'être qu'une formule de politesse
+    Une route sans condition sert de route par défaut (à placer en dernier).
+
+    Paramètres d'une route: `model` (None: modèle du fournisseur),
+    `max_output_tokens`, `temperature`, et pour l'estimation du coût
+    `input_price` / `output_price` (par million de tokens).
+
+    Args:
+        routes (dict): Table ordonnée nom de route -> paramètres
+        window (int): Appels récents conservés par route pour les percentiles
+    """
+
+    def __init__(self, routes, window=1000):
+        if not routes:
+            raise ValueError("Table de routage vide")
+        self.routes = routes
+        self.default = list(routes)[-1]
+        self._lock = threading.Lock()
+        self._latencies = {name: deque(maxlen=window) for name in routes}
+        self._counters = {
+            name: {'requests': 0, 'errors': 0, 'prompt_tokens': 0, 'output_tokens': 0}
+            for name in routes
+        }
+
+    def matches(self, spec, intent, length, courtesy):
+        if spec.get('courtesy') and courtesy:
+            return True
+        if 'intents' in spec and intent not in spec['intents']:
+            return False
+        if 'max_words' in spec and length > spec['max_words']:
+            return False
+        if 'min_words' in spec and length < spec['min_words']:
+            return False
+        return True
+
+    def route(self, intent, message):
+        """Nom de la route d'un message"""
+        words = _WORD_RE.findall(fold_accents(message.lower()))
+        length = len(words)
+        # Politesse: au moins une formule, et rien d'autre que des formules ou
+        # des mots vides ("merci" est lui-même un mot vide de normalize_text)
+        courtesy = (
+            any(word in COURTESY_WORDS for word in words)
+            and all(word in COURTESY_WORDS or word in FRENCH_STOPWORDS for word in words)
+        )
+        for name, spec in self.routes.items():
+            if self.matches(spec, intent, length, courtesy):
+                return name
+        return self.default
+
+    def options(self, name):
+        """Paramètres de génération d'une route (transmis au fournisseur)"""
+        spec = self.routes[name]
+        return {
+            'model': spec.get('model'),
+            'max_output_tokens': spec.get('max_output_tokens'),
+            'temperature': spec.get('temperature'),
+        }
+
+    def record(self, name, latency, prompt_tokens=0, output_tokens=0, ok=True):
+        """Enregistre un appel au modèle pour une route"""
+        with self._lock:
+            counters = self._counters[name]
+            counters['requests'] += 1
+            if not ok:
+                counters['errors'] += 1
+                return
+            counters['prompt_tokens'] += prompt_tokens
+            counters['output_tokens'] += output_tokens
+            self._latencies[name].append(latency)
+
+    def stats(self):
+        with self._lock:
+            snapshot = {
+                name: (dict(counters), np.array(self._latencies[name], dtype=np.float64) * 1000)
+                for name, counters in self._counters.items()
+            }
+
+        result = {}
+        for name, (counters, latencies) in snapshot.items():
+            spec = self.routes[name]
+            entry = {**counters, 'model': spec.get('model'), 'max_output_tokens': spec.get('max_output_tokens')}
+            if 'input_price' in spec or 'output_price' in spec:
+                entry['estimated_cost'] = round(
+                    counters['prompt_tokens'] * spec.get('input_price', 0) / 1e6
+                    + counters['output_tokens'] * spec.get('output_price', 0) / 1e6, 6
+                )
+            if len(latencies):
+                entry['avg_latency_ms'] = round(float(latencies.mean()), 1)
+                entry['p95_latency_ms'] = round(float(np.percentile(latencies, 95)), 1)
+            result[name] = entry
+        return result
@@ -0,0 +1,123 @@
+"""
+Pagination par curseur (keyset) des listes de l'API
+Le curseur est la clé de tri de la dernière ligne servie: la page suivante
+reprend juste après elle grâce à l'index, au lieu de parcourir puis d'écarter
+les lignes des pages précédentes (LIMIT/OFFSET). Chaque page coûte le même
+prix quelle que soit sa profondeur.
+"""
+
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible, ou émis par une autre liste"""
+
+
+def encode_cursor(kind, values):
+    """
+    Curseur opaque d'une position dans une liste
+
+    Args:
+        kind (str): Liste qui émet le curseur (ex: 'preinscriptions')
+        values (list): Clé de tri de la dernière ligne servie
+
+    Returns:
+        str: Curseur (base64 url, sans remplissage)
+    """
+    payload = json.dumps([kind, *values], separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, kind, size):
+    """
+    Clé de tri contenue dans un curseur
+
+    Args:
+        token (str): Curseur reçu du client
+        kind (str): Liste attendue
+        size (int): Nombre de colonnes de la clé de tri
+
+    Returns:
+        list: Valeurs de la clé de tri
+
+    Raises:
+        InvalidCursor: Curseur illisible ou d'une autre liste
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise InvalidCursor("Curseur illisible")
+
+    if not isinstance(payload, list) or len(payload) != size + 1 or payload[0] != kind:
+        raise InvalidCursor("Curseur d'une autre liste")
+    values = payload[1:]
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        raise InvalidCursor("Curseur illisible")
+    return values
+
+
+def keyset_condition(columns, descending=False):
+    """
+    Condition SQL des lignes qui suivent la clé d'un curseur
+
+    Args:
+        columns (list): Expressions de la clé de tri, dans l'ordre du ORDER BY
+        descending (bool): Tri décroissant sur toutes les colonnes
+
+    Returns:
+        str: Ex: "(p.date_soumission, p.id) < (?, ?)"
+    """
+    placeholders = ', '.join('?' for _ in columns)
+    return f"({', '.join(columns)}) {'<' if descending else '>'} ({placeholders})"
+
+
+def next_cursor(rows, per_page, kind, key):
+    """
+    Lignes de la page et curseur de la page suivante
+
+    La requête lit per_page + 1 lignes: la ligne en plus indique seulement
+    qu'une page suivante existe.
+
+    Args:
+        rows (list): Lignes lues (au plus per_page + 1)
+        per_page (int): Taille de la page
+        kind (str): Liste qui émet le curseur
+        key (callable): key(row) -> clé de tri de la ligne
+
+    Returns:
+        tuple: (lignes de la page, curseur suivant ou None)
+    """
+    if per_page < 1:
+        return [], None
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, encode_cursor(kind, key(rows[-1]))
+
+
+def pagination_info(per_page, next_token, page=None, total=None):
+    """
+    Bloc 'pagination' d'une réponse de liste
+
+    Mode curseur (total None): curseur suivant seulement, sans décompte.
+    Mode page: page, total et nombre de pages, plus le curseur suivant pour
+    continuer la lecture par curseur.
+
+    Returns:
+        dict: Informations de pagination
+    """
+    if total is None:
+        return {
+            'per_page': per_page,
+            'next_cursor': next_token,
+            'has_more': next_token is not None
+        }
+    return {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'next_cursor': next_token
+    }
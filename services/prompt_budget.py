@@ -0,0 +1,136 @@
+"""
+Budget de tokens des prompts envoyés au modèle
+Estimation locale du nombre de tokens, troncature des messages trop longs,
+compression de l'historique (les échanges les plus anciens d'abord) et
+suivi de la taille des prompts face à la latence du modèle
+"""
+
+import re
+import threading
+from collections import deque
+
+import numpy as np
+
+# Un token correspond en moyenne à ~4 caractères de texte français
+CHARS_PER_TOKEN = 4
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Tranches de taille de prompt (tokens) pour l'agrégation des latences
+TOKEN_BUCKETS = (500, 1000, 2000, 4000)
+
+
+def estimate_tokens(text):
+    """
+    Estimation locale du nombre de tokens d'un texte
+
+    Maximum entre le nombre de mots/signes et la longueur divisée par
+    CHARS_PER_TOKEN: les mots longs comptent pour plusieurs tokens.
+    """
+    if not text:
+        return 0
+    return max(len(_TOKEN_RE.findall(text)), -(-len(text) // CHARS_PER_TOKEN))
+
+
+def truncate_to_tokens(text, max_tokens, marker=" …"):
+    """Coupe un texte (sur une frontière de mot) pour tenir dans `max_tokens`"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(0, max_tokens * CHARS_PER_TOKEN - len(marker))
+    cut = text[:max_chars]
+    if ' ' in cut:
+        cut = cut[:cut.rfind(' ')]
+    # La coupe en caractères peut encore dépasser en mots courts
+    while cut and estimate_tokens(cut + marker) > max_tokens:
+        cut = cut[:cut.rfind(' ')] if ' ' in cut else cut[:len(cut) // 2]
+    return cut.rstrip() + marker
+
+
+def fit_history(history, max_tokens, turn_tokens, min_turn_tokens=20):
+    """
+    Sélectionne l'historique qui tient dans le budget
+
+    Les messages sont parcourus du plus récent au plus ancien: chacun est
+    tronqué à `turn_tokens` puis au budget restant; dès que le budget
+    restant descend sous `min_turn_tokens`, les messages plus anciens sont
+    abandonnés.
+
+    Args:
+        history (list): Messages (attributs role et content), du plus ancien au plus récent
+        max_tokens (int): Budget total de l'historique
+        turn_tokens (int): Taille maximale d'un message de l'historique
+
+    Returns:
+        tuple: (liste de (role, texte) dans l'ordre chronologique, nombre de messages abandonnés)
+    """
+    kept = []
+    remaining = max_tokens
+    for position, msg in enumerate(reversed(history)):
+        if remaining < min_turn_tokens:
+            return kept[::-1], len(history) - position
+        content = truncate_to_tokens(msg.content, min(turn_tokens, remaining))
+        remaining -= estimate_tokens(content) + 2  # préfixe "Utilisateur:"/"Assistant:"
+        kept.append((msg.role, content))
+    return kept[::-1], 0
+
+
+class PromptStats:
+    """
+    Taille des prompts et latence du modèle, par requête
+
+    Args:
+        window (int): Nombre de requêtes récentes conservées
+    """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.requests = 0
+        self.truncated_messages = 0
+        self.dropped_turns = 0
+
+    def record_prompt(self, truncated_message, dropped_turns):
+        with self._lock:
+            self.truncated_messages += int(truncated_message)
+            self.dropped_turns += dropped_turns
+
+    def record(self, prompt_tokens, latency):
+        """Enregistre un appel au modèle (tokens du prompt, latence en secondes)"""
+        with self._lock:
+            self.requests += 1
+            self._samples.append((prompt_tokens, latency))
+
+    def stats(self):
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64).reshape(-1, 2)
+            result = {
+                'requests': self.requests,
+                'truncated_messages': self.truncated_messages,
+                'dropped_turns': self.dropped_turns,
+            }
+        if not len(samples):
+            return result
+
+        tokens, latency_ms = samples[:, 0], samples[:, 1] * 1000
+        result.update({
+            'avg_prompt_tokens': round(float(tokens.mean()), 1),
+            'max_prompt_tokens': int(tokens.max()),
+            'avg_latency_ms': round(float(latency_ms.mean()), 1),
+            'p95_latency_ms': round(float(np.percentile(latency_ms, 95)), 1),
+        })
+        # Corrélation taille/latence (indéfinie si l'une des deux est constante)
+        if len(samples) > 1 and tokens.std() > 0 and latency_ms.std() > 0:
+            result['tokens_latency_correlation'] = round(float(np.corrcoef(tokens, latency_ms)[0, 1]), 3)
+
+        by_bucket = {}
+        bounds = (0,) + TOKEN_BUCKETS + (None,)
+        for low, high in zip(bounds, bounds[1:]):
+            mask = tokens >= low if high is None else (tokens >= low) & (tokens < high)
+            if mask.any():
+                label = f"{low}+" if high is None else f"{low}-{high}"
+                by_bucket[label] = {
+                    'requests': int(mask.sum()),
+                    'avg_latency_ms': round(float(latency_ms[mask].mean()), 1)
+                }
+        result['latency_by_prompt_tokens'] = by_bucket
+        return result
@@ -0,0 +1,218 @@
+"""
+Limiteur de débit sortant vers le fournisseur (quota par minute)
+Seaux à jetons (requêtes et tokens par minute) stockés dans un fichier
+SQLite local: tous les workers gunicorn de la machine consomment le même
+quota. Un appel au-delà du quota attend son tour jusqu'à une durée
+maximale; au-delà, il est refusé et la réponse de secours est servie.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+DEFAULT_STATE_PATH = os.path.join(tempfile.gettempdir(), 'chatbot_llm_quota.db')
+
+
+class RateLimited(RuntimeError):
+    """Appel refusé: le quota du fournisseur est épuisé au-delà de l'attente permise"""
+
+
+class RateLimiter:
+    """
+    Seaux à jetons partagés entre processus
+
+    Chaque seau se remplit au rythme de son quota par minute, jusqu'à un
+    quota complet. Un appel réserve immédiatement sa part (le niveau du
+    seau peut devenir négatif) puis attend que sa réservation soit
+    couverte: les appels en file sont servis dans l'ordre d'arrivée, quel
+    que soit le worker. Si l'attente dépasse `max_wait_seconds` (ou
+    l'échéance de la requête), rien n'est réservé et RateLimited est levée.
+    Un appel plus coûteux qu'un quota complet réserve le quota complet: il
+    attend que le seau soit plein au lieu d'être refusé à chaque essai.
+
+    Args:
+        path (str): Fichier SQLite de l'état partagé
+        name (str): Préfixe des seaux (un quota par clé/fournisseur)
+        requests_per_minute (float): Quota de requêtes (0: sans limite)
+        tokens_per_minute (float): Quota de tokens, prompt et réponse (0: sans limite)
+        max_wait_seconds (float): Attente maximale dans la file
+        output_tokens (int): Tokens de réponse réservés par appel, en plus du prompt
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH, name='llm', requests_per_minute=0,
+                 tokens_per_minute=0, max_wait_seconds=5, output_tokens=500):
+        self.path = path
+        self.name = name
+        self.quotas = {
+            f"{name}:requests": float(requests_per_minute),
+            f"{name}:tokens": float(tokens_per_minute),
+        }
+        self.quotas = {bucket: quota for bucket, quota in self.quotas.items() if quota > 0}
+        self.max_wait_seconds = float(max_wait_seconds)
+        self.output_tokens = int(output_tokens)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=1000)
+        self.acquired = 0
+        self.queued = 0
+        self.shed = 0
+        self.oversized = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+        if not self.quotas:
+            return
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    name TEXT PRIMARY KEY,
+                    level REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def connect(self):
+        """Connexion SQLite du thread courant (transactions explicites)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, costs, max_wait):
+        """
+        Réserve `costs` dans les seaux si l'attente reste sous `max_wait`
+
+        Returns:
+            float | None: Attente nécessaire (s), None si l'appel doit être refusé
+        """
+        conn = self.connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = {
+                name: (level, updated_at) for name, level, updated_at in conn.execute(
+                    f"SELECT name, level, updated_at FROM rate_buckets "
+                    f"WHERE name IN ({','.join('?' * len(costs))})",
+                    list(costs)
+                )
+            }
+            levels, wait = {}, 0.0
+            for bucket, cost in costs.items():
+                per_second = self.quotas[bucket] / 60
+                level, updated_at = rows.get(bucket, (self.quotas[bucket], now))
+                level = min(self.quotas[bucket], level + max(0.0, now - updated_at) * per_second)
+                levels[bucket] = level - cost
+                wait = max(wait, (cost - level) / per_second)
+
+            if wait > max_wait:
+                conn.execute("ROLLBACK")
+                return None
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO rate_buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                [(bucket, level, now) for bucket, level in levels.items()]
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def acquire(self, prompt_tokens, deadline=None, output_tokens=None):
+        """
+        Attend le droit d'envoyer un appel
+
+        Args:
+            prompt_tokens (int): Tokens estimés du prompt
+            deadline (float): Échéance de la requête (time.monotonic)
+            output_tokens (int): Tokens de réponse à réserver (défaut: self.output_tokens)
+
+        Returns:
+            float: Attente effective (s)
+
+        Raises:
+            RateLimited: Quota épuisé au-delà de l'attente permise
+        """
+        if not self.quotas:
+            return 0.0
+
+        max_wait = self.max_wait_seconds
+        if deadline is not None:
+            max_wait = min(max_wait, deadline - time.monotonic())
+        tokens = prompt_tokens + (self.output_tokens if output_tokens is None else output_tokens)
+        costs = {bucket: 1 if bucket.endswith(':requests') else tokens for bucket in self.quotas}
+
+        # Au-delà d'un quota complet, l'attente dépasserait toujours max_wait
+        capped = {bucket: min(cost, self.quotas[bucket]) for bucket, cost in costs.items()}
+        if capped != costs:
+            with self._lock:
+                self.oversized += 1
+            costs = capped
+
+        wait = self.reserve(costs, max_wait)
+        if wait is None:
+            with self._lock:
+                self.shed += 1
+            raise RateLimited(f"Quota {self.name} épuisé (attente > {max(0.0, max_wait):.1f} s)")
+
+        with self._lock:
+            self.acquired += 1
+            self._waits.append(max(0.0, wait))
+            if wait > 0:
+                self.queued += 1
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.queue_depth -= 1
+        return max(0.0, wait)
+
+    def levels(self):
+        """Niveau courant des seaux partagés (négatif: réservations en attente)"""
+        now = time.time()
+        result = {}
+        rows = self.connect().execute("SELECT name, level, updated_at FROM rate_buckets").fetchall()
+        for name, level, updated_at in rows:
+            if name in self.quotas:
+                quota = self.quotas[name]
+                result[name] = round(min(quota, level + (now - updated_at) * quota / 60), 1)
+        return result
+
+    def stats(self):
+        if not self.quotas:
+            return {'enabled': False}
+        with self._lock:
+            waits = np.array(self._waits, dtype=np.float64) * 1000
+            result = {
+                'enabled': True,
+                'quotas_per_minute': dict(self.quotas),
+                'acquired': self.acquired,
+                'queued': self.queued,
+                'shed': self.shed,
+                'oversized': self.oversized,
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+            }
+        if len(waits):
+            result.update({
+                'avg_wait_ms': round(float(waits.mean()), 1),
+                'p95_wait_ms': round(float(np.percentile(waits, 95)), 1),
+                'max_wait_ms': round(float(waits.max()), 1),
+            })
+        try:
+            result['levels'] = self.levels()
+        except sqlite3.Error as e:
+            result['levels'] = None
+            print(f"⚠️ Lecture des quotas impossible: {e}")
+        return result
@@ -0,0 +1,306 @@
+"""
+Cache des réponses du chatbot
+Sert une réponse déjà générée pour une question équivalente (même intention,
+texte normalisé proche) sans rappeler Gemini. Chaque worker a son cache en
+mémoire; les purges passent par une table partagée (PurgeGenerations).
+"""
+
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from .database import get_db_connection
+from .text_utils import normalize_text, hashed_ngram_vector
+
+
+class PurgeGenerations:
+    """
+    Générations de purge partagées par les workers (table SQLite)
+
+    Une purge incrémente la génération de l'intention visée ('*' pour tout
+    le cache). Une réponse notée avec des générations antérieures à celles
+    de la table est un défaut de cache, quel que soit le worker qui a reçu
+    la purge.
+
+    Args:
+        connect (callable): Fabrique de connexions (conn.close() après usage)
+    """
+
+    ALL = '*'
+
+    def __init__(self, connect=get_db_connection):
+        self.connect = connect
+        self._ready = False
+
+    def _ensure_table(self, conn):
+        if self._ready:
+            return
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache_generations (
+                scope TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL
+            )
+        """)
+        conn.commit()
+        self._ready = True
+
+    def current(self, intent):
+        """
+        Générations en vigueur pour une intention
+
+        Returns:
+            tuple: (génération de tout le cache, génération de l'intention)
+        """
+        conn = self.connect()
+        try:
+            self._ensure_table(conn)
+            rows = conn.execute(
+                "SELECT scope, generation FROM response_cache_generations WHERE scope IN (?, ?)",
+                (self.ALL, intent)
+            ).fetchall()
+        finally:
+            conn.close()
+        found = {scope: generation for scope, generation in rows}
+        return (found.get(self.ALL, 0), found.get(intent, 0))
+
+    def bump(self, intent=None):
+        """Périme les réponses de tous les workers (toutes ou d'une intention)"""
+        conn = self.connect()
+        try:
+            self._ensure_table(conn)
+            conn.execute("""
+                INSERT INTO response_cache_generations (scope, generation) VALUES (?, 1)
+                ON CONFLICT(scope) DO UPDATE SET generation = generation + 1
+            """, (intent or self.ALL,))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class CacheEntry:
+    """Réponse mise en cache"""
+
+    __slots__ = ('key', 'intent', 'question', 'response', 'generation', 'created_at', 'last_hit', 'hits')
+
+    def __init__(self, key, intent, question, response, generation=None):
+        self.key = key
+        self.intent = intent
+        self.question = question
+        self.response = response
+        self.generation = generation
+        self.created_at = time.time()
+        self.last_hit = self.created_at
+        self.hits = 0
+
+    def to_dict(self):
+        return {
+            'intent': self.intent,
+            'question': self.question,
+            'normalized': self.key,
+            'hits': self.hits,
+            'created_at': self.created_at,
+            'last_hit': self.last_hit
+        }
+
+
+class ResponseCache:
+    """
+    Cache borné de réponses indexé par similarité de n-grammes
+
+    Les vecteurs des questions sont stockés dans une matrice préallouée:
+    une recherche est un unique produit matrice-vecteur.
+
+    Args:
+        max_entries (int): Nombre maximal de réponses gardées
+        ttl (float): Durée de vie d'une réponse (secondes)
+        threshold (float): Similarité cosinus minimale pour servir une réponse
+        dim (int): Dimension des vecteurs de n-grammes hachés
+        generations (PurgeGenerations): Purges partagées entre workers
+            (None: purges limitées à ce cache)
+    """
+
+    def __init__(self, max_entries=1000, ttl=21600, threshold=0.9, dim=1024, generations=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self.threshold = float(threshold)
+        self.dim = int(dim)
+        self.generations = generations
+
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((self.max_entries, self.dim), dtype=np.float32)
+        self._intents = np.full(self.max_entries, -1, dtype=np.int32)
+        self._entries = [None] * self.max_entries
+        self._slots_by_key = {}
+        self._intent_ids = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.purged = 0
+
+    def _generation(self, intent):
+        """Génération en vigueur (False si la table est illisible)"""
+        if self.generations is None:
+            return None
+        try:
+            return self.generations.current(intent)
+        except sqlite3.Error as e:
+            print(f"⚠️ Générations du cache illisibles: {e}")
+            return False
+
+    def _intent_id(self, intent):
+        if intent not in self._intent_ids:
+            self._intent_ids[intent] = len(self._intent_ids)
+        return self._intent_ids[intent]
+
+    def _release(self, slot):
+        entry = self._entries[slot]
+        if entry is not None:
+            self._slots_by_key.pop((entry.intent, entry.key), None)
+        self._entries[slot] = None
+        self._intents[slot] = -1
+
+    def _is_expired(self, entry, now):
+        return self.ttl > 0 and now - entry.created_at > self.ttl
+
+    def get(self, question, intent):
+        """
+        Cherche une réponse pour une question équivalente
+
+        Returns:
+            str | None: Réponse en cache, None si aucune n'est assez proche
+        """
+        key = normalize_text(question)
+        if not key:
+            return None
+
+        # Une purge reçue par un autre worker n'est connue que par la table
+        generation = self._generation(intent)
+        if generation is False:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        query = hashed_ngram_vector(key, self.dim)
+
+        with self._lock:
+            intent_id = self._intent_ids.get(intent)
+            slot = self._slots_by_key.get((intent, key))
+
+            if slot is None and intent_id is not None:
+                scores = self._vectors @ query
+                scores[self._intents != intent_id] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    slot = best
+
+            entry = self._entries[slot] if slot is not None else None
+            if entry is not None and self._is_expired(entry, now):
+                self._release(slot)
+                self.expirations += 1
+                entry = None
+            elif entry is not None and entry.generation != generation:
+                self._release(slot)
+                self.purged += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            entry.hits += 1
+            entry.last_hit = now
+            self.hits += 1
+            return entry.response
+
+    def put(self, question, intent, response):
+        """Met en cache la réponse générée pour une question"""
+        key = normalize_text(question)
+        if not key or not response:
+            return
+
+        generation = self._generation(intent)
+        if generation is False:
+            return
+
+        now = time.time()
+        vector = hashed_ngram_vector(key, self.dim)
+
+        with self._lock:
+            slot = self._slots_by_key.get((intent, key))
+            if slot is None:
+                slot = self._free_slot(now)
+
+            self._release(slot)
+            self._entries[slot] = CacheEntry(key, intent, question, response, generation)
+            self._vectors[slot] = vector
+            self._intents[slot] = self._intent_id(intent)
+            self._slots_by_key[(intent, key)] = slot
+            self.stores += 1
+
+    def _free_slot(self, now):
+        """Trouve un emplacement libre, expiré, ou à défaut le moins récemment utilisé"""
+        lru_slot, lru_time = 0, None
+        for slot, entry in enumerate(self._entries):
+            if entry is None:
+                return slot
+            if self._is_expired(entry, now):
+                self.expirations += 1
+                return slot
+            if lru_time is None or entry.last_hit < lru_time:
+                lru_slot, lru_time = slot, entry.last_hit
+        self.evictions += 1
+        return lru_slot
+
+    def purge(self, intent=None):
+        """
+        Vide le cache (ou seulement les réponses d'une intention)
+
+        Avec des générations partagées, les caches des autres workers
+        traitent aussi leurs réponses comme périmées dès leur prochain accès.
+
+        Returns:
+            int: Nombre de réponses supprimées de ce cache
+        """
+        if self.generations is not None:
+            self.generations.bump(intent)
+
+        removed = 0
+        with self._lock:
+            for slot, entry in enumerate(self._entries):
+                if entry is not None and (intent is None or entry.intent == intent):
+                    self._release(slot)
+                    removed += 1
+        return removed
+
+    def entries(self, limit=50):
+        """Réponses en cache triées par nombre d'utilisations"""
+        with self._lock:
+            entries = [e for e in self._entries if e is not None]
+        entries.sort(key=lambda e: e.hits, reverse=True)
+        return [e.to_dict() for e in entries[:limit]]
+
+    def stats(self):
+        """Compteurs du cache"""
+        with self._lock:
+            size = sum(1 for e in self._entries if e is not None)
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'purged': self.purged,
+            'shared_purges': self.generations is not None
+        }
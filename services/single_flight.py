@@ -0,0 +1,118 @@
+"""
+Regroupement des appels identiques en cours (single-flight)
+Quand plusieurs requêtes posent la même question au même moment (bouton
+d'action rapide, jour des résultats), un seul appel au modèle part: les
+autres attendent son résultat au lieu de lancer le leur
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+
+class SingleFlight:
+    """
+    Un seul appel en cours par clé; les demandes concurrentes le partagent
+
+    Le premier appelant d'une clé (le « meneur ») exécute la fonction dans
+    son propre thread; les suivants attendent son résultat, ou son
+    exception, jusqu'à leur propre échéance. La clé est libérée dès la fin
+    de l'appel: les demandes suivantes relèvent du cache des réponses.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.wait_timeouts = 0
+
+    def join(self, key):
+        """Future de l'appel en cours pour `key` et vrai si l'appelant en est le meneur"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+            return future, leader
+
+    def finish(self, key, future, result=None, error=None):
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        with self._lock:
+            del self._calls[key]
+
+    def wait_timeout(self):
+        with self._lock:
+            self.wait_timeouts += 1
+        return TimeoutError("Appel identique en cours toujours sans réponse")
+
+    def do(self, key, fn, timeout=None):
+        """
+        Exécute `fn()` ou attend l'appel identique déjà en cours
+
+        Args:
+            key (hashable): Identifiant de l'appel
+            fn (callable): Appel à exécuter par le meneur
+            timeout (float): Attente maximale d'un appelant qui n'est pas meneur
+
+        Returns:
+            tuple: (résultat, partagé) - partagé est vrai pour un appelant qui a attendu
+
+        Raises:
+            TimeoutError: L'appel en cours n'a pas abouti dans `timeout`
+        """
+        future, leader = self.join(key)
+        if not leader:
+            try:
+                return future.result(timeout=None if timeout is None else max(0.0, timeout)), True
+            except FutureTimeout:
+                raise self.wait_timeout()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result, False
+
+    async def do_async(self, key, fn, timeout=None):
+        """
+        Version asynchrone de `do`: `fn()` retourne une coroutine
+
+        Les appels en cours sont partagés avec le chemin synchrone (mêmes clés).
+        """
+        future, leader = self.join(key)
+        if not leader:
+            # shield: l'expiration de l'attente ne doit pas annuler l'appel du meneur
+            waiter = asyncio.shield(asyncio.wrap_future(future))
+            try:
+                return await asyncio.wait_for(waiter, None if timeout is None else max(0.0, timeout)), True
+            except asyncio.TimeoutError:
+                raise self.wait_timeout()
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            calls = self.leaders + self.coalesced
+            return {
+                'calls': calls,
+                'upstream_calls': self.leaders,
+                'coalesced': self.coalesced,
+                'coalesce_rate': round(self.coalesced / calls, 4) if calls else None,
+                'wait_timeouts': self.wait_timeouts,
+                'in_flight': len(self._calls),
+            }
@@ -0,0 +1,59 @@
+"""
+Durée des étapes d'une requête de chat
+Décompose le temps de réponse (validation, écritures en base, appel au
+modèle) pour voir ce que coûte chaque étape et ce que le recouvrement des
+écritures avec l'appel au modèle fait gagner
+"""
+
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class StageTimings:
+    """
+    Durées par étape des requêtes récentes
+
+    Args:
+        window (int): Nombre de mesures récentes conservées par étape
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self.requests = 0
+
+    def record(self, stages):
+        """
+        Enregistre les étapes d'une requête
+
+        Args:
+            stages (dict): Nom de l'étape -> durée (secondes)
+        """
+        with self._lock:
+            self.requests += 1
+            for name, seconds in stages.items():
+                samples = self._samples.get(name)
+                if samples is None:
+                    samples = self._samples[name] = deque(maxlen=self.window)
+                samples.append(seconds)
+
+    def stats(self):
+        with self._lock:
+            snapshot = {
+                name: np.array(samples, dtype=np.float64) * 1000
+                for name, samples in self._samples.items()
+            }
+            result = {'requests': self.requests}
+
+        stages = {}
+        for name, durations in snapshot.items():
+            if len(durations):
+                stages[name] = {
+                    'avg_ms': round(float(durations.mean()), 1),
+                    'p95_ms': round(float(np.percentile(durations, 95)), 1),
+                }
+        result['stages'] = stages
+        return result
@@ -0,0 +1,87 @@
+"""
+Utilitaires de traitement de texte pour le chatbot
+Normalisation des messages (casse, accents, ponctuation, mots vides)
+et vectorisation par n-grammes de caractères hachés (NumPy)
+"""
+
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+# Mots vides français retirés avant comparaison des messages.
+# Les mots interrogatifs (combien, comment, quand...) et la négation sont
+# conservés car ils changent le sens de la question.
+FRENCH_STOPWORDS = frozenset("""
+a au aux avec c ca ce ces cet cette d de des du elle elles en es est et etre
+il ils j je l la le les leur leurs m ma me mes moi mon n nous on ont ou par
+pour qu que quel quelle quelles quels qui s sa se ses si son sont sur suis t
+ta te tes toi ton tu un une vos votre vous y svp stp merci bien alors donc
+""".split())
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACES_RE = re.compile(r"\s+")
+
+
+# Lettres accentuées courantes du français et leur équivalent sans accent
+ACCENT_MAP = dict(zip(
+    "àâäáãåçéèêëíìîïñóòôöõúùûüýÿÀÂÄÁÃÅÇÉÈÊËÍÌÎÏÑÓÒÔÖÕÚÙÛÜÝŸ",
+    "aaaaaaceeeeiiiinooooouuuuyyAAAAAACEEEEIIIINOOOOOUUUUYY"
+))
+ACCENT_MAP.update({'œ': 'oe', 'æ': 'ae', 'Œ': 'OE', 'Æ': 'AE'})
+_ACCENT_RE = re.compile('[' + ''.join(ACCENT_MAP) + ']')
+
+
+def fold_accents(text):
+    """Supprime les accents (é -> e, ç -> c...)"""
+    if text.isascii():
+        return text
+    # Chemin rapide: substitution des lettres accentuées courantes
+    text = _ACCENT_RE.sub(lambda match: ACCENT_MAP[match.group()], text)
+    if text.isascii():
+        return text
+    # Caractères plus rares: décomposition Unicode complète
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_text(text, remove_stopwords=True):
+    """
+    Normalise un message pour la comparaison
+
+    Minuscules, accents retirés, ponctuation remplacée par des espaces,
+    mots vides supprimés et espaces compactés.
+    """
+    text = fold_accents(text.lower())
+    text = _PUNCTUATION_RE.sub(' ', text).replace('_', ' ')
+    words = text.split()
+    if remove_stopwords:
+        words = [w for w in words if w not in FRENCH_STOPWORDS]
+    return _SPACES_RE.sub(' ', ' '.join(words)).strip()
+
+
+def char_ngrams(text, n=3):
+    """Liste des n-grammes de caractères d'un texte (bordé d'espaces)"""
+    padded = f" {text} "
+    if len(padded) < n:
+        return [padded]
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+def ngram_indices(text, dim, n=3):
+    """Indices (hachés, stables entre processus) des n-grammes d'un texte"""
+    return [zlib.crc32(gram.encode('utf-8')) % dim for gram in char_ngrams(text, n)]
+
+
+def hashed_ngram_vector(text, dim=1024, n=3):
+    """
+    Vecteur L2-normalisé des n-grammes de caractères hachés d'un texte
+
+    Le produit scalaire de deux vecteurs donne leur similarité cosinus.
+    """
+    vector = np.bincount(ngram_indices(text, dim, n), minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
@@ -10,6 +10,7 @@
 const CONFIG = {
     API_ENDPOINTS: {
         MESSAGE: '/api/message',
+        MESSAGE_STREAM: '/api/message/stream',
         PREINSCRIPTION: '/api/preinscription',
         PREINSCRIPTIONS: '/api/preinscriptions'
     },
@@ -290,8 +291,94 @@ function sendMessage() {
     // Show typing indicator
     showTypingIndicator(true);
 
-    // Send to API
-    fetch(CONFIG.API_ENDPOINTS.MESSAGE, {
+    // Send to API (streaming, with classic JSON endpoint as fallback)
+    streamBotResponse(message)
+    .catch(error => {
+        if (!error.canRetry) throw error;
+        console.warn('Streaming indisponible, bascule en mode classique:', error);
+        return fetchBotResponse(message);
+    })
+    .then(() => saveChatToHistory(message))
+    .catch(error => {
+        console.error('Error:', error);
+        showTypingIndicator(false);
+        addMessageToChat('Désolé, une erreur s\'est produite. Veuillez réessayer.', 'bot');
+        showToast('Erreur de connexion au serveur', 'error');
+    });
+}
+
+async function streamBotResponse(message) {
+    let response;
+    try {
+        response = await fetch(CONFIG.API_ENDPOINTS.MESSAGE_STREAM, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
+            },
+            body: JSON.stringify({
+                message: message,
+                session_id: sessionId
+            })
+        });
+    } catch (error) {
+        error.canRetry = true;
+        throw error;
+    }
+
+    // Le mode classique n'est utilisé que si le flux n'a jamais démarré
+    if (!response.ok || !response.body) {
+        const error = new Error('Stream unavailable');
+        error.canRetry = true;
+        throw error;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let bubble = null;
+    let text = '';
+
+    while (true) {
+        let chunk;
+        try {
+            chunk = await reader.read();
+        } catch (error) {
+            // Connexion interrompue: conserver le texte déjà affiché
+            if (bubble) return;
+            throw error;
+        }
+        const { value, done } = chunk;
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        // Les événements SSE sont séparés par une ligne vide
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            const event = parseSseEvent(rawEvent);
+            if (event.name === 'chunk' && event.data) {
+                if (!bubble) {
+                    showTypingIndicator(false);
+                    bubble = addMessageToChat('', 'bot');
+                }
+                text += event.data.delta;
+                bubble.textContent = text;
+                scrollToBottom();
+            }
+        }
+    }
+
+    if (!bubble) {
+        throw new Error('Empty stream');
+    }
+}
+
+function fetchBotResponse(message) {
+    return fetch(CONFIG.API_ENDPOINTS.MESSAGE, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
@@ -306,19 +393,34 @@ function sendMessage() {
         showTypingIndicator(false);
         if (data.response) {
             addMessageToChat(data.response, 'bot');
-            saveChatToHistory(message);
         } else {
             throw new Error('Invalid response');
         }
-    })
-    .catch(error => {
-        console.error('Error:', error);
-        showTypingIndicator(false);
-        addMessageToChat('Désolé, une erreur s\'est produite. Veuillez réessayer.', 'bot');
-        showToast('Erreur de connexion au serveur', 'error');
     });
 }
 
+function parseSseEvent(rawEvent) {
+    const event = { name: 'message', data: null };
+    const dataLines = [];
+
+    rawEvent.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            event.name = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trim());
+        }
+    });
+
+    if (dataLines.length) {
+        try {
+            event.data = JSON.parse(dataLines.join('\n'));
+        } catch (e) {
+            event.data = null;
+        }
+    }
+    return event;
+}
+
 function addMessageToChat(message, sender) {
     const chatMessages = document.getElementById('chatMessages');
     if (!chatMessages) return;
@@ -361,6 +463,8 @@ function addMessageToChat(message, sender) {
 
     // Scroll to bottom
     chatMessages.scrollTop = chatMessages.scrollHeight;
+
+    return bubbleDiv;
 }
 
 function showTypingIndicator(show) {
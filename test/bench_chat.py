@@ -0,0 +1,92 @@
+"""
+Test de charge du chat (POST /api/message)
+À lancer contre un serveur démarré, idéalement avec le fournisseur local:
+
+    LLM_PROVIDER=local LOCAL_LLM_LATENCY_MS=800 gunicorn app:app --workers 3
+    python test/bench_chat.py --requests 300 --concurrency 12
+
+Mesure le débit et les percentiles de latence vus par le client
+"""
+
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+BASE_URL = "http://127.0.0.1:5000"
+
+# Mélange de questions catalogue (servies sans modèle) et de questions ouvertes
+MESSAGES = [
+    "Quels sont les frais de scolarité ?",
+    "Quels sont les programmes disponibles ?",
+    "Comment vous contacter ?",
+    "Pourquoi choisir le master en intelligence artificielle plutôt que le cloud ?",
+    "Je n'ai pas eu mon bac série C, est-ce que je peux faire informatique ?",
+    "Quelles sont les débouchés de la licence en cybersécurité ?",
+    "Est-ce que je peux payer en plusieurs tranches si je suis boursier ?",
+    "Bonjour, j'aimerais des conseils pour choisir ma filière",
+]
+
+
+def send(base_url, session_id, message, timeout):
+    """Envoie un message; retourne (latence en s, succès)"""
+    started = time.perf_counter()
+    try:
+        response = requests.post(
+            f"{base_url}/api/message",
+            json={'message': message, 'session_id': session_id},
+            timeout=timeout
+        )
+        ok = response.status_code == 200 and response.json().get('success', False)
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run(base_url, total, concurrency, sessions, timeout, seed):
+    rng = random.Random(seed)
+    jobs = [(f"bench_{rng.randrange(sessions)}", rng.choice(MESSAGES)) for _ in range(total)]
+    results = []
+    lock = threading.Lock()
+
+    def worker(job):
+        latency, ok = send(base_url, job[0], job[1], timeout)
+        with lock:
+            results.append((latency, ok))
+
+    print("\n" + "="*60)
+    print("📈 TEST DE CHARGE DU CHAT")
+    print("="*60)
+    print(f"🌐 {base_url} - {total} requêtes, {concurrency} en parallèle, {sessions} sessions\n")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    errors = sum(1 for _, ok in results if not ok)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+
+    print(f"⏱️  Durée totale: {elapsed:.2f} s")
+    print(f"🚀 Débit: {total / elapsed:.1f} requêtes/s")
+    print(f"📊 Latence: p50 {p50:.0f} ms | p95 {p95:.0f} ms | p99 {p99:.0f} ms | max {latencies.max():.0f} ms")
+    print(f"❌ Erreurs: {errors}/{total}")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de charge de POST /api/message")
+    parser.add_argument('--url', default=BASE_URL, help="URL du serveur")
+    parser.add_argument('--requests', type=int, default=200, help="Nombre total de requêtes")
+    parser.add_argument('--concurrency', type=int, default=8, help="Requêtes simultanées")
+    parser.add_argument('--sessions', type=int, default=50, help="Nombre de sessions de chat distinctes")
+    parser.add_argument('--timeout', type=float, default=30, help="Délai maximal par requête (s)")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du tirage des messages")
+    args = parser.parse_args()
+
+    run(args.url, args.requests, args.concurrency, args.sessions, args.timeout, args.seed)
@@ -0,0 +1,221 @@
+"""
+Micro-benchmark de la détection d'intention
+Compare l'ancienne boucle de mots-clés à l'automate compilé
+(services/intent_matcher.py) sur un corpus de messages réels, puis mesure
+le classifieur local (services/intent_classifier.py)
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+# Ajouter le répertoire parent (racine du projet) au path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from services.intent_matcher import intent_matcher
+from services.intent_classifier import IntentClassifier, load_training_data
+from services.model_routing import ModelRouter
+
+DB_PATH = os.path.join(parent_dir, 'database', 'chatbot.db')
+MODEL_PATH = os.path.join(parent_dir, os.getenv('INTENT_CLASSIFIER_PATH', 'database/intent_classifier.npz'))
+CLASSIFIER_THRESHOLD = float(os.getenv('INTENT_CLASSIFIER_THRESHOLD', 0.6))
+
+# Messages typiques des candidats (actions rapides de l'interface + questions fréquentes)
+SAMPLE_MESSAGES = [
+    "Quels sont les programmes disponibles ?",
+    "Quels documents sont nécessaires ?",
+    "Quels sont les frais de scolarité ?",
+    "Quel est le calendrier académique ?",
+    "Comment puis-je m'inscrire ?",
+    "J'ai besoin d'aide",
+    "Comment vous contacter ?",
+    "Quelles sont les conditions d'admission ?",
+    "Bonjour",
+    "Bonsoir, je voudrais des informations sur la licence en génie logiciel",
+    "Combien coûte le master en intelligence artificielle ?",
+    "Quand est la rentrée ?",
+    "Quelle est la date limite d'inscription pour le master ?",
+    "Je veux postuler en licence cybersécurité",
+    "Où se trouve l'université ?",
+    "Est-ce que je peux payer les frais en plusieurs tranches ?",
+    "Quels sont les prérequis pour le master cloud computing ?",
+    "Je n'ai pas eu mon bac série C, est-ce que je peux faire informatique ?",
+    "Merci beaucoup pour votre aide",
+    "Quelle est l'adresse email du service des admissions ?",
+    "Quelles pièces à fournir pour le dossier de candidature ?",
+    "Salut ! C'est combien la scolarité en licence ?",
+]
+
+# Intentions attendues pour les messages dont le sens est sans ambiguïté
+EXPECTED = {
+    "Quels sont les programmes disponibles ?": 'programmes',
+    "Quels documents sont nécessaires ?": 'admission',
+    "Quels sont les frais de scolarité ?": 'frais',
+    "Quel est le calendrier académique ?": 'calendrier',
+    "Comment puis-je m'inscrire ?": 'preinscription',
+    "J'ai besoin d'aide": 'aide',
+    "Quelles sont les conditions d'admission ?": 'admission',
+    "Bonjour": 'salutation',
+    "Combien coûte le master en intelligence artificielle ?": 'frais',
+    "Quelle est la date limite d'inscription pour le master ?": 'calendrier',
+    "Quand est la rentrée ?": 'calendrier',
+    "Je veux postuler en licence cybersécurité": 'preinscription',
+    "Comment vous contacter ?": 'contact',
+    "Où se trouve l'université ?": 'contact',
+    "Où êtes-vous ?": 'contact',
+    "Quelles sont les dates limites ?": 'calendrier',
+    "Est-ce que je peux payer les frais en plusieurs tranches ?": 'frais',
+    "Quels sont les prérequis pour le master cloud computing ?": 'admission',
+    "Quelle est l'adresse email du service des admissions ?": 'contact',
+    "Quelles pièces à fournir pour le dossier de candidature ?": 'admission',
+    "Salut ! C'est combien la scolarité en licence ?": 'frais',
+    "Quels sont les frais de la licence ?": 'frais',
+    "Quels sont les frais de formation en master ?": 'frais',
+}
+
+# Conditions de la table de routage par défaut (services/gemini_chatbot.py)
+ROUTES = {
+    'simple': {'intents': ('salutation', 'aide'), 'max_words': 12, 'courtesy': True},
+    'lookup': {'intents': ('programmes', 'frais', 'calendrier', 'contact'), 'max_words': 20},
+    'complex': {'min_words': 40},
+    'standard': {},
+}
+
+# Routes attendues (formules de politesse seules -> simple)
+EXPECTED_ROUTES = {
+    "merci": 'simple',
+    "Merci !": 'simple',
+    "Merci beaucoup pour votre aide": 'simple',
+    "D'accord, merci": 'simple',
+    "Au revoir": 'simple',
+    "Merci, quels sont les frais de scolarité ?": 'lookup',
+}
+
+
+def legacy_detect_intent(message):
+    """Ancienne implémentation (boucles imbriquées, première intention trouvée)"""
+    message_lower = message.lower()
+
+    intents = {
+        'preinscription': ['préinscription', 'preinscription', "m'inscrire", 'inscription', 'postuler', 'candidature'],
+        'programmes': ['programme', 'filière', 'formation', 'licence', 'master', 'cursus', 'étude'],
+        'frais': ['frais', 'coût', 'prix', 'payer', 'paiement', 'combien', 'tarif'],
+        'admission': ['admission', 'condition', 'requis', 'document', 'dossier', 'exigence'],
+        'calendrier': ['date', 'quand', 'rentrée', 'calendrier', 'délai', 'inscription'],
+        'contact': ['contact', 'téléphone', 'email', 'adresse', 'localisation', 'où'],
+        'salutation': ['bonjour', 'salut', 'bonsoir', 'hello', 'hey', 'coucou'],
+        'aide': ['aide', 'aider', 'comment', 'info', 'information', 'renseigner']
+    }
+
+    for intent, keywords in intents.items():
+        if any(keyword in message_lower for keyword in keywords):
+            return intent
+
+    return 'general'
+
+
+def load_corpus():
+    """Messages utilisateurs de la base + échantillon de référence"""
+    corpus = list(SAMPLE_MESSAGES)
+    if os.path.exists(DB_PATH):
+        try:
+            conn = sqlite3.connect(DB_PATH)
+            rows = conn.execute(
+                "SELECT contenu FROM messages WHERE role = 'user' ORDER BY id DESC LIMIT 5000"
+            ).fetchall()
+            conn.close()
+            corpus.extend(row[0] for row in rows if row[0])
+        except sqlite3.Error as e:
+            print(f"⚠️ Lecture des messages impossible: {e}")
+    return corpus
+
+
+def bench(label, func, corpus, rounds):
+    """Chronomètre `func` sur tout le corpus, `rounds` fois"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in corpus:
+            func(message)
+    elapsed = time.perf_counter() - start
+    per_message_us = elapsed / (rounds * len(corpus)) * 1_000_000
+    print(f"⏱️  {label:<28} {per_message_us:8.2f} µs/message")
+    return per_message_us
+
+
+def main(rounds=2000):
+    corpus = load_corpus()
+
+    print("\n" + "="*60)
+    print("🎯 BENCHMARK DÉTECTION D'INTENTION")
+    print("="*60)
+    print(f"📄 Corpus: {len(corpus)} messages x {rounds} tours\n")
+
+    legacy = bench("Boucle de mots-clés", legacy_detect_intent, corpus, rounds)
+    compiled = bench("Automate compilé", intent_matcher.match, corpus, rounds)
+    print(f"\n🚀 Accélération: x{legacy / compiled:.2f}")
+
+    print("\n" + "-"*60)
+    print("🔍 Intentions attendues")
+    print("-"*60)
+    correct = 0
+    for message, expected in EXPECTED.items():
+        old, new = legacy_detect_intent(message), intent_matcher.match(message)
+        correct += new == expected
+        status = "✅" if new == expected else "❌"
+        print(f"{status} '{message}' → {new} (ancien: {old}, attendu: {expected})")
+    legacy_correct = sum(1 for m, expected in EXPECTED.items() if legacy_detect_intent(m) == expected)
+    print(f"\n📊 Intentions correctes: {correct}/{len(EXPECTED)} "
+          f"(ancienne boucle: {legacy_correct}/{len(EXPECTED)})")
+
+    changed = sum(1 for m in corpus if legacy_detect_intent(m) != intent_matcher.match(m))
+    print(f"\n📊 Intentions différentes de l'ancienne boucle: {changed}/{len(corpus)}")
+
+    print("\n" + "-"*60)
+    print("🧭 Routage des messages")
+    print("-"*60)
+    router = ModelRouter(ROUTES)
+    routed = 0
+    for message, expected in EXPECTED_ROUTES.items():
+        route = router.route(intent_matcher.match(message), message)
+        routed += route == expected
+        status = "✅" if route == expected else "❌"
+        print(f"{status} '{message}' → {route} (attendu: {expected})")
+
+    bench_classifier(corpus, max(1, rounds // 10))
+    print("="*60 + "\n")
+    # Plus rapide ne suffit pas: le banc échoue si une intention attendue change
+    return correct == len(EXPECTED) and routed == len(EXPECTED_ROUTES)
+
+
+def load_classifier():
+    """Classifieur enregistré, ou entraîné à la volée sur la base"""
+    if os.path.exists(MODEL_PATH):
+        return IntentClassifier.load(MODEL_PATH)
+    texts, labels, _ = load_training_data(DB_PATH)
+    return IntentClassifier.train(texts, labels)
+
+
+def bench_classifier(corpus, rounds):
+    print("\n" + "-"*60)
+    print("🧠 Classifieur local")
+    print("-"*60)
+    classifier = load_classifier()
+    per_message_us = bench("Classifieur (W·x)", classifier.predict, corpus, rounds)
+    status = "✅" if per_message_us < 1000 else "❌"
+    print(f"{status} {per_message_us / 1000:.3f} ms/message (objectif < 1 ms)")
+
+    def detect(message):
+        intent = classifier.classify(message, CLASSIFIER_THRESHOLD)
+        return intent or intent_matcher.match(message)
+
+    keyword_general = sum(1 for m in corpus if intent_matcher.match(m) == 'general')
+    hybrid_general = sum(1 for m in corpus if detect(m) == 'general')
+    print(f"📊 Messages classés 'general': mots-clés {keyword_general}/{len(corpus)}, "
+          f"classifieur + repli {hybrid_general}/{len(corpus)} (seuil {CLASSIFIER_THRESHOLD})")
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
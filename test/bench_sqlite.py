@@ -0,0 +1,146 @@
+"""
+Benchmark des écritures SQLite sous workers concurrents
+Reproduit les écritures du chat (message de l'utilisateur, puis réponse du
+bot et activité de la session) et la lecture de l'historique depuis
+plusieurs processus, comme des workers gunicorn, pour chaque profil de
+réglage (services/database.py):
+
+    python test/bench_sqlite.py --workers 3 --turns 300 --profiles legacy,performance
+
+Chaque profil travaille sur une copie neuve de database/chatbot.db
+"""
+
+import argparse
+import multiprocessing
+import os
+import secrets
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Ajouter le répertoire parent (racine du projet) au path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from services.database import PRAGMA_PROFILES, apply_pragmas
+
+DB_PATH = os.path.join(parent_dir, 'database', 'chatbot.db')
+
+
+def connect(path, profile):
+    """Connexion réglée comme celles du pool de l'application"""
+    conn = sqlite3.connect(path)
+    return apply_pragmas(conn, PRAGMA_PROFILES[profile])
+
+
+def worker(path, profile, turns, start, results):
+    """Tours de chat d'un worker: (latences des transactions, erreurs de verrou)"""
+    conn = connect(path, profile)
+    start.wait()
+    latencies, locked = [], 0
+    session_id = f"bench_{secrets.token_hex(8)}"
+    conn.execute('INSERT INTO chat_sessions (session_id) VALUES (?)', (session_id,))
+    conn.commit()
+
+    for turn in range(turns):
+        try:
+            started = time.perf_counter()
+            conn.execute(
+                'INSERT INTO messages (session_id, role, contenu) VALUES (?, ?, ?)',
+                (session_id, 'user', f"Question {turn} sur les frais de scolarité")
+            )
+            conn.commit()
+            latencies.append(time.perf_counter() - started)
+
+            # Rechargement de l'historique (contexte froid)
+            conn.execute(
+                'SELECT role, contenu FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 10',
+                (session_id,)
+            ).fetchall()
+
+            started = time.perf_counter()
+            conn.execute(
+                'INSERT INTO messages (session_id, role, contenu) VALUES (?, ?, ?)',
+                (session_id, 'bot', "Réponse " * 40)
+            )
+            conn.execute(
+                'UPDATE chat_sessions SET last_activity = CURRENT_TIMESTAMP WHERE session_id = ?',
+                (session_id,)
+            )
+            conn.commit()
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+            conn.rollback()
+    conn.close()
+    results.put((latencies, locked))
+
+
+def run(profile, workers, turns):
+    """Mesure un profil sur une copie neuve de la base"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'chatbot.db')
+        shutil.copyfile(DB_PATH, path)
+
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=worker, args=(path, profile, turns, start, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        time.sleep(0.5)
+
+        started = time.perf_counter()
+        start.set()
+        outcomes = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+
+    latencies = np.array([value for values, _ in outcomes for value in values]) * 1000
+    locked = sum(count for _, count in outcomes)
+    return {
+        'transactions': len(latencies),
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50': float(np.percentile(latencies, 50)),
+        'p95': float(np.percentile(latencies, 95)),
+        'p99': float(np.percentile(latencies, 99)),
+        'locked': locked,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des écritures SQLite par profil")
+    parser.add_argument('--workers', type=int, default=3, help="Processus écrivains (défaut: 3)")
+    parser.add_argument('--turns', type=int, default=300, help="Tours de chat par processus (défaut: 300)")
+    parser.add_argument('--profiles', default='legacy,safe,performance',
+                        help="Profils comparés (défaut: legacy,safe,performance)")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("💾 BENCHMARK DES ÉCRITURES SQLITE")
+    print("="*60)
+    print(f"👷 {args.workers} workers × {args.turns} tours (2 transactions d'écriture par tour)\n")
+
+    for profile in args.profiles.split(','):
+        result = run(profile.strip(), args.workers, args.turns)
+        print(f"⚙️  {profile}")
+        print(f"   🚀 Débit: {result['throughput']:.0f} transactions/s "
+              f"({result['transactions']} en {result['elapsed']:.2f} s)")
+        print(f"   📊 Latence: p50 {result['p50']:.2f} ms | p95 {result['p95']:.2f} ms | p99 {result['p99']:.2f} ms")
+        print(f"   🔒 Erreurs 'database is locked': {result['locked']}\n")
+    print("="*60 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Tests du disjoncteur du fournisseur (services/circuit_breaker.py)
+Vérifie l'ouverture, les appels d'essai en semi-ouvert et les résultats tardifs
+"""
+
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent (racine du projet) au path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+def check(label, condition):
+    """Affiche le résultat d'une vérification"""
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def opened_breaker(**options):
+    """Disjoncteur ouvert par un échec, prêt pour les essais (open_seconds court)"""
+    options.setdefault('open_seconds', 0.02)
+    breaker = CircuitBreaker(min_calls=1, **options)
+    breaker.record(0.1, ok=False, permit=breaker.check())
+    return breaker
+
+
+def test_opening():
+    """Le circuit s'ouvre au seuil d'échecs et refuse les appels"""
+    print("\n" + "="*60)
+    print("🧪 TEST 1: Ouverture")
+    print("="*60)
+
+    breaker = CircuitBreaker(min_calls=4, error_rate=0.5, open_seconds=60)
+    for ok in (True, True, False):
+        breaker.record(0.1, ok=ok, permit=breaker.check())
+    still_closed = breaker.state == CLOSED
+    breaker.record(0.1, ok=False, permit=breaker.check())
+
+    try:
+        breaker.check()
+        refused = False
+    except CircuitOpenError:
+        refused = True
+
+    slow = CircuitBreaker(min_calls=2, slow_call_seconds=1, slow_call_rate=0.5, open_seconds=60)
+    for _ in range(2):
+        slow.record(2.0, ok=True, permit=slow.check())
+    return all([
+        check("sous le nombre minimal d'appels: fermé", still_closed),
+        check("2 échecs sur 4: ouvert", breaker.state == OPEN),
+        check("circuit ouvert: appel refusé (CircuitOpenError)", refused),
+        check("allow() refuse sans lever", breaker.allow() is None and breaker.rejected == 2),
+        check("appels lents: ouvert", slow.state == OPEN and 'lents' in slow.last_opened_reason),
+    ])
+
+
+def test_half_open():
+    """Semi-ouvert: essais limités, refermé par un succès, rouvert par un échec"""
+    print("\n" + "="*60)
+    print("🧪 TEST 2: Appels d'essai")
+    print("="*60)
+
+    breaker = opened_breaker(half_open_calls=2)
+    time.sleep(0.03)
+    probes = [breaker.allow(), breaker.allow()]
+    extra = breaker.allow()
+    results = [
+        check("deux essais autorisés", all(p is not None and p.probe for p in probes)),
+        check("troisième appel refusé pendant les essais", extra is None and breaker.is_open()),
+    ]
+    breaker.record(0.1, ok=True, permit=probes[0])
+    results.append(check("un essai réussi sur deux: toujours semi-ouvert", breaker.state == HALF_OPEN))
+    breaker.record(0.1, ok=True, permit=probes[0])
+    results.append(check("même essai rapporté deux fois: compté une fois", breaker.state == HALF_OPEN))
+    breaker.record(0.1, ok=True, permit=probes[1])
+    results.append(check("tous les essais réussis: refermé", breaker.state == CLOSED))
+
+    failing = opened_breaker()
+    time.sleep(0.03)
+    failing.record(0.1, ok=False, permit=failing.allow())
+    results.append(check("essai en échec: rouvert", failing.state == OPEN and failing.opened == 2))
+
+    slow = opened_breaker(slow_call_seconds=1)
+    time.sleep(0.03)
+    slow.record(2.0, ok=True, permit=slow.allow())
+    results.append(check("essai trop lent: rouvert", slow.state == OPEN))
+    return all(results)
+
+
+def test_stale_results():
+    """Seuls les essais décident: résultats tardifs et appels sans autorisation ignorés"""
+    print("\n" + "="*60)
+    print("🧪 TEST 3: Résultats tardifs")
+    print("="*60)
+
+    breaker = CircuitBreaker(min_calls=2, open_seconds=0.02)
+    late = breaker.check()  # parti avant l'ouverture
+    for _ in range(2):
+        breaker.record(0.1, ok=False, permit=breaker.check())
+    time.sleep(0.03)
+    probe = breaker.check()
+
+    breaker.record(0.1, ok=True, permit=late)
+    results = [check("succès tardif d'avant l'ouverture: toujours semi-ouvert", breaker.state == HALF_OPEN)]
+    breaker.record(0.1, ok=True)
+    results.append(check("résultat sans autorisation: toujours semi-ouvert", breaker.state == HALF_OPEN))
+    breaker.record(0.1, ok=True, permit=probe)
+    results.append(check("succès de l'essai: refermé", breaker.state == CLOSED))
+    breaker.record(0.1, ok=False, permit=late)
+    results.append(check("échec tardif: absent de la fenêtre", breaker.stats()['window_calls'] == 0))
+    return all(results)
+
+
+def test_lost_probes():
+    """Essai annulé rendu; essai sans réponse compté comme un échec"""
+    print("\n" + "="*60)
+    print("🧪 TEST 4: Essais annulés ou perdus")
+    print("="*60)
+
+    breaker = opened_breaker()
+    time.sleep(0.03)
+    cancelled = breaker.allow()
+    breaker.release(cancelled)
+    retry = breaker.allow()
+    results = [check("essai annulé: un autre essai peut partir", retry is not None and retry.probe)]
+    breaker.release(cancelled)  # déjà rendu: sans effet
+    results.append(check("double restitution sans effet", breaker.allow() is None))
+
+    timed = opened_breaker(probe_timeout=0.05)
+    time.sleep(0.03)
+    timed.allow()  # essai jamais rapporté
+    time.sleep(0.06)
+    refused = timed.allow()
+    results.append(check("essai sans réponse après le délai: rouvert",
+                         refused is None and timed.state == OPEN
+                         and timed.last_opened_reason == 'essai sans réponse'))
+    return all(results)
+
+
+def main():
+    """Fonction principale"""
+    print("\n🚀 Tests du disjoncteur")
+
+    tests = [test_opening, test_half_open, test_stale_results, test_lost_probes]
+    results = [test() for test in tests]
+
+    passed = sum(results)
+    print("\n" + "="*60)
+    print(f"📊 Tests réussis: {passed}/{len(results)}")
+    print("="*60 + "\n")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -11,7 +11,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
-from model.gemini_chatbot import generate_response, test_gemini, conversation_context
+from services.gemini_chatbot import generate_response, test_gemini, conversation_context
 
 def test_conversation_flow():
     """Teste un flux de conversation complet"""
@@ -55,7 +55,7 @@ def test_conversation_flow():
     print("📊 RÉSUMÉ DE LA CONVERSATION")
     print("="*60)
     
-    from model.gemini_chatbot import get_conversation_summary
+    from services.gemini_chatbot import get_conversation_summary
     summary = get_conversation_summary(session_id)
     
     print(f"✅ Nombre de messages: {summary['message_count']}")
@@ -75,7 +75,7 @@ def test_intent_detection():
     print("🎯 TEST DE DÉTECTION D'INTENTIONS")
     print("="*60 + "\n")
     
-    from model.gemini_chatbot import detect_intent
+    from services.gemini_chatbot import detect_intent
     
     test_cases = [
         ("Je veux m'inscrire", "preinscription"),
@@ -108,7 +108,7 @@ def test_fallback():
     print("🔄 TEST DES RÉPONSES DE SECOURS")
     print("="*60 + "\n")
     
-    from model.gemini_chatbot import get_fallback_response
+    from services.gemini_chatbot import get_fallback_response
     
     intents = ['preinscription', 'programmes', 'frais', 'admission', 'calendrier', 'contact', 'salutation', 'aide']
     
@@ -0,0 +1,100 @@
+"""
+Tests du détecteur d'intention compilé (services/intent_matcher.py)
+Vérifie le poids des mots-clés génériques et le signalement des égalités
+"""
+
+import os
+import sys
+
+# Ajouter le répertoire parent (racine du projet) au path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from services.intent_matcher import IntentMatcher, intent_matcher
+
+
+def check(label, condition):
+    """Affiche le résultat d'une vérification"""
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def test_specific_keywords():
+    """Un terme précis l'emporte sur un niveau ou un nom de formation"""
+    print("\n" + "="*60)
+    print("🧪 TEST 1: Mots-clés précis contre mots-clés génériques")
+    print("="*60)
+
+    cases = [
+        ("Quels sont les frais de la licence ?", 'frais'),
+        ("Quels sont les frais de formation en master ?", 'frais'),
+        ("Combien coûte le master en intelligence artificielle ?", 'frais'),
+        ("Quels sont les prérequis pour le master cloud computing ?", 'admission'),
+        ("Quelle est la date limite d'inscription pour le master ?", 'calendrier'),
+        ("Quels sont les programmes de master ?", 'programmes'),
+    ]
+    results = []
+    for message, expected in cases:
+        detected = intent_matcher.match(message)
+        results.append(check(f"'{message}' → {detected} (attendu: {expected})", detected == expected))
+    return all(results)
+
+
+def test_ties():
+    """Les égalités sont signalées au lieu d'être tranchées en silence"""
+    print("\n" + "="*60)
+    print("🧪 TEST 2: Égalités de score")
+    print("="*60)
+
+    tie = intent_matcher.scores("Bonsoir, je voudrais des informations sur la licence")
+    clear = intent_matcher.scores("Quels sont les frais de la licence ?")
+    results = [
+        check(f"salutation/aide à égalité signalée: {tie}", intent_matcher.is_ambiguous(tie)),
+        check(f"frais devant programmes non ambigu: {clear}", not intent_matcher.is_ambiguous(clear)),
+        check("aucune intention: pas d'égalité", not intent_matcher.is_ambiguous([])),
+        check("une seule intention: pas d'égalité", not intent_matcher.is_ambiguous([('frais', 1.0)])),
+    ]
+
+    # L'étiquette d'une égalité suit l'ordre des intentions, quel qu'il soit
+    reordered = IntentMatcher({'aide': ['aide'], 'frais': ['frais']})
+    results.append(check("égalité départagée par l'ordre des intentions",
+                         reordered.match("aide frais") == 'aide'))
+    return all(results)
+
+
+def test_whole_words():
+    """Mots-clés exacts, pluriels et traits d'union"""
+    print("\n" + "="*60)
+    print("🧪 TEST 3: Mots entiers et traits d'union")
+    print("="*60)
+
+    cases = [
+        ("Quelles sont les dates limites ?", 'calendrier'),
+        ("Où êtes-vous ?", 'contact'),
+        ("Un dateur ?", 'general'),
+        ("Merci", 'general'),
+    ]
+    results = []
+    for message, expected in cases:
+        detected = intent_matcher.match(message)
+        results.append(check(f"'{message}' → {detected} (attendu: {expected})", detected == expected))
+    return all(results)
+
+
+def main():
+    """Fonction principale"""
+    print("\n🚀 Tests du détecteur d'intention")
+
+    tests = [test_specific_keywords, test_ties, test_whole_words]
+    results = [test() for test in tests]
+
+    passed = sum(results)
+    print("\n" + "="*60)
+    print(f"📊 Tests réussis: {passed}/{len(results)}")
+    print("="*60 + "\n")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
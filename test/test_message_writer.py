@@ -0,0 +1,160 @@
+"""
+Tests de l'écriture différée des messages (services/message_writer.py)
+Vérifie l'écriture par lots, le repli ligne par ligne et la reprise du thread
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+# Ajouter le répertoire parent (racine du projet) au path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from services.message_writer import MessageWriter
+
+SCHEMA = """
+    CREATE TABLE chat_sessions (
+        session_id TEXT PRIMARY KEY,
+        user_id INTEGER,
+        last_activity TIMESTAMP
+    );
+    CREATE TABLE messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        user_id INTEGER,
+        role TEXT NOT NULL CHECK(role IN ('user', 'bot')),
+        contenu TEXT NOT NULL
+    );
+"""
+
+
+def check(label, condition):
+    """Affiche le résultat d'une vérification"""
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def create_database(tmp):
+    path = os.path.join(tmp, 'chatbot.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+    return path
+
+
+def read_messages(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT session_id, role, contenu FROM messages ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def test_batch():
+    """Un lot: sessions créées, messages dans l'ordre, suites appelées"""
+    print("\n" + "="*60)
+    print("🧪 TEST 1: Écriture par lots")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = create_database(tmp)
+        writer = MessageWriter(lambda: sqlite3.connect(path, check_same_thread=False), flush_interval=0.05)
+        saved_ids = []
+        writer.add_session('s1', 1)
+        writer.add_message('s1', 1, 'user', 'Bonjour')
+        writer.add_message('s1', 1, 'bot', 'Bonjour !', on_saved=saved_ids.append)
+        writer.touch_session('s1')
+        flushed = writer.flush(2)
+        stats = writer.stats()
+        return all([
+            check("file vidée", flushed),
+            check("messages dans l'ordre de dépôt",
+                  read_messages(path) == [('s1', 'user', 'Bonjour'), ('s1', 'bot', 'Bonjour !')]),
+            check(f"suite appelée avec l'id du message: {saved_ids}", saved_ids == [2]),
+            check(f"un seul lot pour 4 écritures ({stats['batches']})", stats['batches'] == 1 and stats['written'] == 4),
+        ])
+
+
+def test_row_fallback():
+    """Une ligne refusée n'emporte pas les autres écritures du lot"""
+    print("\n" + "="*60)
+    print("🧪 TEST 2: Repli ligne par ligne")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = create_database(tmp)
+        writer = MessageWriter(lambda: sqlite3.connect(path, check_same_thread=False), flush_interval=0.05)
+        writer.add_message('s1', 1, 'user', 'Premier')
+        writer.add_message('s2', 2, 'intrus', 'Refusé par la contrainte')
+        writer.add_message('s3', 3, 'user', 'Dernier')
+        flushed = writer.flush(5)
+        stats = writer.stats()
+        return all([
+            check("file vidée", flushed),
+            check("lignes valides enregistrées",
+                  read_messages(path) == [('s1', 'user', 'Premier'), ('s3', 'user', 'Dernier')]),
+            check(f"une écriture abandonnée ({stats['dropped']}), deux enregistrées ({stats['written']})",
+                  stats['dropped'] == 1 and stats['written'] == 2),
+        ])
+
+
+def test_recovery():
+    """Connexion impossible puis rétablie; thread arrêté puis redémarré"""
+    print("\n" + "="*60)
+    print("🧪 TEST 3: Reprise après erreur")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = create_database(tmp)
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise sqlite3.OperationalError("base indisponible")
+            return sqlite3.connect(path, check_same_thread=False)
+
+        writer = MessageWriter(connect, flush_interval=0.01, put_timeout=1)
+        writer.add_message('s1', 1, 'user', 'Perdu')
+        first = writer.flush(2)
+        writer.add_message('s1', 1, 'user', 'Enregistré')
+        second = writer.flush(2)
+        results = [
+            check("le thread survit à l'échec de connexion", first and second and writer.is_running()),
+            check("lot suivant écrit après reconnexion",
+                  read_messages(path) == [('s1', 'user', 'Enregistré')]),
+            check("lot perdu compté", writer.stats()['dropped'] == 1 and writer.reconnects == 1),
+        ]
+
+        # Thread arrêté: le dépôt suivant en démarre un nouveau
+        stopped = threading.Thread(target=lambda: None)
+        stopped.start()
+        stopped.join()
+        writer._thread = stopped
+        writer.add_message('s1', 1, 'bot', 'Après redémarrage')
+        results += [
+            check("thread redémarré au dépôt", writer.flush(2) and writer.restarts == 1),
+            check("message écrit par le nouveau thread", read_messages(path)[-1][2] == 'Après redémarrage'),
+        ]
+        return all(results)
+
+
+def main():
+    """Fonction principale"""
+    print("\n🚀 Tests de l'écriture différée des messages")
+
+    tests = [test_batch, test_row_fallback, test_recovery]
+    results = [test() for test in tests]
+
+    passed = sum(results)
+    print("\n" + "="*60)
+    print(f"📊 Tests réussis: {passed}/{len(results)}")
+    print("="*60 + "\n")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
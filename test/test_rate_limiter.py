@@ -0,0 +1,152 @@
+"""
+Tests du limiteur de débit sortant (services/rate_limiter.py)
+Vérifie l'admission, l'attente, le refus, le quota partagé et l'ordre
+disjoncteur puis quota avant un appel au fournisseur
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Ajouter le répertoire parent (racine du projet) au path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.llm_provider import LocalProvider
+from services.rate_limiter import RateLimiter, RateLimited
+
+# État partagé des seaux: fichiers SQLite jetables
+TMP_DIR = tempfile.TemporaryDirectory()
+
+
+def check(label, condition):
+    """Affiche le résultat d'une vérification"""
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def state_path(name):
+    """Fichier d'état neuf dans le répertoire temporaire des tests"""
+    return os.path.join(TMP_DIR.name, f"{name}.db")
+
+
+def refused(limiter, prompt_tokens, deadline=None):
+    try:
+        limiter.acquire(prompt_tokens, deadline)
+        return False
+    except RateLimited:
+        return True
+
+
+def test_admission():
+    """Requêtes par minute: admises, mises en attente puis refusées"""
+    print("\n" + "="*60)
+    print("🧪 TEST 1: Admission et attente")
+    print("="*60)
+
+    # 600 requêtes/minute: une requête toutes les 0,1 s une fois le seau vide
+    limiter = RateLimiter(path=state_path('rpm'), requests_per_minute=600, max_wait_seconds=0.5)
+    waits = [limiter.acquire(10) for _ in range(600)]
+    started = time.perf_counter()
+    queued_wait = limiter.acquire(10)
+    elapsed = time.perf_counter() - started
+
+    strict = RateLimiter(path=state_path('strict'), requests_per_minute=1, max_wait_seconds=0.5)
+    strict.acquire(10)
+    stats = strict.stats()
+    return all([
+        check("quota complet admis sans attente", max(waits) == 0.0),
+        check(f"appel suivant mis en attente ({queued_wait * 1000:.0f} ms)",
+              0 < queued_wait <= 0.5 and elapsed >= queued_wait * 0.9),
+        check("attente au-delà du maximum: refus", refused(strict, 10)),
+        check("échéance dépassée: refus", refused(limiter, 10, deadline=time.monotonic())),
+        check(f"compteurs: {stats['acquired']} admis, {strict.shed} refusés", stats['acquired'] == 1 and strict.shed == 1),
+    ])
+
+
+def test_shared_quota():
+    """Deux workers (deux limiteurs, un fichier) consomment le même quota"""
+    print("\n" + "="*60)
+    print("🧪 TEST 2: Quota partagé entre workers")
+    print("="*60)
+
+    path = state_path('shared')
+    worker_a = RateLimiter(path=path, requests_per_minute=2, max_wait_seconds=0)
+    worker_b = RateLimiter(path=path, requests_per_minute=2, max_wait_seconds=0)
+    worker_a.acquire(10)
+    worker_b.acquire(10)
+    return all([
+        check("quota épuisé par les deux workers: refus sur A", refused(worker_a, 10)),
+        check("... et sur B", refused(worker_b, 10)),
+    ])
+
+
+def test_oversized():
+    """Un appel plus coûteux que le quota de tokens est plafonné, pas refusé à vie"""
+    print("\n" + "="*60)
+    print("🧪 TEST 3: Appel plus coûteux qu'un quota complet")
+    print("="*60)
+
+    limiter = RateLimiter(path=state_path('tpm'), tokens_per_minute=1000,
+                          max_wait_seconds=0.5, output_tokens=0)
+    admitted = not refused(limiter, 5000)
+    return all([
+        check("seau plein: appel de 5000 tokens admis (quota 1000)", admitted),
+        check("plafonnement compté", limiter.stats()['oversized'] == 1),
+        check("seau vidé: l'appel suivant est refusé", refused(limiter, 500)),
+    ])
+
+
+def test_breaker_before_quota():
+    """Un appel refusé par le disjoncteur ne consomme pas de quota"""
+    print("\n" + "="*60)
+    print("🧪 TEST 4: Disjoncteur avant le quota")
+    print("="*60)
+
+    breaker = CircuitBreaker(min_calls=1, open_seconds=60)
+    breaker.record(0.1, ok=False, permit=breaker.check())
+    limiter = RateLimiter(path=state_path('breaker'), requests_per_minute=1, max_wait_seconds=0)
+    provider = LocalProvider(latency_ms=1, spread=0.0, breaker=breaker, limiter=limiter)
+
+    try:
+        provider.generate("Bonjour")
+        rejected = False
+    except CircuitOpenError:
+        rejected = True
+    results = [
+        check("circuit ouvert: appel refusé", rejected),
+        check("aucun quota consommé", limiter.stats()['acquired'] == 0),
+    ]
+
+    # Semi-ouvert: l'essai refusé faute de quota rend sa place
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    breaker.record(0.1, ok=False, permit=breaker.check())
+    limiter.acquire(10)
+    provider = LocalProvider(latency_ms=1, spread=0.0, breaker=breaker, limiter=limiter)
+    try:
+        provider.generate("Bonjour")
+    except RateLimited:
+        pass
+    results.append(check("essai refusé faute de quota: autorisation rendue", not breaker.is_open()))
+    return all(results)
+
+
+def main():
+    """Fonction principale"""
+    print("\n🚀 Tests du limiteur de débit")
+
+    tests = [test_admission, test_shared_quota, test_oversized, test_breaker_before_quota]
+    results = [test() for test in tests]
+
+    passed = sum(results)
+    print("\n" + "="*60)
+    print(f"📊 Tests réussis: {passed}/{len(results)}")
+    print("="*60 + "\n")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,137 @@
+"""
+Tests du cache des réponses (services/response_cache.py)
+Vérifie le seuil de similarité, l'expiration et la purge partagée entre workers
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Ajouter le répertoire parent (racine du projet) au path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from services.response_cache import ResponseCache, PurgeGenerations
+
+
+def check(label, condition):
+    """Affiche le résultat d'une vérification"""
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def test_threshold():
+    """Seules les questions assez proches (et de même intention) sont servies"""
+    print("\n" + "="*60)
+    print("🧪 TEST 1: Seuil de similarité")
+    print("="*60)
+
+    cache = ResponseCache(max_entries=10, threshold=0.9)
+    cache.put("Quels sont les frais de scolarité ?", 'frais', "450 000 FCFA")
+    results = [
+        check("même question normalisée servie",
+              cache.get("quels sont les FRAIS de scolarite", 'frais') == "450 000 FCFA"),
+        check("autre intention: défaut de cache",
+              cache.get("Quels sont les frais de scolarité ?", 'programmes') is None),
+        check("question différente: défaut de cache",
+              cache.get("Quelle est la date de la rentrée ?", 'frais') is None),
+        check(f"compteurs: {cache.hits} succès, {cache.misses} défauts", cache.hits == 1 and cache.misses == 2),
+    ]
+
+    # Question voisine: servie ou non selon le seuil
+    for threshold, served in ((0.5, True), (0.99, False)):
+        near = ResponseCache(max_entries=10, threshold=threshold)
+        near.put("Frais de scolarité de la licence ?", 'frais', "450 000 FCFA")
+        answer = near.get("Frais de scolarité du master ?", 'frais')
+        results.append(check(f"question voisine, seuil {threshold}: {'servie' if served else 'défaut de cache'}",
+                             (answer is not None) == served))
+    return all(results)
+
+
+def test_ttl():
+    """Une réponse expirée n'est plus servie"""
+    print("\n" + "="*60)
+    print("🧪 TEST 2: Durée de vie")
+    print("="*60)
+
+    cache = ResponseCache(max_entries=10, ttl=0.05)
+    cache.put("Quand est la rentrée ?", 'calendrier', "En octobre")
+    fresh = cache.get("Quand est la rentrée ?", 'calendrier')
+    time.sleep(0.1)
+    expired = cache.get("Quand est la rentrée ?", 'calendrier')
+    return all([
+        check("réponse servie avant expiration", fresh == "En octobre"),
+        check("réponse écartée après expiration", expired is None),
+        check("expiration comptée", cache.expirations == 1 and cache.stats()['size'] == 0),
+    ])
+
+
+def test_shared_purge():
+    """Une purge reçue par un worker s'applique au cache des autres"""
+    print("\n" + "="*60)
+    print("🧪 TEST 3: Purge partagée entre workers")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.db')
+
+        def connect():
+            return sqlite3.connect(path)
+
+        # Deux workers: deux caches en mémoire, une même base
+        worker_a = ResponseCache(max_entries=10, generations=PurgeGenerations(connect))
+        worker_b = ResponseCache(max_entries=10, generations=PurgeGenerations(connect))
+        for cache in (worker_a, worker_b):
+            cache.put("Quels sont les frais ?", 'frais', "Anciens frais")
+            cache.put("Comment vous contacter ?", 'contact', "Ancien contact")
+
+        removed = worker_a.purge('frais')
+        results = [
+            check(f"purge de l'intention frais sur le worker A ({removed} réponse)", removed == 1),
+            check("worker B: frais purgés",
+                  worker_b.get("Quels sont les frais ?", 'frais') is None),
+            check("worker B: contact conservé",
+                  worker_b.get("Comment vous contacter ?", 'contact') == "Ancien contact"),
+        ]
+
+        worker_b.put("Quels sont les frais ?", 'frais', "Nouveaux frais")
+        results.append(check("réponse stockée après la purge servie",
+                             worker_b.get("Quels sont les frais ?", 'frais') == "Nouveaux frais"))
+
+        worker_b.purge()
+        results += [
+            check("purge complète depuis B: worker A vidé",
+                  worker_a.get("Comment vous contacter ?", 'contact') is None),
+            check("réponses purgées comptées", worker_a.purged == 1 and worker_b.purged == 1),
+        ]
+
+        # Table illisible: le cache se comporte comme vide plutôt que de
+        # servir une réponse peut-être purgée
+        generations = PurgeGenerations(connect)
+        cache = ResponseCache(max_entries=10, generations=generations)
+        cache.put("Quels sont les frais ?", 'frais', "Frais")
+        generations.connect = lambda: sqlite3.connect(os.path.join(tmp, 'absent', 'cache.db'))
+        results.append(check("base indisponible: rien n'est servi",
+                             cache.get("Quels sont les frais ?", 'frais') is None))
+    return all(results)
+
+
+def main():
+    """Fonction principale"""
+    print("\n🚀 Tests du cache des réponses")
+
+    tests = [test_threshold, test_ttl, test_shared_purge]
+    results = [test() for test in tests]
+
+    passed = sum(results)
+    print("\n" + "="*60)
+    print(f"📊 Tests réussis: {passed}/{len(results)}")
+    print("="*60 + "\n")
+    return passed == len(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,72 @@
+"""
+Script d'entraînement du classifieur d'intention local
+Lit les messages utilisateurs annotés (metadata.intent) de la base et les
+exemples de référence, entraîne les poids et les enregistre au format
+NumPy (.npz) pour services/intent_classifier.py
+"""
+
+import argparse
+import os
+import random
+
+from dotenv import load_dotenv
+
+from services.intent_classifier import IntentClassifier, load_training_data
+
+load_dotenv()
+
+DB_PATH = "database/chatbot.db"
+MODEL_PATH = os.getenv('INTENT_CLASSIFIER_PATH', 'database/intent_classifier.npz')
+
+
+def evaluate(classifier, texts, labels):
+    """Exactitude du classifieur sur un jeu de messages étiquetés"""
+    if not texts:
+        return None
+    correct = sum(1 for text, label in zip(texts, labels) if classifier.predict(text)[0] == label)
+    return correct / len(texts)
+
+
+def train(database, output, dim, epochs, holdout):
+    """Entraîne et enregistre le classifieur"""
+
+    if not os.path.exists(database):
+        print("❌ Base de données non trouvée. Exécutez d'abord init_db.py")
+        return
+
+    print("🔄 Lecture des messages...")
+    texts, labels, from_database = load_training_data(database)
+    print(f"📄 {len(texts)} exemples ({from_database} issus de la table messages)")
+    for intent in sorted(set(labels)):
+        print(f"  - {intent}: {labels.count(intent)}")
+
+    # Évaluation sur une partie des exemples mise de côté
+    samples = list(zip(texts, labels))
+    random.Random(42).shuffle(samples)
+    split = int(len(samples) * holdout)
+    test_set, train_set = samples[:split], samples[split:]
+
+    if test_set:
+        classifier = IntentClassifier.train(*zip(*train_set), dim=dim, epochs=epochs)
+        accuracy = evaluate(classifier, *zip(*test_set))
+        print(f"\n🎯 Exactitude sur {len(test_set)} exemples mis de côté: {accuracy:.1%}")
+
+    # Modèle final entraîné sur tous les exemples
+    classifier = IntentClassifier.train(texts, labels, dim=dim, epochs=epochs)
+    print(f"🎯 Exactitude sur le jeu d'entraînement: {evaluate(classifier, texts, labels):.1%}")
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    classifier.save(output)
+    print(f"\n✅ Classifieur enregistré: {output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Entraîne le classifieur d'intention local")
+    parser.add_argument('--database', default=DB_PATH, help="Base SQLite source")
+    parser.add_argument('--output', default=MODEL_PATH, help="Fichier .npz de sortie")
+    parser.add_argument('--dim', type=int, default=4096, help="Taille de l'espace de hachage")
+    parser.add_argument('--epochs', type=int, default=300, help="Nombre de passes d'entraînement")
+    parser.add_argument('--holdout', type=float, default=0.2, help="Part des exemples réservée à l'évaluation")
+    args = parser.parse_args()
+
+    train(args.database, args.output, args.dim, args.epochs, args.holdout)